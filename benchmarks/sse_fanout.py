@@ -0,0 +1,120 @@
+"""Compare publish cost of the two `sse` fan-out designs.
+
+`EventBroadcaster` copies every event into each subscriber's own queue;
+`SequencedEventBroadcaster` appends it once to a shared log that each
+subscriber reads through a cursor. For 10, 100 and 1000 subscribers this
+measures:
+
+- publish latency: wall time of one `broadcast()` call while every
+  subscriber has a thread blocked waiting for the next event, the way each
+  `/events` request thread does;
+- memory: bytes still allocated after publishing to subscribers that never
+  read anything (a stalled guest), as seen by `tracemalloc`.
+
+Run with `python benchmarks/sse_fanout.py`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import queue
+import statistics
+import threading
+import time
+import tracemalloc
+
+from logitech_flow_kvm.sse import EventBroadcaster
+from logitech_flow_kvm.sse import SequencedEventBroadcaster
+
+DESIGNS = {
+    "queue-per-subscriber": EventBroadcaster,
+    "sequenced-log": SequencedEventBroadcaster,
+}
+
+
+def measure_publish_latency(
+    broadcaster_class: type, subscribers: int, publishes: int
+) -> list[float]:
+    broadcaster = broadcaster_class()
+    stop = threading.Event()
+    received = threading.Semaphore(0)
+
+    def consume(subscriber) -> None:
+        while not stop.is_set():
+            try:
+                subscriber.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            received.release()
+
+    threads = [
+        threading.Thread(
+            target=consume, args=(broadcaster.subscribe().queue,), daemon=True
+        )
+        for _ in range(subscribers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)  # let every consumer block in get()
+
+    latencies = []
+    for n in range(publishes):
+        started = time.perf_counter()
+        broadcaster.broadcast("host-connected", str(n))
+        latencies.append(time.perf_counter() - started)
+        # Wait for every subscriber to take it, so each publish measures
+        # waking blocked readers rather than piling onto already-awake ones.
+        for _ in range(subscribers):
+            received.acquire()
+
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies
+
+
+def measure_stalled_memory(
+    broadcaster_class: type, subscribers: int, publishes: int
+) -> int:
+    gc.collect()
+    tracemalloc.start()
+    broadcaster = broadcaster_class()
+    subscriptions = [broadcaster.subscribe() for _ in range(subscribers)]
+    baseline, _ = tracemalloc.get_traced_memory()
+    for n in range(publishes):
+        broadcaster.broadcast("host-connected", str(n))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del subscriptions
+    return current - baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--publishes", type=int, default=200)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[10, 100, 1000])
+    options = parser.parse_args()
+
+    print(
+        f"{'design':<22} {'subs':>5} {'median us':>10} {'p99 us':>10} "
+        f"{'stalled KiB':>12}"
+    )
+    for subscribers in options.subscribers:
+        for name, broadcaster_class in DESIGNS.items():
+            latencies = measure_publish_latency(
+                broadcaster_class, subscribers, options.publishes
+            )
+            memory = measure_stalled_memory(
+                broadcaster_class, subscribers, options.publishes
+            )
+            p99 = statistics.quantiles(latencies, n=100)[98]
+            print(
+                f"{name:<22} {subscribers:>5} "
+                f"{statistics.median(latencies) * 1e6:>10.1f} "
+                f"{p99 * 1e6:>10.1f} {memory / 1024:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
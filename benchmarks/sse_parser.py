@@ -0,0 +1,96 @@
+"""Compare flow-client's two ways of parsing the /events stream.
+
+- line-based: `Response.iter_lines(decode_unicode=True)` feeding
+  `parse_sse_events`, as flow-client used to;
+- byte-level: `Response.iter_content()` feeding `SseDecoder`.
+
+Both read the same pre-encoded stream of N events through a real
+`requests.Response` (over an in-memory raw body), so each pays requests'
+own chunk iteration the way it would against a live server.
+
+Run with `python benchmarks/sse_parser.py`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+from collections.abc import Callable
+
+import requests
+
+from logitech_flow_kvm.sse import SseDecoder
+from logitech_flow_kvm.sse import format_sse
+from logitech_flow_kvm.sse import parse_sse_events
+
+
+def build_stream(events: int) -> bytes:
+    parts = []
+    for n in range(events):
+        if n % 10 == 0:
+            parts.append(": keepalive\n\n")
+        parts.append(format_sse("leader-host", str(n % 6 + 1), id=1_000_000 + n))
+    return "".join(parts).encode()
+
+
+def make_response(stream: bytes) -> requests.Response:
+    response = requests.Response()
+    response.raw = io.BytesIO(stream)
+    response.encoding = "utf-8"
+    return response
+
+
+def line_based(stream: bytes, chunk_size: int) -> int:
+    response = make_response(stream)
+    count = 0
+    for _ in parse_sse_events(
+        response.iter_lines(chunk_size=chunk_size, decode_unicode=True)
+    ):
+        count += 1
+    return count
+
+
+def byte_level(stream: bytes, chunk_size: int) -> int:
+    response = make_response(stream)
+    decoder = SseDecoder()
+    count = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        count += len(decoder.feed(chunk))
+    return count
+
+
+def best_of(
+    repeats: int, parse: Callable[[bytes, int], int], stream: bytes, chunk_size: int
+) -> tuple[float, int]:
+    best = float("inf")
+    count = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        count = parse(stream, chunk_size)
+        best = min(best, time.perf_counter() - started)
+    return best, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[64, 512, 8192])
+    options = parser.parse_args()
+
+    stream = build_stream(options.events)
+    print(f"{len(stream) / 1e6:.1f} MB, {options.events} events")
+    print(f"{'parser':<12} {'chunk':>6} {'seconds':>8} {'events/s':>12} {'MB/s':>8}")
+    for chunk_size in options.chunk_sizes:
+        for name, parse in (("line-based", line_based), ("byte-level", byte_level)):
+            seconds, count = best_of(options.repeats, parse, stream, chunk_size)
+            assert count == options.events, (name, count)
+            print(
+                f"{name:<12} {chunk_size:>6} {seconds:>8.3f} "
+                f"{count / seconds:>12,.0f} {len(stream) / seconds / 1e6:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
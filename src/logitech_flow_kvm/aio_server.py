@@ -0,0 +1,503 @@
+"""An asyncio alternative to Flask's development server for flow-server.
+
+Flask's server (with `threaded=True`) dedicates an OS thread to every
+connection -- including every `/events` subscriber, which spends nearly its
+whole life blocked waiting for the next event. `AsyncFlowServer` instead
+runs every connection on a single event loop over stdlib asyncio streams:
+
+- `/events` is served natively: each subscriber is a coroutine asleep until
+  the broadcaster publishes something (or a keepalive is due), so an idle
+  subscriber costs a socket and a few small objects, not a thread.
+- Every other route (`/pairing`, `/configuration`, `/leader-host`,
+  `/clipboard`) is handed to the very same Flask app as a plain WSGI call on
+  a worker thread, so each still has exactly one implementation. They're
+  short-lived anyway -- except pairing, which is serialized regardless.
+
+Only as much HTTP/1.1 as flow-client (i.e. `requests`) actually speaks is
+implemented: `Content-Length` or chunked request bodies, persistent
+connections, and a chunked response for the event stream.
+
+Request bodies are read whole before the app is called -- chunked ones
+included, so a clipboard `PUT` streamed by flow-client arrives here in one
+piece rather than being decoded as it comes in, as Flask's server lets
+`/clipboard` do. Clipboards are small enough for that to be cheap, and the
+body is bounded by `--max-clipboard-size` (as it would be encoded) before
+any of it is buffered.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import queue
+import ssl
+import sys
+from http import HTTPStatus
+from typing import TYPE_CHECKING
+from typing import NamedTuple
+from urllib.parse import unquote_to_bytes
+
+from .clipboard import max_encoded_size
+from .sse import KEEPALIVE_INTERVAL
+from .sse import RESUMED_HEADER
+from .sse import parse_last_event_id
+
+if TYPE_CHECKING:
+    from .commands.flow_server import FlowServerAPI
+    from .sse import Subscription
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on a request's line plus headers; flow-client's are a few
+# hundred bytes.
+MAX_HEADER_SIZE = 64 * 1024
+
+# Upper bound on a request body, however small the app's clipboard limit:
+# every other route's body is a few bytes of JSON or a host number.
+MIN_BODY_SIZE = 64 * 1024
+
+# How long a persistent connection may sit between requests before it's
+# closed. Doesn't apply to `/events`, whose idleness is the whole point.
+IDLE_TIMEOUT = 75.0
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus) -> None:
+        super().__init__(status.phrase)
+        self.status = status
+
+
+class _Request(NamedTuple):
+    method: str
+    target: str
+    version: str
+    # Names lowercased; repeated headers joined with ", ".
+    headers: dict[str, str]
+    body: bytes
+
+    @property
+    def path(self) -> str:
+        return self.target.partition("?")[0]
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class AsyncFlowServer:
+    """Serves `app`'s routes from one asyncio event loop; see the module
+    docstring."""
+
+    def __init__(
+        self,
+        app: FlowServerAPI,
+        *,
+        host: str,
+        port: int,
+        ssl_context: ssl.SSLContext | None,
+        keepalive_interval: float = KEEPALIVE_INTERVAL,
+        idle_timeout: float = IDLE_TIMEOUT,
+    ) -> None:
+        self.app = app
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl_context
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        # In practice, the largest thing anyone sends is a clipboard: the
+        # app's own limit applies to it decoded, this to how it's sent.
+        self.max_body_size = max(
+            max_encoded_size(app.max_clipboard_size), MIN_BODY_SIZE
+        )
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.Server | None = None
+        self._connections: set[asyncio.Task] = set()
+        # Set (and immediately replaced by a fresh one) whenever the
+        # broadcaster publishes anything, waking every `/events` stream to
+        # drain its queue. See `_stream_events` for why one shared event is
+        # enough.
+        self._published: asyncio.Event | None = None
+
+    @property
+    def bound_port(self) -> int:
+        """The port actually listened on -- differs from `port` if that was 0."""
+        assert self._server is not None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._published = asyncio.Event()
+        self.app.events.add_listener(self._on_publish)
+        self._server = await asyncio.start_server(
+            self._handle_connection,
+            self.host,
+            self.port,
+            ssl=self.ssl_context,
+            limit=MAX_HEADER_SIZE,
+        )
+
+    async def close(self) -> None:
+        self.app.events.remove_listener(self._on_publish)
+        if self._server is None:
+            return
+        self._server.close()
+        # Event streams never finish on their own, and `wait_closed()` waits
+        # for every connection to.
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    def _on_publish(self) -> None:
+        # Called on whichever thread published, with the broadcaster's lock
+        # held -- so just hand off to the loop.
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(self._wake)
+
+    def _wake(self) -> None:
+        assert self._published is not None
+        self._published.set()
+        self._published = asyncio.Event()
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), self.idle_timeout
+                    )
+                except asyncio.TimeoutError:
+                    return
+                except _HttpError as e:
+                    await self._send(writer, e.status, keep_alive=False)
+                    return
+                if request is None:
+                    return
+
+                if request.path == "/events":
+                    if request.method == "GET":
+                        await self._serve_events(request, reader, writer)
+                        return
+                    # Never the app's: Flask would answer a `HEAD` from the
+                    # `GET` route, whose endless body `_call_app` would then
+                    # sit reading.
+                    await self._send(
+                        writer,
+                        HTTPStatus.METHOD_NOT_ALLOWED,
+                        [("Allow", "GET")],
+                        keep_alive=request.keep_alive,
+                    )
+                else:
+                    await self._serve_wsgi(request, writer)
+                if not request.keep_alive:
+                    return
+        except (
+            ConnectionError,
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            ssl.SSLError,
+        ):
+            # The client went away (or started sending garbage) mid-request
+            # or mid-stream.
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> _Request | None:
+        """The next request on this connection, or None if the client closed
+        it cleanly in between requests."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise _HttpError(HTTPStatus.BAD_REQUEST) from e
+        except asyncio.LimitOverrunError as e:
+            raise _HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE) from e
+
+        request_line, *header_lines = head.decode("latin-1").strip().split("\r\n")
+        try:
+            method, target, version = request_line.split(" ")
+        except ValueError as e:
+            raise _HttpError(HTTPStatus.BAD_REQUEST) from e
+        if not version.startswith("HTTP/1."):
+            raise _HttpError(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+
+        headers: dict[str, str] = {}
+        for line in header_lines:
+            name, sep, value = line.partition(":")
+            if not sep:
+                raise _HttpError(HTTPStatus.BAD_REQUEST)
+            name = name.strip().lower()
+            value = value.strip()
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+
+        transfer_encoding = headers.pop("transfer-encoding", None)
+        if transfer_encoding is None:
+            body = await self._read_body(reader, headers.get("content-length", "0"))
+        elif transfer_encoding.lower() == "chunked":
+            body = await self._read_chunked_body(reader)
+            # The app sees it as the plain, already-reassembled body it is.
+            headers["content-length"] = str(len(body))
+        else:
+            raise _HttpError(HTTPStatus.NOT_IMPLEMENTED)
+
+        return _Request(method, target, version, headers, body)
+
+    def _parse_size(self, value: str, base: int = 10) -> int:
+        try:
+            size = int(value, base)
+        except ValueError as e:
+            raise _HttpError(HTTPStatus.BAD_REQUEST) from e
+        if size < 0:
+            raise _HttpError(HTTPStatus.BAD_REQUEST)
+        if size > self.max_body_size:
+            raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        return size
+
+    async def _read_body(
+        self, reader: asyncio.StreamReader, content_length: str
+    ) -> bytes:
+        length = self._parse_size(content_length)
+        return await reader.readexactly(length) if length else b""
+
+    async def _read_chunked_body(self, reader: asyncio.StreamReader) -> bytes:
+        """A `Transfer-Encoding: chunked` body -- e.g. flow-client's
+        compressed clipboard, streamed as it's produced."""
+        chunks: list[bytes] = []
+        total = 0
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            # Chunk extensions (after a ";") are allowed, and meaningless here.
+            size = self._parse_size(size_line.split(b";")[0].strip().decode(), 16)
+            if size == 0:
+                break
+            total += size
+            if total > self.max_body_size:
+                raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            chunk = await reader.readexactly(size + 2)
+            if chunk[-2:] != b"\r\n":
+                raise _HttpError(HTTPStatus.BAD_REQUEST)
+            chunks.append(chunk[:-2])
+        # Skip any trailer fields, up to the blank line ending the body.
+        while await reader.readuntil(b"\r\n") != b"\r\n":
+            pass
+        return b"".join(chunks)
+
+    async def _send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus | str,
+        headers: list[tuple[str, str]] | None = None,
+        body: bytes = b"",
+        *,
+        keep_alive: bool,
+    ) -> None:
+        if isinstance(status, HTTPStatus):
+            status = f"{status.value} {status.phrase}"
+        lines = [f"HTTP/1.1 {status}"]
+        for name, value in headers or []:
+            if name.lower() not in ("content-length", "connection"):
+                lines.append(f"{name}: {value}")
+        lines.append(f"Content-Length: {len(body)}")
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _serve_wsgi(
+        self, request: _Request, writer: asyncio.StreamWriter
+    ) -> None:
+        environ = self._environ(request, writer)
+        status, headers, body = await asyncio.to_thread(self._call_app, environ)
+        logger.debug("%s %s: %s", request.method, request.target, status)
+        if request.method == "HEAD":
+            body = b""
+        await self._send(writer, status, headers, body, keep_alive=request.keep_alive)
+
+    def _environ(self, request: _Request, writer: asyncio.StreamWriter) -> dict:
+        path, _, query = request.target.partition("?")
+        peer = writer.get_extra_info("peername") or ("", 0)
+        environ = {
+            "REQUEST_METHOD": request.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": unquote_to_bytes(path).decode("latin-1"),
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.host,
+            "SERVER_PORT": str(self.port),
+            "SERVER_PROTOCOL": request.version,
+            "REMOTE_ADDR": peer[0],
+            "REMOTE_PORT": str(peer[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "https" if self.ssl_context is not None else "http",
+            "wsgi.input": io.BytesIO(request.body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in request.headers.items():
+            key = name.upper().replace("-", "_")
+            if key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                environ[key] = value
+            else:
+                environ[f"HTTP_{key}"] = value
+        return environ
+
+    def _call_app(self, environ: dict) -> tuple[str, list[tuple[str, str]], bytes]:
+        response: list = []
+
+        def start_response(status, headers, exc_info=None):
+            response[:] = [status, headers]
+            return lambda data: None
+
+        result = self.app(environ, start_response)
+        try:
+            body = b"".join(result)
+        finally:
+            close = getattr(result, "close", None)
+            if close is not None:
+                close()
+        status, headers = response
+        return status, headers, body
+
+    def _authenticate(self, request: _Request) -> str | None:
+        """The host name a request's Bearer token was issued to, if valid --
+        the same (in-memory, so non-blocking) check `bind_routes`'
+        `HTTPTokenAuth` makes."""
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+        user = self.app.verify_auth_token(token.strip())
+        return str(user) if user else None
+
+    async def _serve_events(
+        self,
+        request: _Request,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        connecting_host = self._authenticate(request)
+        if connecting_host is None:
+            await self._send(
+                writer,
+                HTTPStatus.UNAUTHORIZED,
+                [("WWW-Authenticate", 'Bearer realm="Authentication Required"')],
+                b"Unauthorized Access",
+                keep_alive=False,
+            )
+            return
+
+        # Opening and closing the stream can block on the TUI (publishing
+        # status waits for its event loop), so they run off this one.
+        subscription = await asyncio.to_thread(
+            self.app.open_event_stream,
+            connecting_host,
+            parse_last_event_id(request.headers.get("last-event-id")),
+        )
+        try:
+            await self._stream_events(subscription, reader, writer)
+        finally:
+            await asyncio.to_thread(self.app.close_event_stream, subscription)
+
+    async def _stream_events(
+        self,
+        subscription: Subscription,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        head = [
+            "HTTP/1.1 200 OK",
+            "Content-Type: text/event-stream; charset=utf-8",
+            "Cache-Control: no-cache",
+            "Transfer-Encoding: chunked",
+        ]
+        if subscription.resumed:
+            head.append(f"{RESUMED_HEADER}: 1")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        # flow-client never sends anything after its request, so the read
+        # only completes when the connection closes -- noticing a client
+        # that left without waiting for the next keepalive to fail.
+        closed = asyncio.ensure_future(self._wait_for_eof(reader))
+        published: asyncio.Task | None = None
+        pending = list(subscription.initial)
+        try:
+            while True:
+                # Start waiting *before* draining the queue: anything
+                # enqueued after the drain below sets this same event (the
+                # wake-up is scheduled on this loop, so it can't run in
+                # between), so it can't be missed.
+                if published is None:
+                    assert self._published is not None
+                    published = asyncio.ensure_future(self._published.wait())
+                while True:
+                    try:
+                        pending.append(subscription.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if pending:
+                    self._write_chunk(writer, "".join(pending))
+                    pending = []
+                    await writer.drain()
+
+                done, _ = await asyncio.wait(
+                    (closed, published),
+                    timeout=self.keepalive_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if closed in done:
+                    return
+                if published in done:
+                    published = None
+                else:
+                    self._write_chunk(writer, ": keepalive\n\n")
+                    await writer.drain()
+        finally:
+            closed.cancel()
+            if published is not None:
+                published.cancel()
+
+    @staticmethod
+    async def _wait_for_eof(reader: asyncio.StreamReader) -> None:
+        try:
+            await reader.read()
+        except (ConnectionError, ssl.SSLError):
+            pass
+
+    @staticmethod
+    def _write_chunk(writer: asyncio.StreamWriter, text: str) -> None:
+        data = text.encode("utf-8")
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+def run_async_server(
+    app: FlowServerAPI, *, host: str, port: int, cert_path: str, key_path: str
+) -> None:
+    """Serve `app` over TLS with `AsyncFlowServer` until interrupted."""
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ssl_context.load_cert_chain(cert_path, key_path)
+    server = AsyncFlowServer(app, host=host, port=port, ssl_context=ssl_context)
+    asyncio.run(server.serve_forever())
@@ -0,0 +1,217 @@
+"""The server's TLS certificate: generating it, and deciding when an existing
+one has to be regenerated.
+
+Kept apart from `util` since `cryptography` (and `psutil`, for the
+addresses the certificate lists) take longer to import than any lighter
+command, such as `switch-to-host`, takes to run; only flow-server needs
+them.
+"""
+
+import datetime
+import ipaddress
+import os
+import socket
+from collections.abc import Iterable
+
+import platformdirs
+import psutil
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from . import constants
+from .exceptions import NoCertificateAvailable
+
+# Key types `--key-type` offers for the server certificate. ECDSA P-256 is
+# the default: generated in milliseconds, and far cheaper to handshake with
+# than RSA-4096 (which only remains for compatibility with TLS stacks that
+# lack EC support).
+KEY_TYPES = ("ecdsa", "ed25519", "rsa")
+DEFAULT_KEY_TYPE = "ecdsa"
+
+CertificatePrivateKey = (
+    ec.EllipticCurvePrivateKey | ed25519.Ed25519PrivateKey | rsa.RSAPrivateKey
+)
+
+
+def get_all_ips() -> list[str]:
+    ips = set()
+
+    for addresses in psutil.net_if_addrs().values():
+        for address in addresses:
+            if address.family == socket.AF_INET:
+                ips.add(address.address)
+
+    return list(ips)
+
+
+def _load_certificate(cert_path: str) -> x509.Certificate:
+    with open(cert_path, "rb") as f:
+        return x509.load_pem_x509_certificate(f.read())
+
+
+def _certificate_dns_names(certificate: x509.Certificate) -> set[str]:
+    try:
+        san = certificate.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName
+        )
+    except x509.ExtensionNotFound:
+        return set()
+    return set(san.value.get_values_for_type(x509.DNSName))
+
+
+def _certificate_key_type(certificate: x509.Certificate) -> str:
+    public_key = certificate.public_key()
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return "ecdsa"
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "ed25519"
+    return "rsa"
+
+
+def _certificate_matches_key(certificate: x509.Certificate, key_path: str) -> bool:
+    """Whether `key_path` holds the private half of `certificate`'s key --
+    i.e. the pair wasn't left mismatched by an interrupted regeneration."""
+    try:
+        with open(key_path, "rb") as f:
+            key = serialization.load_pem_private_key(f.read(), password=None)
+    except ValueError:
+        return False
+    public_format = serialization.PublicFormat.SubjectPublicKeyInfo
+    return key.public_key().public_bytes(
+        serialization.Encoding.PEM, public_format
+    ) == certificate.public_key().public_bytes(
+        serialization.Encoding.PEM, public_format
+    )
+
+
+def _generate_private_key(key_type: str) -> CertificatePrivateKey:
+    if key_type == "ecdsa":
+        return ec.generate_private_key(ec.SECP256R1())
+    if key_type == "ed25519":
+        return ed25519.Ed25519PrivateKey.generate()
+    if key_type == "rsa":
+        return rsa.generate_private_key(public_exponent=65537, key_size=4096)
+    raise ValueError(f"Unknown key type: {key_type}")
+
+
+def _write_atomically(path: str, data: bytes, mode: int = 0o644) -> None:
+    """Replace `path` with `data` all at once, so a crash can never leave a
+    truncated file behind."""
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _write_certificate(
+    cert_path: str, key_path: str, hostnames: set[str], key_type: str
+) -> None:
+    key = _generate_private_key(key_type)
+
+    subject = x509.Name(
+        [
+            x509.NameAttribute(NameOID.COUNTRY_NAME, "US"),
+            x509.NameAttribute(NameOID.STATE_OR_PROVINCE_NAME, "WA"),
+            x509.NameAttribute(NameOID.LOCALITY_NAME, "Seattle"),
+            x509.NameAttribute(NameOID.ORGANIZATION_NAME, "coddingtonbear"),
+            x509.NameAttribute(NameOID.ORGANIZATIONAL_UNIT_NAME, "logitech-flow-kvm"),
+            x509.NameAttribute(NameOID.EMAIL_ADDRESS, "none@none.com"),
+        ]
+    )
+    subject_alt_names: list[x509.GeneralName] = [
+        x509.IPAddress(ipaddress.ip_address(addr)) for addr in get_all_ips()
+    ]
+    subject_alt_names += [x509.DNSName(hostname) for hostname in sorted(hostnames)]
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=10 * 365))
+        .add_extension(x509.SubjectAlternativeName(subject_alt_names), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        # Ed25519 signs without a separate digest.
+        .sign(
+            key,
+            {
+                "ecdsa": hashes.SHA256(),
+                "ed25519": None,
+                "rsa": hashes.SHA512(),
+            }[key_type],
+        )
+    )
+
+    # Key first: if we're interrupted in between, the old certificate no
+    # longer matches the new key, which `get_certificate_key_path` notices
+    # and regenerates from -- rather than serving a broken pair.
+    _write_atomically(
+        key_path,
+        key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ),
+        mode=0o600,
+    )
+    _write_atomically(cert_path, cert.public_bytes(serialization.Encoding.PEM))
+
+
+def get_certificate_key_path(
+    name: str,
+    create: bool = False,
+    hostnames: Iterable[str] = (),
+    key_type: str | None = None,
+) -> tuple[str, str]:
+    """Paths to the `name` certificate and key, (re)generating them first if
+    `create` is set and they're missing, mismatched, or out of date.
+
+    `key_type` (one of `KEY_TYPES`) only forces regeneration when given
+    explicitly: an existing certificate of another type -- e.g. an RSA one
+    from before ECDSA became the default -- is otherwise kept, since
+    replacing it would make every paired client re-pair.
+    """
+    user_data_dir = platformdirs.user_data_dir(constants.APP_NAME, constants.APP_AUTHOR)
+
+    os.makedirs(user_data_dir, exist_ok=True)
+    cert_path = os.path.join(user_data_dir, f"{name}.cert")
+    key_path = os.path.join(user_data_dir, f"{name}.key")
+
+    hostnames = set(hostnames)
+    stale_reason: str | None = None
+    exists = os.path.exists(cert_path) and os.path.exists(key_path)
+    if exists:
+        certificate = _load_certificate(cert_path)
+        # Only hostnames (explicit, operator-provided) trigger regeneration --
+        # not IP addresses, which are auto-discovered and can change on their
+        # own (e.g. DHCP) without the operator asking for a new certificate.
+        if _certificate_dns_names(certificate) != hostnames:
+            stale_reason = "Certificate hostnames changed"
+        elif key_type is not None and _certificate_key_type(certificate) != key_type:
+            stale_reason = f"Certificate key type changed to {key_type}"
+        elif not _certificate_matches_key(certificate, key_path):
+            stale_reason = "Certificate does not match its key"
+
+    if not exists or stale_reason:
+        if not create:
+            raise NoCertificateAvailable()
+        if stale_reason:
+            print(
+                f"{stale_reason}; regenerating the server certificate. "
+                "Any already-running flow-client instances must be restarted -- "
+                "they will not recover on their own -- and will need to re-pair."
+            )
+        _write_certificate(cert_path, key_path, hostnames, key_type or DEFAULT_KEY_TYPE)
+
+    return (cert_path, key_path)
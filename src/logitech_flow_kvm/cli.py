@@ -1,11 +1,88 @@
+import argparse
+import importlib.metadata
+import logging
 import sys
+from typing import Any
 
-from safdie import SafdieRunner
+from safdie import BaseCommand
 
 from .logging_setup import configure_logging
 
+logger = logging.getLogger(__name__)
+
+COMMANDS_ENTRYPOINT = "logitech_flow_kvm.commands"
+
+
+class CommandRunner:
+    """Runs safdie `BaseCommand`s, like `SafdieRunner`, but imports only the
+    command being run.
+
+    `SafdieRunner` loads every command's entry point up front, in its
+    constructor, just to build its subparsers, so even `switch-to-host` --
+    bound to hotkeys, and done in a single HID++ request -- would first
+    import flow-server's Flask and Textual. This loads only the command named
+    on the command line; all of them are loaded only when none is (e.g. for
+    `--help`). It isn't a `SafdieRunner`, since there's no way to construct
+    one without that up-front load: it relies only on `BaseCommand`'s
+    interface, not on `SafdieRunner`'s internals.
+    """
+
+    def __init__(
+        self,
+        entrypoint_name: str,
+        cmd_class: type[BaseCommand] = BaseCommand,
+        parser_class: type[argparse.ArgumentParser] = argparse.ArgumentParser,
+    ):
+        self._entrypoint_name = entrypoint_name
+        self._cmd_class = cmd_class
+        self._commands: dict[str, type[BaseCommand]] = {}
+        self._parser = parser_class()
+
+    def _load_commands(self, argv: list[str]) -> None:
+        entry_points = importlib.metadata.entry_points(group=self._entrypoint_name)
+        named = [
+            entry_point for entry_point in entry_points if entry_point.name in argv[:1]
+        ]
+        for entry_point in named or entry_points:
+            # Skipped with a warning, as `SafdieRunner` does: one broken
+            # command mustn't take `--help` and every other one down with it.
+            try:
+                command = entry_point.load()
+            except ImportError:
+                logger.warning(
+                    "Attempted to load entrypoint %s, but an ImportError occurred.",
+                    entry_point,
+                )
+                continue
+            if not (isinstance(command, type) and issubclass(command, self._cmd_class)):
+                logger.warning(
+                    "Loaded entrypoint %s, but loaded class is not a subclass of "
+                    "`%s.%s`.",
+                    entry_point,
+                    self._cmd_class.__module__,
+                    self._cmd_class.__qualname__,
+                )
+                continue
+            self._commands[entry_point.name] = command
+
+    def parse_args(self, argv: list[str] | None = None) -> argparse.Namespace:
+        if argv is None:
+            argv = sys.argv[1:]
+
+        self._load_commands(argv)
+        subparsers = self._parser.add_subparsers(dest="command")
+        subparsers.required = True
+        for name, command in self._commands.items():
+            command.add_arguments(subparsers.add_parser(name, help=command.get_help()))
+
+        return self._parser.parse_args(argv)
+
+    def run(self, argv: list[str] | None = None) -> Any:
+        options = self.parse_args(argv)
+        return self._commands[options.command](options=options).handle()
+
 
 def main(args=sys.argv):
     configure_logging()
 
-    SafdieRunner("logitech_flow_kvm.commands").run()
+    CommandRunner(COMMANDS_ENTRYPOINT).run()
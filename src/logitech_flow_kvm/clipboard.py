@@ -0,0 +1,148 @@
+"""Clipboard sync helpers shared by flow-server and flow-client.
+
+Clipboard contents are identified by a hash of their UTF-8 bytes, used as
+the HTTP entity tag on `/clipboard`: a client that already holds the
+server's current clipboard gets a bodiless `304` back for its `GET`, and a
+`PUT` of what the server already holds is acknowledged with a `204` without
+touching the server's clipboard at all.
+
+Contents that do need to move are streamed in chunks and, when large enough
+to be worth it, compressed: `GET` negotiates a coding through
+`Accept-Encoding`/`Content-Encoding` as usual, and the server advertises
+the codings it accepts for a `PUT` body with an `Accept-Encoding` response
+header (RFC 7694). Either end enforces its own limit on the *decoded*
+size while decoding, so a small compressed body can't inflate past it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import zlib
+from collections.abc import Iterable
+from collections.abc import Iterator
+
+from .exceptions import ClipboardTooLarge
+
+# Default cap on clipboard contents (decoded) either end will send or accept.
+MAX_CLIPBOARD_SIZE = 16 * 1024 * 1024
+
+# How much is read, compressed or decompressed at a time.
+CHUNK_SIZE = 64 * 1024
+
+# Below this, compressing costs more than the bytes it could save.
+MIN_COMPRESS_SIZE = 1024
+
+# Content codings understood in either direction, most preferred first.
+ENCODINGS = ("gzip", "deflate")
+
+_WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+
+def content_etag(data: bytes) -> str:
+    """The (unquoted) entity tag identifying clipboard contents `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def parse_content_encoding(value: str | None) -> str | None:
+    """The coding named by a `Content-Encoding` header -- None for none --
+    or ValueError if it's not one of `ENCODINGS`."""
+    encoding = (value or "identity").strip().lower()
+    if encoding == "identity":
+        return None
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unsupported content coding: {encoding}")
+    return encoding
+
+
+def accepted_encodings(value: str | None) -> tuple[str, ...]:
+    """Which of `ENCODINGS` an `Accept-Encoding` header allows, in our order
+    of preference."""
+    allowed = set()
+    for item in (value or "").split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, param_value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            allowed.add(coding.strip().lower())
+    return tuple(
+        encoding for encoding in ENCODINGS if encoding in allowed or "*" in allowed
+    )
+
+
+def choose_encoding(data: bytes, accepted: Iterable[str]) -> str | None:
+    """The coding to send `data` with, given the ones the other end accepts."""
+    if len(data) < MIN_COMPRESS_SIZE:
+        return None
+    return next(iter(accepted), None)
+
+
+def max_encoded_size(size: int) -> int:
+    """The most `size` bytes of contents can take on the wire in any of
+    `ENCODINGS`: zlib's `deflateBound()` for incompressible data, plus room
+    for the larger (gzip) wrapper."""
+    return size + (size >> 12) + (size >> 14) + (size >> 25) + 32
+
+
+def encode_chunks(data: bytes, encoding: str | None) -> Iterator[bytes]:
+    """`data`, encoded with `encoding`, a chunk at a time."""
+    view = memoryview(data)
+    if encoding is None:
+        for start in range(0, len(view), CHUNK_SIZE):
+            yield view[start : start + CHUNK_SIZE].tobytes()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, _WBITS[encoding])
+    for start in range(0, len(view), CHUNK_SIZE):
+        compressed = compressor.compress(view[start : start + CHUNK_SIZE])
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def decode_chunks(
+    chunks: Iterable[bytes], encoding: str | None, max_size: int
+) -> bytes:
+    """Reassemble (and decompress) `chunks`, raising `ClipboardTooLarge` as
+    soon as the decoded contents would exceed `max_size` bytes -- however
+    small the encoded form -- and ValueError if they're corrupt."""
+    decoded = bytearray()
+    decompressor = (
+        zlib.decompressobj(_WBITS[encoding]) if encoding is not None else None
+    )
+    try:
+        for chunk in chunks:
+            if decompressor is None:
+                decoded += chunk
+                if len(decoded) > max_size:
+                    raise ClipboardTooLarge(max_size)
+                continue
+            while chunk:
+                # Bounded, so even a tiny chunk can only inflate to just
+                # past the limit before it's noticed.
+                decoded += decompressor.decompress(chunk, max_size + 1 - len(decoded))
+                if len(decoded) > max_size:
+                    raise ClipboardTooLarge(max_size)
+                chunk = decompressor.unconsumed_tail
+        if decompressor is not None:
+            decoded += decompressor.flush()
+            if len(decoded) > max_size:
+                raise ClipboardTooLarge(max_size)
+            if not decompressor.eof:
+                raise ValueError("Truncated compressed clipboard contents")
+    except zlib.error as e:
+        raise ValueError(f"Corrupt compressed clipboard contents: {e}") from e
+    return bytes(decoded)
+
+
+def describe_transfer(size: int, wire_size: int, seconds: float) -> str:
+    """E.g. "1048576 bytes (18225 on the wire, 98% saved) in 12.3 ms"."""
+    saved = 100 * (1 - wire_size / size) if size else 0
+    return (
+        f"{size} bytes ({wire_size} on the wire, {saved:.0f}% saved) "
+        f"in {seconds * 1000:.1f} ms"
+    )
@@ -1,3 +1,4 @@
+import itertools
 import json
 import logging
 import os
@@ -6,40 +7,188 @@ import string
 import sys
 import threading
 import time
+import uuid
 from argparse import ArgumentParser
+from collections.abc import Callable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 from typing import Literal
 
 import pyperclip
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
 from rich.progress import Progress
 from urllib3.exceptions import InsecureRequestWarning
+from urllib3.util import Retry
+from urllib3.util.ssl_ import create_urllib3_context
+from werkzeug.http import quote_etag
+from werkzeug.http import unquote_etag
 
 from .. import constants
 from .. import exceptions
+from ..clipboard import CHUNK_SIZE
+from ..clipboard import ENCODINGS
+from ..clipboard import MAX_CLIPBOARD_SIZE
+from ..clipboard import accepted_encodings
+from ..clipboard import choose_encoding
+from ..clipboard import content_etag
+from ..clipboard import decode_chunks
+from ..clipboard import describe_transfer
+from ..clipboard import encode_chunks
+from ..clipboard import parse_content_encoding
 from ..hidpp import Notification
 from ..hidpp import NotificationListener
 from ..hidpp import PairedDevice
 from ..hidpp import Receiver
 from ..hidpp import find_receivers
+from ..multicast import FAST_PATH
+from ..multicast import Announcement
+from ..multicast import MulticastChannel
 from ..reconciler import Reconciler
-from ..sse import parse_sse_stream
+from ..reconciler import SwitchErrorLog
+from ..replication import STANDBYS_STATE
+from ..sse import KEEPALIVE_INTERVAL
+from ..sse import OBSERVATION_HEADER
+from ..sse import RESUMED_HEADER
+from ..sse import SNAPSHOT_EVENT
+from ..sse import VALUE_HEADER
+from ..sse import VERSION_HEADER
+from ..sse import ObservationStamp
+from ..sse import SseDecoder
+from ..tui import DEFAULT_LOG_SCROLLBACK
 from ..tui import ClientStatus
 from ..tui import DeviceStatus
 from ..tui import FlowTUIApp
-from ..tui import render_client_status
+from ..util import get_host_certificate_path
 from ..util import get_host_certificate_path_and_token
 from ..util import get_theoretical_max_device_count
 from ..util import parse_connection_status
+from ..util import parse_server_address
 from ..util import set_host_certificate_and_token
 from . import LogitechFlowKvmCommand
 
 logger = logging.getLogger(__name__)
 
+# How long a leader host heard over multicast is applied for without the
+# server confirming it (as it would in well under this) before the server's
+# is restored: the report it announced may have been refused.
+MULTICAST_CONFIRM_TIMEOUT = 2.0
+
 # Backoff for reconnecting the /events stream after it drops.
 EVENTS_MIN_BACKOFF = 1.0
 EVENTS_MAX_BACKOFF = 30.0
+# How long connecting to /events may take: with standbys to fail over to,
+# a server that doesn't answer within a second is given up on.
+EVENTS_CONNECT_TIMEOUT = 10.0
+FAILOVER_CONNECT_TIMEOUT = 1.0
+# A stream silent for two keepalives is dead, even if never closed.
+EVENTS_READ_TIMEOUT = 2 * KEEPALIVE_INTERVAL
+
+# How many idle connections to the server the request session keeps open.
+# Requests come from one listener thread per local receiver, so a handful
+# covers even a bursty leader switch.
+POOL_SIZE = 4
+
+# Retried transparently: a failure to connect, or a pooled connection the
+# server has since closed (e.g. after its idle timeout) failing on reuse.
+# Only for idempotent requests: `POST /arrival` is one (it sets state rather
+# than adding to it), and pairing's POST never goes over a session at all.
+REQUEST_RETRIES = Retry(
+    total=2,
+    connect=2,
+    read=1,
+    status=0,
+    backoff_factor=0.1,
+    allowed_methods=frozenset({"GET", "PUT", "POST", "OPTIONS"}),
+)
+
+
+class PinnedCAAdapter(HTTPAdapter):
+    """An `HTTPAdapter` trusting exactly the CA at `ca_path`, loaded once.
+
+    Passing `verify=ca_path` to requests on its own would have urllib3
+    re-read and re-parse that file for every new connection. Here it's
+    loaded into one `SSLContext` up front and every connection (to a URL
+    requested with `verify=ca_path`) shares it.
+    """
+
+    def __init__(self, ca_path: str, **kwargs) -> None:
+        self.ca_path = ca_path
+        self.ssl_context = create_urllib3_context()
+        self.ssl_context.load_verify_locations(ca_path)
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        kwargs["ssl_context"] = self.ssl_context
+        super().init_poolmanager(*args, **kwargs)
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        if verify == self.ca_path:
+            # Already in `ssl_context`; naming it here too would reload it.
+            pool_kwargs.pop("ca_certs", None)
+        return host_params, pool_kwargs
+
+    def cert_verify(self, conn, url, verify, cert) -> None:
+        super().cert_verify(conn, url, verify, cert)
+        if verify == self.ca_path:
+            conn.ca_certs = None
+
+
+def create_session(ca_path: str) -> requests.Session:
+    """A keep-alive session for talking to a paired server whose certificate
+    is at `ca_path`."""
+    session = requests.Session()
+    session.mount(
+        "https://",
+        PinnedCAAdapter(
+            ca_path,
+            pool_connections=1,
+            pool_maxsize=POOL_SIZE,
+            max_retries=REQUEST_RETRIES,
+        ),
+    )
+    return session
+
+
+def pair_with_server(server: str, port: int, name: object) -> str:
+    """Pair with the flow-server at `server`:`port` as `name`, storing its
+    certificate and the token it issues; returns the token."""
+    urllib3.disable_warnings(InsecureRequestWarning)
+    url = f"https://{server}:{port}/pairing"
+
+    logger.info("Pairing with new server %s...", server)
+    response = requests.request("OPTIONS", url, verify=False)
+    if not response.ok:
+        raise exceptions.ServerNotAvailable(server)
+
+    pairing_code = "".join(random.choices(string.digits, k=6))
+    logger.info("Pairing code: %s", pairing_code)
+    logger.info(
+        "To complete the pairing process, enter the above code into the "
+        "server console running `flow-server` when requested."
+    )
+
+    response = requests.request(
+        "POST",
+        url,
+        verify=False,
+        data=json.dumps({"name": name, "pairing_code": pairing_code}),
+        headers={"Content-type": "application/json"},
+    )
+    if not response.ok:
+        raise exceptions.PairingFailed()
+
+    response_data = response.json()
+    set_host_certificate_and_token(
+        server, response_data["certificate"], response_data["token"]
+    )
+
+    return response_data["token"]
 
 
 class FlowClient(LogitechFlowKvmCommand):
@@ -56,17 +205,127 @@ class FlowClient(LogitechFlowKvmCommand):
     # stream. `None` until the first event arrives (or the stream's initial,
     # atomic snapshot -- see `sse.EventBroadcaster.subscribe`).
     leader_host: int | None = None
+    # Set while `leader_host` is this host only because the leader was seen
+    # connecting here, ahead of the server agreeing (see
+    # `_apply_local_arrival`). `_server_leader_host` is what the server last
+    # said meanwhile, and `_awaiting_report` whether our report of the
+    # arrival is still to be answered.
+    leader_host_provisional: bool = False
+    _server_leader_host: int | None = None
+    _awaiting_report: bool = False
+    # When (by the monotonic clock) the leader was seen arriving here, if
+    # reporting that to the server failed and the leader's still here: it's
+    # reported again once the /events stream reconnects.
+    _unsent_report: float | None = None
+    # The LAN fast path (see `multicast`), if the server offers one and it
+    # wasn't declined with `--no-multicast`. A leader host heard over it is
+    # provisional, too; `_multicast_heard` is that host and when (by the
+    # monotonic clock) it was heard, until the server confirms or replaces
+    # it.
+    multicast: MulticastChannel | None = None
+    _multicast_heard: tuple[int, float] | None = None
+    # The ID of the last /events event handled, sent back as `Last-Event-ID`
+    # on reconnect so the server can replay just what was missed.
+    _last_event_id: str | None = None
+    # The version of each server state key we last applied (see
+    # `sse.EventBroadcaster`), so late or duplicate deltas can be dropped.
+    _state_versions: dict[str, int]
+    _state_lock: threading.Lock
 
     # Set once (if ever) a Textual UI is running -- `None` when running
     # non-interactively, in which case status updates are simply skipped.
     tui: FlowTUIApp | None = None
     _connected_to_server: bool = False
 
+    # Persistent, pooled connections to the server, once it's paired and its
+    # certificate known (until then, `request` falls back to one-off
+    # connections). The /events stream gets a session of its own so its
+    # long-lived connection never occupies one that a `PUT /leader-host` --
+    # on the critical path of every switch -- could otherwise reuse.
+    session: requests.Session | None = None
+    events_session: requests.Session | None = None
+    # Cleared on finding the server predates `POST /arrival`.
+    _arrival_supported: bool = True
+    # Stamped on every leader-host report (see `sse.ObservationStamp`).
+    _report_session: str
+    _report_sequence: Iterator[int]
+
+    # Standby servers (see `replication`) to fail over to, as given by
+    # `--standby-server` and as learned from the server's `standbys` state,
+    # and which of `servers` is in use.
+    standby_servers: list[tuple[str, int]]
+    _server_index: int = 0
+
+    # The entity tag (see `clipboard.content_etag`) of the clipboard contents
+    # this host and the server last agreed on, so unchanged contents are
+    # neither re-sent nor re-fetched; and of those being sent, while they
+    # are -- the server may announce them before answering the `PUT`.
+    # Both guarded by `_clipboard_lock`.
+    _clipboard_etag: str | None = None
+    _pushing_clipboard_etag: str | None = None
+    # The content codings the server accepts on a clipboard `PUT`, as it
+    # last told us (none until it has).
+    _clipboard_encodings: tuple[str, ...] = ()
+    max_clipboard_size: int = MAX_CLIPBOARD_SIZE
+    # The clipboard the server last announced holding (its
+    # `clipboard-changed` state), and those contents if already fetched
+    # ahead of the user arriving here -- fetched, not yet copied, since this
+    # host's own clipboard is still theirs until then.
+    _server_clipboard_etag: str | None = None
+    _prefetched_clipboard: tuple[str, bytes] | None = None
+    _clipboard_lock: threading.Lock
+    # Where clipboard fetches and copies run, one at a time and in order,
+    # off the threads that ask for them.
+    _clipboard_executor: ThreadPoolExecutor
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._state_versions = {}
+        self._state_lock = threading.Lock()
+        self._clipboard_lock = threading.Lock()
+        self._clipboard_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="clipboard"
+        )
+        self.standby_servers = []
+        self._report_session = uuid.uuid4().hex
+        self._report_sequence = itertools.count(1)
+
     @classmethod
     def add_arguments(cls, parser: ArgumentParser) -> None:
         parser.add_argument("host_number", type=int)
         parser.add_argument("server")
         parser.add_argument("--port", "-p", default=constants.DEFAULT_PORT, type=int)
+        parser.add_argument(
+            "--standby-server",
+            metavar="HOST[:PORT]",
+            action="append",
+            default=[],
+            help=(
+                "A standby flow-server (see flow-server's --standby-of) to fail "
+                "over to while the server is unreachable. May be given more "
+                "than once. Standbys registered with the server are learned "
+                "automatically; listing them here is only needed to reach one "
+                "after this client restarts while the server is down."
+            ),
+        )
+        parser.add_argument(
+            "--no-multicast",
+            action="store_true",
+            help=(
+                "Ignore the server's multicast announcements (see flow-server's "
+                "--multicast), and make none, leaving switching entirely to the "
+                "server's event stream."
+            ),
+        )
+        parser.add_argument(
+            "--multicast-interface",
+            metavar="ADDRESS",
+            default="0.0.0.0",
+            help=(
+                "Address of the network interface to send and receive multicast "
+                "announcements on. By default, the system chooses."
+            ),
+        )
         parser.add_argument(
             "--no-clipboard",
             action="store_true",
@@ -75,6 +334,24 @@ class FlowClient(LogitechFlowKvmCommand):
                 "clipboard will neither be read nor written."
             ),
         )
+        parser.add_argument(
+            "--max-clipboard-size",
+            default=MAX_CLIPBOARD_SIZE,
+            type=int,
+            help=(
+                "Largest clipboard, in bytes (uncompressed), this host will "
+                "send to or accept from the server."
+            ),
+        )
+        parser.add_argument(
+            "--log-scrollback",
+            default=DEFAULT_LOG_SCROLLBACK,
+            type=int,
+            help=(
+                "Log lines the interactive display keeps before discarding the "
+                "oldest. The log file always has everything."
+            ),
+        )
 
     def callback(self, receiver: Receiver, notification: Notification) -> None:
         if notification.sub_id != 0x41:
@@ -84,6 +361,7 @@ class FlowClient(LogitechFlowKvmCommand):
         if device is None:
             return
 
+        observed = time.monotonic()
         result = parse_connection_status(notification.data)
         connected = result["link_status"] == 0
         is_leader = device.id == self.leader_id
@@ -98,55 +376,503 @@ class FlowClient(LogitechFlowKvmCommand):
 
         if connected:
             if is_leader:
-                # Positive evidence: the leader is here. Report it so every
-                # client (including this one) learns to converge followers
-                # toward this host.
-                response = self.request(
-                    "PUT",
-                    self.build_url("leader-host"),
-                    data=str(self.options.host_number),
-                )
-                response.raise_for_status()
-
-            if self.clipboard_enabled:
-                clipboard_response = self.request("GET", self.build_url("clipboard"))
-                if clipboard_response.ok:
-                    pyperclip.copy(clipboard_response.text)
+                self._apply_local_arrival()
+                self._announce_arrival()
+            try:
+                if is_leader and self._arrival_supported:
+                    self._arrive(observed)
+                else:
+                    if is_leader:
+                        self._report_leader_host(observed)
+                    if self.clipboard_enabled:
+                        self._apply_clipboard()
+            except requests.exceptions.RequestException:
+                if is_leader:
+                    # Still this host, until the server says otherwise.
+                    with self._state_lock:
+                        self._awaiting_report = False
+                        self._unsent_report = observed
+                raise
         elif is_leader:
+            with self._state_lock:
+                self._unsent_report = None  # gone again: nothing to report
             if self.clipboard_enabled:
-                clipboard_data = pyperclip.paste()
-                clipboard_response = self.request(
-                    "PUT",
-                    self.build_url("clipboard"),
-                    data=clipboard_data.encode("utf-8"),
+                self._push_clipboard()
+
+        self._publish_status()
+
+    def _arrive(self, observed: float) -> None:
+        """Report that the leader is here -- as of `observed`, by the
+        monotonic clock -- and bring the server's clipboard here with it, in
+        one round trip (`POST /arrival`). Only the report is waited on: the
+        clipboard is copied afterwards, in the background."""
+        if self.clipboard_enabled:
+            headers = self._clipboard_request_headers()
+            with self._clipboard_lock:
+                prefetched = self._prefetched_clipboard
+            if prefetched is not None:
+                # Named too, so a server still holding it has nothing more
+                # to send: it's copied from here instead.
+                headers["If-None-Match"] = ", ".join(
+                    filter(
+                        None,
+                        (headers.get("If-None-Match"), quote_etag(prefetched[0])),
+                    )
                 )
-                if clipboard_response.ok:
-                    logger.info(
-                        "Clipboard contents set on server with %d bytes of data",
-                        len(clipboard_data),
+        else:
+            headers = {"If-None-Match": "*"}  # matches anything: no body
+        headers[OBSERVATION_HEADER] = self._observation_stamp(observed)
+        started = time.monotonic()
+        response = self.request(
+            "POST",
+            self.build_url("arrival"),
+            data=str(self.options.host_number),
+            headers=headers,
+            stream=True,
+        )
+        handed_off = False
+        try:
+            if response.status_code in (404, 405):
+                # A server from before `/arrival`: fall back to the two
+                # requests it stands for, now and from now on.
+                self._arrival_supported = False
+            else:
+                response.raise_for_status()
+                self._apply_written_leader_host(response)
+                if self.clipboard_enabled:
+                    self._fetch_in_background(
+                        partial(self._receive_arrival_clipboard, response, started)
                     )
+                    handed_off = True
+        finally:
+            if not handed_off:
+                response.close()
+        if not self._arrival_supported:
+            self._report_leader_host(observed)
+            if self.clipboard_enabled:
+                self._apply_clipboard()
+
+    def _receive_arrival_clipboard(
+        self, response: requests.Response, started: float
+    ) -> None:
+        """Copy here the clipboard `POST /arrival` answered with: its body,
+        or -- with none -- what was prefetched, if that's what it names."""
+        with response:
+            if response.status_code != 204:
+                fetched = self._read_clipboard(response, started)
+                if fetched is not None:
+                    self._copy_clipboard(*fetched)
+                return
+            etag = response.headers.get("ETag")
+        if etag is not None:
+            self._apply_prefetched_clipboard(unquote_etag(etag)[0])
 
+    def _report_leader_host(self, observed: float) -> None:
+        # Positive evidence: the leader is here. Report it so every client
+        # (including this one) learns to converge followers toward this
+        # host.
+        response = self.request(
+            "PUT",
+            self.build_url("leader-host"),
+            data=str(self.options.host_number),
+            headers={OBSERVATION_HEADER: self._observation_stamp(observed)},
+        )
+        response.raise_for_status()
+        self._apply_written_leader_host(response)
+
+    def _send_unsent_report(self) -> None:
+        """Report the leader's arrival here again, if that failed before --
+        stamped as when it was seen, so a newer report elsewhere still wins."""
+        with self._state_lock:
+            observed = self._unsent_report
+        if observed is None:
+            return
+        try:
+            self._report_leader_host(observed)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Could not report the leader host: %s", e)
+
+    def _observation_stamp(self, observed: float) -> str:
+        # Formatted once per report: should the request be retried, the
+        # repeat carries the same sequence, and is recognized as one.
+        return ObservationStamp(
+            self._report_session,
+            next(self._report_sequence),
+            time.monotonic() - observed,
+        ).format()
+
+    def _apply_local_arrival(self) -> None:
+        """The leader just connected here: move this host's followers here
+        now, rather than a round trip to the server from now. Provisional
+        until the server answers our report of it -- meanwhile, whatever
+        else it announces is noted but not applied, since it may well be
+        from before the leader arrived."""
+        with self._state_lock:
+            self.leader_host = self.options.host_number
+            self.leader_host_provisional = True
+            self._awaiting_report = True
+            self._multicast_heard = None
+        self.reconciler.poke()
         self._publish_status()
 
-    def _reconciler_error(self, device: PairedDevice, error: Exception) -> None:
+    def _announce_arrival(self) -> None:
+        """Tell peers on the LAN the leader is here, if there's a multicast
+        channel to: they needn't wait on the round trip through the server."""
+        if self.multicast is None:
+            return
+        with self._state_lock:
+            base_version = self._state_versions.get("leader-host", 0)
+        self.multicast.announce(self.options.host_number, base_version)
+
+    def _multicast_announced(self, announcement: Announcement) -> None:
+        """A peer announced the leader arriving there: move this host's
+        followers there now, provisionally, until the server confirms it
+        over /events -- or says otherwise."""
+        heard = (announcement.host, time.monotonic())
+        with self._state_lock:
+            if announcement.base_version < self._state_versions.get("leader-host", 0):
+                # From before a change the server already told us of.
+                return
+            if self._awaiting_report or self.leader_host == announcement.host:
+                return
+            self.leader_host = announcement.host
+            self.leader_host_provisional = True
+            self._multicast_heard = heard
+        logger.info("Leader host is %s, per multicast", announcement.host)
+        self.reconciler.poke()
+        self._publish_status()
+        timer = threading.Timer(
+            MULTICAST_CONFIRM_TIMEOUT, self._expire_multicast, args=(heard,)
+        )
+        timer.daemon = True
+        timer.start()
+
+    def _expire_multicast(self, heard: tuple[int, float]) -> None:
+        with self._state_lock:
+            if self._multicast_heard is not heard:
+                return  # confirmed or replaced meanwhile
+            self._multicast_heard = None
         logger.warning(
-            "Could not switch %s to the desired host yet (%s); will retry",
-            device.id,
-            error,
+            "Server never confirmed leader host %s heard over multicast", heard[0]
         )
+        self._settle_leader_host()
 
-    def _handle_event(self, event_type: str, data: str) -> None:
-        if event_type == "leader-host":
-            self.leader_host = int(data)
+    def _tally_fast_path(
+        self, previous: int | None, host: int, heard: tuple[int, float] | None
+    ) -> None:
+        """Count which path brought the server's change of leader host to
+        `host` here first."""
+        if self.multicast is None or previous is None:
+            return
+        if host in (previous, self.options.host_number):
+            return  # not a change, or the one we made
+        if heard is not None and heard[0] == host:
+            FAST_PATH.labels("multicast").inc()
+            logger.info(
+                "Multicast was %.1fms ahead of the server",
+                (time.monotonic() - heard[1]) * 1000,
+            )
+        else:
+            FAST_PATH.labels("sse").inc()
+
+    def fast_path_summary(self) -> str:
+        won = FAST_PATH.labels("multicast").value
+        total = won + FAST_PATH.labels("sse").value
+        return f"multicast was first for {won:.0f} of {total:.0f} leader-host changes"
+
+    def _apply_written_leader_host(self, response: requests.Response) -> None:
+        """Apply the leader host a report left on the server -- ours, unless
+        it held a newer observation -- without waiting for it to come back
+        over /events (where it'll then be dropped as a duplicate)."""
+        with self._state_lock:
+            self._awaiting_report = False
+            self._unsent_report = None
+        version = response.headers.get(VERSION_HEADER)
+        if version is not None:
+            value = response.headers.get(VALUE_HEADER, str(self.options.host_number))
+            self._apply_state("leader-host", value, int(version))
+            # Already heard over /events, if that beat the response here.
+            self._settle_leader_host()
+
+    def _settle_leader_host(self) -> None:
+        """Replace a provisional leader host with the server's."""
+        with self._state_lock:
+            if not self.leader_host_provisional:
+                return
+            self.leader_host_provisional = False
+            changed = self.leader_host != self._server_leader_host
+            self.leader_host = self._server_leader_host
+        if changed:
+            logger.info("Leader host is %s, not here, per the server", self.leader_host)
             self.reconciler.poke()
-            self._publish_status()
+        self._publish_status()
+
+    def _apply_prefetched_clipboard(self, current: str | None = None) -> None:
+        """Copy the prefetched clipboard if it's still what the server holds:
+        `current`, or by default what it last announced."""
+        with self._clipboard_lock:
+            prefetched, self._prefetched_clipboard = self._prefetched_clipboard, None
+            if current is None:
+                current = self._server_clipboard_etag
+        if prefetched is not None and prefetched[0] == current:
+            self._copy_clipboard(*prefetched)
+
+    def _apply_clipboard(self) -> None:
+        """Bring the server's clipboard here: from what was prefetched when
+        that's still current, otherwise fetched -- either way in the
+        background, never on the time of the connect callback calling this."""
+        with self._clipboard_lock:
+            prefetched = self._prefetched_clipboard
+            announced = self._server_clipboard_etag
+        if prefetched is not None and prefetched[0] == announced:
+            self._fetch_in_background(self._apply_prefetched_clipboard)
+        elif announced is None or announced != self._clipboard_etag:
+            self._fetch_in_background(self._pull_clipboard)
+
+    def _clipboard_changed(self, etag: str) -> None:
+        """The server announced it now holds clipboard contents `etag`."""
+        with self._clipboard_lock:
+            self._server_clipboard_etag = etag
+            if (
+                self._prefetched_clipboard is not None
+                and self._prefetched_clipboard[0] != etag
+            ):
+                self._prefetched_clipboard = None
+            # Ours -- held already, or on its way there -- needs no fetch.
+            ours = etag in (self._clipboard_etag, self._pushing_clipboard_etag)
+        if self.clipboard_enabled and not ours:
+            self._fetch_in_background(self._prefetch_clipboard)
+
+    def _pull_clipboard(self) -> None:
+        fetched = self._fetch_clipboard()
+        if fetched is not None:
+            self._copy_clipboard(*fetched)
+
+    def _prefetch_clipboard(self) -> None:
+        fetched = self._fetch_clipboard()
+        with self._clipboard_lock:
+            # Dropped if the server's announced something newer meanwhile.
+            if fetched is not None and fetched[0] == self._server_clipboard_etag:
+                self._prefetched_clipboard = fetched
+
+    def _copy_clipboard(self, etag: str, data: bytes) -> None:
+        # Only ever called on `_clipboard_executor`, so no two copies race.
+        with self._clipboard_lock:
+            if etag == self._clipboard_etag:
+                return  # already what we hold; skip the copy
+        pyperclip.copy(data.decode("utf-8", "replace"))
+        with self._clipboard_lock:
+            self._clipboard_etag = etag
+
+    def _fetch_in_background(self, target: Callable[[], None]) -> None:
+        def run() -> None:
+            try:
+                target()
+            except requests.exceptions.RequestException as e:
+                logger.warning("Could not fetch the server's clipboard: %s", e)
+            except Exception:
+                logger.exception("Could not bring the server's clipboard here")
+
+        self._clipboard_executor.submit(run)
+
+    def _fetch_clipboard(self) -> tuple[str, bytes] | None:
+        """The server's clipboard contents and their entity tag -- `None` if
+        they're what we already hold, or couldn't be fetched."""
+        started = time.monotonic()
+        response = self.request(
+            "GET",
+            self.build_url("clipboard"),
+            headers=self._clipboard_request_headers(),
+            stream=True,
+        )
+        with response:
+            self._note_clipboard_encodings(response)
+            if response.status_code == 304 or not response.ok:
+                return None
+            return self._read_clipboard(response, started)
+
+    def _clipboard_request_headers(self) -> dict[str, str]:
+        headers = {"Accept-Encoding": ", ".join(ENCODINGS)}
+        if self._clipboard_etag is not None:
+            headers["If-None-Match"] = quote_etag(self._clipboard_etag)
+        return headers
+
+    def _read_clipboard(
+        self, response: requests.Response, started: float
+    ) -> tuple[str, bytes] | None:
+        """Read clipboard contents from the body of (streamed) `response`."""
+        etag = response.headers.get("ETag")
+        if etag is not None and unquote_etag(etag)[0] == self._clipboard_etag:
+            return None  # already what we hold; skip the download
+
+        wire_size = 0
+
+        def received() -> Iterator[bytes]:
+            nonlocal wire_size
+            # Undecoded, so the limit applies to what it inflates to.
+            for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                wire_size += len(chunk)
+                yield chunk
+
+        try:
+            data = decode_chunks(
+                received(),
+                parse_content_encoding(response.headers.get("Content-Encoding")),
+                self.max_clipboard_size,
+            )
+        except exceptions.ClipboardTooLarge:
+            logger.warning(
+                "Server clipboard is over the %d-byte limit; not copying it",
+                self.max_clipboard_size,
+            )
+            return None
+        except ValueError as e:
+            logger.warning("Could not read the server's clipboard: %s", e)
+            return None
+
+        logger.debug(
+            "Clipboard fetched from server: %s",
+            describe_transfer(len(data), wire_size, time.monotonic() - started),
+        )
+        if etag is not None:
+            return unquote_etag(etag)[0], data
+        return content_etag(data), data
+
+    def _push_clipboard(self) -> None:
+        clipboard_data = pyperclip.paste()
+        encoded = clipboard_data.encode("utf-8")
+        etag = content_etag(encoded)
+        with self._clipboard_lock:
+            held = self._clipboard_etag
+        if etag == held:
+            return  # unchanged since we last synced with the server
+        if len(encoded) > self.max_clipboard_size:
+            logger.warning(
+                "Clipboard is %d bytes, over the %d-byte limit; not sending it",
+                len(encoded),
+                self.max_clipboard_size,
+            )
+            return
+        with self._clipboard_lock:
+            self._pushing_clipboard_etag = etag
+        try:
+            self._send_clipboard(encoded, etag, held)
+        finally:
+            with self._clipboard_lock:
+                self._pushing_clipboard_etag = None
+
+    def _send_clipboard(self, encoded: bytes, etag: str, held: str | None) -> None:
+        started = time.monotonic()
+        encoding = choose_encoding(encoded, self._clipboard_encodings)
+        wire_size = len(encoded)
+        if encoding is None:
+            response = self.request("PUT", self.build_url("clipboard"), data=encoded)
+        else:
+            # Compressed up front, not as it's sent: a request retried on a
+            # fresh connection (see `REQUEST_RETRIES`) must send the body
+            # again, which a generator can't. It's no bigger than
+            # `max_clipboard_size` either way.
+            body = b"".join(encode_chunks(encoded, encoding))
+            wire_size = len(body)
+            response = self.request(
+                "PUT",
+                self.build_url("clipboard"),
+                data=body,
+                headers={"Content-Encoding": encoding},
+            )
+        self._note_clipboard_encodings(response)
+        if not response.ok:
+            return
+        with self._clipboard_lock:
+            # Unless the server's was copied here meanwhile, replacing ours.
+            if self._clipboard_etag == held:
+                self._clipboard_etag = etag
+        if response.status_code != 204:
+            logger.info(
+                "Clipboard contents set on server: %s",
+                describe_transfer(len(encoded), wire_size, time.monotonic() - started),
+            )
+
+    def _note_clipboard_encodings(self, response: requests.Response) -> None:
+        # Only ever compress a `PUT` for a server that said it can take it:
+        # one from before compression support would store the compressed
+        # bytes as the clipboard.
+        self._clipboard_encodings = accepted_encodings(
+            response.headers.get("Accept-Encoding")
+        )
+
+    def _handle_event(
+        self, event_type: str, data: str, event_id: str | None = None
+    ) -> None:
+        if event_type == SNAPSHOT_EVENT:
+            self._apply_snapshot(json.loads(data))
         elif event_type == "host-connected":
             logger.info("Host %s connected", data)
+        else:
+            version = int(event_id) if event_id is not None else None
+            self._apply_state(event_type, data, version)
+
+    def _apply_snapshot(self, snapshot: dict[str, dict]) -> None:
+        """Replace our whole view of the server's state. Versions are reset
+        rather than compared: a snapshot is authoritative, even one from a
+        restarted server whose versions are all lower than ours."""
+        # Under the lock like any other use: a write of our own landing
+        # meanwhile goes into the new map, and is compared against it.
+        with self._state_lock:
+            self._state_versions = {}
+        for key, entry in snapshot.items():
+            self._apply_state(key, entry["value"], entry["version"])
+
+    def _apply_state(self, key: str, value: str, version: int | None) -> None:
+        # Called from both the /events thread and (for our own writes) the
+        # listener threads: the version check and the write go together.
+        with self._state_lock:
+            if version is not None:
+                if version <= self._state_versions.get(key, -1):
+                    return  # stale: we already hold this version or a newer one
+                self._state_versions[key] = version
+            if key == "leader-host":
+                previous, self._server_leader_host = (
+                    self._server_leader_host,
+                    int(value),
+                )
+                heard, self._multicast_heard = self._multicast_heard, None
+                self._tally_fast_path(previous, int(value), heard)
+                if self.leader_host_provisional and self._awaiting_report:
+                    return
+                was_provisional = self.leader_host_provisional
+                self.leader_host_provisional = False
+                if self.leader_host == int(value) and was_provisional:
+                    # Confirmed: the followers already went there.
+                    return
+                self.leader_host = int(value)
+        if key == "leader-host":
+            self.reconciler.poke()
+            self._publish_status()
+        elif key == "clipboard-changed":
+            self._clipboard_changed(json.loads(value)["hash"])
+        elif key == STANDBYS_STATE:
+            self._learn_standbys(json.loads(value))
+
+    def _learn_standbys(self, standbys: list[dict]) -> None:
+        """Note each of the server's standbys, and which certificate to
+        trust there -- our token is good at each of them, too."""
+        for standby in standbys:
+            server = (standby["address"], int(standby["port"]))
+            if server == self.servers[0]:
+                continue
+            if self.token is not None:
+                set_host_certificate_and_token(
+                    server[0], standby["certificate"], self.token
+                )
+            if server not in self.standby_servers:
+                self.standby_servers = [*self.standby_servers, server]
+                logger.info("Learned of standby server %s:%s", *server)
 
     def _build_status(self) -> ClientStatus:
         return ClientStatus(
             host_number=self.options.host_number,
-            server=self.options.server,
+            server=self.servers[self._server_index][0],
             connected_to_server=self._connected_to_server,
             leader_host=self.leader_host,
             followers=[
@@ -161,29 +887,56 @@ class FlowClient(LogitechFlowKvmCommand):
 
     def _publish_status(self) -> None:
         if self.tui is not None:
-            self.tui.update_status(render_client_status(self._build_status()))
+            self.tui.publish_status(self._build_status())
 
     def _consume_events(self) -> None:
         backoff = EVENTS_MIN_BACKOFF
+        # Servers failed one after another since the last to stay up.
+        failures = 0
         while not self._stop.is_set():
+            headers: dict[str, str] = {}
+            if self._last_event_id is not None:
+                headers["Last-Event-ID"] = self._last_event_id
             try:
                 response = self.request(
-                    "GET", self.build_url("events"), stream=True, timeout=(10, None)
+                    "GET",
+                    self.build_url("events"),
+                    stream=True,
+                    timeout=(
+                        FAILOVER_CONNECT_TIMEOUT
+                        if self.standby_servers
+                        else EVENTS_CONNECT_TIMEOUT,
+                        EVENTS_READ_TIMEOUT,
+                    ),
+                    headers=headers,
+                    session=self.events_session,
                 )
                 response.raise_for_status()
-                # Re-announce our own devices' current status as a side
-                # effect of (re)establishing this connection, so the server
-                # recovers cross-client state (e.g. after a restart) at the
-                # same moment we're asking it for its current state.
-                for receiver in self.local_receivers:
-                    receiver.notify_devices()
+                if response.headers.get(RESUMED_HEADER) != "1":
+                    # The server couldn't replay what we missed (first
+                    # connection, a restart, or we fell too far behind), so
+                    # re-announce our own devices' current status: the server
+                    # recovers cross-client state at the same moment we're
+                    # getting a fresh snapshot of its own.
+                    for receiver in self.local_receivers:
+                        receiver.notify_devices()
+                else:
+                    # Nothing's re-announced, so a report that failed while
+                    # we were away would otherwise be lost.
+                    self._send_unsent_report()
                 backoff = EVENTS_MIN_BACKOFF
+                failures = 0
                 self._connected_to_server = True
                 self._publish_status()
-                for event_type, data in parse_sse_stream(
-                    response.iter_lines(decode_unicode=True)
-                ):
-                    self._handle_event(event_type, data)
+                # `chunk_size=None` hands over each chunk as it arrives (the
+                # server streams /events with chunked encoding), with no
+                # line splitting or decoding before the decoder sees it.
+                decoder = SseDecoder()
+                for chunk in response.iter_content(chunk_size=None):
+                    for event in decoder.feed(chunk):
+                        self._handle_event(event.event, event.data, event.id)
+                        if event.id is not None:
+                            self._last_event_id = event.id
             except requests.exceptions.RequestException:
                 pass
             if self._connected_to_server:
@@ -191,61 +944,91 @@ class FlowClient(LogitechFlowKvmCommand):
                 self._publish_status()
             if self._stop.is_set():
                 return
+            # Straight on to the next server, unless every one has now
+            # failed in turn; only then wait before going round again.
+            failures += 1
+            if self._fail_over() and failures < self._usable_server_count():
+                continue
+            failures = 0
             time.sleep(backoff)
             backoff = min(backoff * 2, EVENTS_MAX_BACKOFF)
 
-    def build_url(self, *route_segments: str) -> str:
-        return (
-            f"https://{self.options.server}:{self.options.port}"
-            f"/{'/'.join(route_segments)}"
+    @property
+    def servers(self) -> list[tuple[str, int]]:
+        """The server, then its standbys, as `(host, port)`."""
+        return [(self.options.server, self.options.port), *self.standby_servers]
+
+    def _is_usable(self, index: int) -> bool:
+        # A standby is only of use once we know its certificate.
+        return index == 0 or os.path.exists(
+            get_host_certificate_path(self.servers[index][0])
         )
 
+    def _usable_server_count(self) -> int:
+        return sum(self._is_usable(index) for index in range(len(self.servers)))
+
+    def _fail_over(self) -> bool:
+        """Move on to the next usable server, if there's another; whether
+        there was."""
+        count = len(self.servers)
+        for offset in range(1, count):
+            index = (self._server_index + offset) % count
+            if self._is_usable(index):
+                self._use_server(index)
+                return True
+        return False
+
+    def _use_server(self, index: int) -> None:
+        host, port = self.servers[index]
+        logger.warning("Switching to server %s:%s", host, port)
+        self._server_index = index
+        self.cert = get_host_certificate_path(host)
+        if self.session is not None:
+            # Pooled connections to the server we're leaving are of no use.
+            for session in (self.session, self.events_session):
+                if session is not None:
+                    session.close()
+            self.session = create_session(self.cert)
+            self.events_session = create_session(self.cert)
+        # Event IDs are numbered by each server on its own: what another
+        # server would replay after ours is unrelated, so start afresh.
+        self._last_event_id = None
+
+    def build_url(self, *route_segments: str) -> str:
+        host, port = self.servers[self._server_index]
+        return f"https://{host}:{port}/{'/'.join(route_segments)}"
+
     def request(
-        self, method: Literal["GET", "PUT", "OPTIONS", "POST"], url: str, **kwargs
+        self,
+        method: Literal["GET", "PUT", "OPTIONS", "POST"],
+        url: str,
+        *,
+        session: requests.Session | None = None,
+        **kwargs,
     ) -> requests.Response:
-        if "verify" not in kwargs:
+        """Send a request to the server, over `session` (by default, the
+        pooled `self.session`) unless an explicit `verify` is given -- those
+        (pairing, and checking a stored certificate) are one-offs made
+        before that session exists."""
+        if "verify" in kwargs:
+            session = None
+        else:
             kwargs["verify"] = self.cert
+            session = session or self.session
 
         headers = kwargs.pop("headers", {})
         if self.token and "Authorization" not in headers:
             headers["Authorization"] = f"Bearer {self.token}"
 
+        if session is not None:
+            return session.request(method, url, headers=headers, **kwargs)
         return requests.request(method, url, headers=headers, **kwargs)
 
     def pair(self) -> str:
-        urllib3.disable_warnings(InsecureRequestWarning)
-
-        logger.info("Pairing with new server %s...", self.options.server)
-        response = self.request("OPTIONS", self.build_url("pairing"), verify=False)
-        if not response.ok:
-            raise exceptions.ServerNotAvailable(self.options.server)
-
-        pairing_code = "".join(random.choices(string.digits, k=6))
-        logger.info("Pairing code: %s", pairing_code)
-        logger.info(
-            "To complete the pairing process, enter the above code into the "
-            "server console running `flow-server` when requested."
+        return pair_with_server(
+            self.options.server, self.options.port, self.options.host_number
         )
 
-        response = self.request(
-            "POST",
-            self.build_url("pairing"),
-            verify=False,
-            data=json.dumps(
-                {"name": self.options.host_number, "pairing_code": pairing_code}
-            ),
-            headers={"Content-type": "application/json"},
-        )
-        if not response.ok:
-            raise exceptions.PairingFailed()
-
-        response_data = response.json()
-        set_host_certificate_and_token(
-            self.options.server, response_data["certificate"], response_data["token"]
-        )
-
-        return response_data["token"]
-
     def get_certificate_path_and_token(self) -> tuple[str, str | None]:
         cert_path, token = get_host_certificate_path_and_token(self.options.server)
         if os.path.exists(cert_path):
@@ -269,9 +1052,18 @@ class FlowClient(LogitechFlowKvmCommand):
 
     def handle(self):
         self.clipboard_enabled = not self.options.no_clipboard
+        self.max_clipboard_size = self.options.max_clipboard_size
+        self.standby_servers = [
+            parse_server_address(server, constants.DEFAULT_PORT)
+            for server in self.options.standby_server
+        ]
 
         self.cert, self.token = self.get_certificate_path_and_token()
+        self.session = create_session(self.cert)
+        self.events_session = create_session(self.cert)
 
+        # Over the pooled session, so this also leaves a connection -- TLS
+        # handshake done -- waiting for the first `PUT /leader-host`.
         logger.info("Connecting to server at %s...", self.build_url())
         result = self.request("GET", self.build_url("configuration"))
         result.raise_for_status()
@@ -279,6 +1071,10 @@ class FlowClient(LogitechFlowKvmCommand):
         response = result.json()
         self.leader_id = response["leader"]
         self.follower_ids = response["followers"]
+        if "multicast" in response and not self.options.no_multicast:
+            self.multicast = MulticastChannel.from_configuration(
+                response["multicast"], interface=self.options.multicast_interface
+            )
 
         device_id_map: dict[str, PairedDevice | None] = {
             follower: None for follower in self.follower_ids
@@ -303,11 +1099,13 @@ class FlowClient(LogitechFlowKvmCommand):
                 raise exceptions.DeviceNotFound(follower_id)
             self.follower_devices.append(found_device)
 
+        switch_errors = SwitchErrorLog(logger)
         self.reconciler = Reconciler(
             self.follower_devices,
             get_desired_host=lambda: self.leader_host,
             host_number=self.options.host_number,
-            on_error=self._reconciler_error,
+            on_error=switch_errors.failed,
+            on_success=switch_errors.succeeded,
         )
 
         self._stop = threading.Event()
@@ -316,8 +1114,15 @@ class FlowClient(LogitechFlowKvmCommand):
         logger.info("Certificate: %s", self.cert)
         logger.info("Leader serial: %s", self.leader_id)
         logger.info("Follower serials: %s", ", ".join(self.follower_ids))
+        if self.standby_servers:
+            logger.info(
+                "Standby servers: %s",
+                ", ".join(f"{host}:{port}" for host, port in self.standby_servers),
+            )
         if not self.clipboard_enabled:
             logger.info("Clipboard synchronization: disabled")
+        if self.multicast is not None:
+            logger.info("Multicast: %s:%s", self.multicast.group, self.multicast.port)
 
         if sys.stdout.isatty():
 
@@ -328,27 +1133,36 @@ class FlowClient(LogitechFlowKvmCommand):
             # Textual owns the main thread's event loop from here; Ctrl+C
             # is handled internally as a quit keybinding, not a raised
             # KeyboardInterrupt.
-            FlowTUIApp("flow-client", on_start=on_start).run()
-            self._stop.set()
-            self.reconciler.stop()
+            FlowTUIApp(
+                "flow-client",
+                on_start=on_start,
+                log_scrollback=self.options.log_scrollback,
+            ).run()
+            self.stop()
         else:
             self.start_background_threads()
             try:
                 while True:
                     time.sleep(0.5)
             except KeyboardInterrupt:
-                self._stop.set()
-                self.reconciler.stop()
+                self.stop()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._clipboard_executor.shutdown(wait=False, cancel_futures=True)
+        self.reconciler.stop()
+        if self.multicast is not None:
+            self.multicast.close()
+            logger.info("Fast path: %s", self.fast_path_summary())
 
     def start_background_threads(self) -> None:
         """Start the reconciler, notification listeners, and the /events
         consumer.
 
         Deliberately not done inline in `handle()`: `callback()`/
-        `_handle_event()`/`_consume_events()` may call
-        `self.tui.update_status(...)`, which requires the TUI's event loop
-        to already be running -- so when interactive, this is called from
-        `FlowTUIApp.on_mount` instead.
+        `_handle_event()`/`_consume_events()` publish status to `self.tui`,
+        which is only set once the TUI's event loop is running -- so when
+        interactive, this is called from `FlowTUIApp.on_mount` instead.
         """
         self.reconciler.start()
 
@@ -361,3 +1175,10 @@ class FlowClient(LogitechFlowKvmCommand):
 
         events_thread = threading.Thread(target=self._consume_events, daemon=True)
         events_thread.start()
+
+        if self.multicast is not None:
+            try:
+                self.multicast.listen(self._multicast_announced)
+            except OSError as e:
+                logger.warning("Could not join multicast group: %s", e)
+                self.multicast = None
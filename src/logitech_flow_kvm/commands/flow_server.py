@@ -1,11 +1,19 @@
+import hashlib
+import hmac
+import json
 import logging
+import math
 import os
 import queue
 import sqlite3
 import sys
 import threading
+import time
 import uuid
 from argparse import ArgumentParser
+from collections.abc import Callable
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 
 import platformdirs
@@ -13,6 +21,7 @@ import pyperclip
 from flask import Flask
 from flask import Response
 from flask import abort
+from flask import make_response
 from flask import request
 from flask_httpauth import HTTPTokenAuth
 from rich.progress import Progress
@@ -20,30 +29,214 @@ from rich.prompt import Prompt
 
 from .. import constants
 from .. import exceptions
+from ..aio_server import run_async_server
+from ..certificates import DEFAULT_KEY_TYPE
+from ..certificates import KEY_TYPES
+from ..certificates import get_certificate_key_path
+from ..clipboard import CHUNK_SIZE
+from ..clipboard import ENCODINGS
+from ..clipboard import MAX_CLIPBOARD_SIZE
+from ..clipboard import accepted_encodings
+from ..clipboard import choose_encoding
+from ..clipboard import content_etag
+from ..clipboard import decode_chunks
+from ..clipboard import describe_transfer
+from ..clipboard import encode_chunks
+from ..clipboard import parse_content_encoding
 from ..hidpp import Notification
 from ..hidpp import NotificationListener
 from ..hidpp import PairedDevice
 from ..hidpp import Receiver
+from ..metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from ..metrics import PREFIX as METRICS_PREFIX
+from ..metrics import REGISTRY
+from ..metrics import Counter
+from ..metrics import format_family
+from ..multicast import DEFAULT_GROUP as MULTICAST_GROUP
+from ..multicast import MulticastChannel
+from ..multicast import generate_secret
 from ..reconciler import Reconciler
+from ..reconciler import SwitchErrorLog
+from ..replication import STANDBYS_STATE
+from ..replication import Replicator
+from ..replication import is_standby_token_name
+from ..replication import local_address_towards
+from ..replication import standby_token_name
+from ..sse import KEEPALIVE_INTERVAL
+from ..sse import OBSERVATION_HEADER
+from ..sse import RESUMED_HEADER
+from ..sse import VALUE_HEADER
+from ..sse import VERSION_HEADER
 from ..sse import EventBroadcaster
-from ..sse import format_sse
+from ..sse import ObservationStamp
+from ..sse import StateEntry
+from ..sse import Subscription
+from ..sse import parse_last_event_id
+from ..sse import parse_observation_stamp
+from ..startup import StartupProfile
+from ..tui import DEFAULT_LOG_SCROLLBACK
 from ..tui import DeviceStatus
 from ..tui import FlowTUIApp
 from ..tui import ServerStatus
-from ..tui import render_server_status
-from ..util import get_certificate_key_path
 from ..util import get_devices
+from ..util import get_host_certificate_path_and_token
 from ..util import get_theoretical_max_device_count
 from ..util import parse_connection_status
+from ..util import parse_server_address
 from . import LogitechFlowKvmCommand
+from .flow_client import create_session
+from .flow_client import pair_with_server
 
 logger = logging.getLogger(__name__)
 
-# How long an /events subscriber's connection can sit idle before we send a
-# keepalive comment -- long enough to be cheap, short enough that a dead TCP
-# connection (the client vanished without a clean close) gets noticed and its
-# queue cleaned up promptly rather than leaking forever.
-KEEPALIVE_INTERVAL = 15.0
+CLIPBOARD_BYTES = Counter(
+    "clipboard_bytes",
+    "Clipboard contents sent to or received from clients, decoded.",
+    ("direction",),
+)
+CLIPBOARD_WIRE_BYTES = Counter(
+    "clipboard_wire_bytes",
+    "Clipboard contents sent to or received from clients, as transferred.",
+    ("direction",),
+)
+LEADER_HOST_REPORTS = Counter(
+    "leader_host_reports",
+    "Leader host reports received, by outcome: applied, or ignored as a "
+    "duplicate or as older than what was already held.",
+    ("outcome",),
+)
+AUTH_TOKEN_LOOKUPS = Counter(
+    "auth_token_lookups",
+    "Bearer tokens checked against every issued token, by result: valid or invalid.",
+    ("result",),
+)
+
+# Startup milestones (see `StartupProfile`): when flow-server was ready to
+# serve, and when it first actually served a client.
+READY = "ready"
+FIRST_SUBSCRIBER = "first /events connection"
+
+
+def _hash_token(token: str) -> bytes:
+    # Tokens are random UUIDs, so there's nothing to gain from a salt or a
+    # slow hash; this only keeps them out of the database in usable form.
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+def _create_tokens_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tokens (
+            name string primary key,
+            token string
+        );
+    """
+    )
+
+
+def _hash_stored_tokens(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE tokens_hashed (
+            name TEXT PRIMARY KEY,
+            token_hash TEXT NOT NULL
+        );
+    """
+    )
+    db.executemany(
+        "INSERT INTO tokens_hashed (name, token_hash) VALUES (?, ?)",
+        [
+            (name, _hash_token(token).hex())
+            for name, token in db.execute("SELECT name, token FROM tokens")
+        ],
+    )
+    db.execute("DROP TABLE tokens")
+    db.execute("ALTER TABLE tokens_hashed RENAME TO tokens")
+    db.execute("CREATE UNIQUE INDEX tokens_token_hash ON tokens (token_hash)")
+
+
+def _create_state_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            updated_at REAL NOT NULL
+        );
+    """
+    )
+
+
+def _create_secrets_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS secrets (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+    )
+    # Kept as a row of `state` before it had a table of its own.
+    db.execute(
+        """
+        INSERT INTO secrets (name, value)
+        SELECT 'multicast', value FROM state WHERE key = 'multicast-secret'
+        ;
+    """
+    )
+    db.execute("DELETE FROM state WHERE key = 'multicast-secret'")
+
+
+# Applied in order; a database's `PRAGMA user_version` is how many of these
+# it has already had applied.
+TOKEN_SCHEMA_MIGRATIONS: list[Callable[[sqlite3.Connection], None]] = [
+    _create_tokens_table,
+    _hash_stored_tokens,
+    _create_state_table,
+    _create_secrets_table,
+]
+TOKEN_SCHEMA_VERSION = len(TOKEN_SCHEMA_MIGRATIONS)
+
+
+def migrate_token_db(db: sqlite3.Connection) -> None:
+    """Bring the token database up to `TOKEN_SCHEMA_VERSION`, one step at a
+    time, tracking progress in SQLite's `user_version`."""
+    (current,) = db.execute("PRAGMA user_version").fetchone()
+    for version, migration in enumerate(
+        TOKEN_SCHEMA_MIGRATIONS[current:], start=current + 1
+    ):
+        # Explicitly, since sqlite3 wouldn't open a transaction before DDL
+        # on its own; each step lands whole or not at all.
+        with db:
+            db.execute("BEGIN")
+            migration(db)
+            db.execute(f"PRAGMA user_version = {version}")
+
+
+def open_token_db() -> sqlite3.Connection:
+    """The token database -- which also keeps the leader's last known host,
+    and the multicast secret -- migrated and ready for use from any
+    thread."""
+    user_data_dir = platformdirs.user_data_dir(constants.APP_NAME, constants.APP_AUTHOR)
+    os.makedirs(user_data_dir, exist_ok=True)
+
+    db = sqlite3.Connection(
+        os.path.join(user_data_dir, "tokens.db"), check_same_thread=False
+    )
+    # The leader host is written on every switch: with a write-ahead log,
+    # and without an fsync per commit, that's an append rather than a
+    # rewrite. A crash can only lose the last few switches, never corrupt
+    # anything, and live notifications replace whatever's restored anyway.
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    migrate_token_db(db)
+    return db
+
+
+def _enable_notifications(receiver: Receiver) -> None:
+    receiver.enable_connection_notifications()
+    receiver.notify_devices()
 
 
 class FlowServerAPI(Flask):
@@ -51,6 +244,7 @@ class FlowServerAPI(Flask):
     binding_interface: str
     port: int
     clipboard_enabled: bool
+    max_clipboard_size: int
 
     listeners: list[NotificationListener]
     leader_device: PairedDevice
@@ -65,7 +259,12 @@ class FlowServerAPI(Flask):
     events: EventBroadcaster
     reconciler: Reconciler
 
+    # Shared by every request thread, so every use of it holds `db_lock`.
+    # Only pairing ever needs it after startup: tokens are verified against
+    # `_token_hashes`, an in-memory copy of the table.
     db: sqlite3.Connection
+    db_lock: threading.Lock
+    _token_hashes: dict[str, bytes]
 
     # `threaded=True` means concurrent /pairing requests would otherwise run
     # their Prompt.ask() calls on the same console at once, interleaving
@@ -77,6 +276,36 @@ class FlowServerAPI(Flask):
     # non-interactively, in which case status updates are simply skipped.
     tui: FlowTUIApp | None = None
 
+    # The entity tag of this host's clipboard as last seen (see
+    # `clipboard.content_etag`), and how many times it's been seen to
+    # change. Each change is published as the `clipboard-changed` state key
+    # so clients can fetch the new contents before they're needed.
+    _clipboard_etag: str | None = None
+    _clipboard_version: int = 0
+
+    # Whether the leader host was restored from the last run (see
+    # `_restore_leader_host`) and not yet confirmed by any report since.
+    leader_host_provisional: bool = False
+
+    # When the leader host held was observed, by this process's monotonic
+    # clock (see `sse.ObservationStamp`), and the session and sequence of
+    # each reporter's last applied report: what a report must be newer than.
+    _leader_host_observed: float = -math.inf
+    _report_sequences: dict[str, tuple[str, int]]
+    _report_lock: threading.Lock
+
+    # Set when this is a standby (`--standby-of`): follows the primary,
+    # mirroring its state and tokens into this one. See `replication`.
+    replicator: Replicator | None = None
+    # Standbys registered with this server, by "address:port", published to
+    # clients as the `standbys` state key.
+    standbys: dict[str, dict[str, object]]
+
+    # Set when leader arrivals here are also announced over multicast
+    # (`--multicast`); clients are told how to join it with their
+    # configuration. See `multicast`.
+    multicast: MulticastChannel | None = None
+
     def __init__(
         self,
         *args,
@@ -87,6 +316,9 @@ class FlowServerAPI(Flask):
         binding_interface: str,
         port: int,
         clipboard_enabled: bool = True,
+        max_clipboard_size: int = MAX_CLIPBOARD_SIZE,
+        db: sqlite3.Connection | None = None,
+        startup: StartupProfile | None = None,
         **kwargs,
     ):
         self.host_number = host_number
@@ -96,44 +328,62 @@ class FlowServerAPI(Flask):
         self.binding_interface = binding_interface
         self.port = port
         self.clipboard_enabled = clipboard_enabled
+        self.max_clipboard_size = max_clipboard_size
+        self.startup = startup if startup is not None else StartupProfile()
 
         self._leader_connected = False
+        self._clipboard_lock = threading.Lock()
+        # The leader host waiting to be persisted (see `_persist_leader_host`).
+        self._unpersisted: tuple[int, int] | None = None
+        self._persist_lock = threading.Lock()
+        self._persist_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="persist"
+        )
+        # One at a time, so captures are announced in the order they're made.
+        self._clipboard_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="clipboard"
+        )
+        self.standbys = {}
+        self._standbys_lock = threading.Lock()
+        self._report_sequences = {}
+        self._report_lock = threading.Lock()
 
         self.pairing_lock = threading.Lock()
 
         self.events = EventBroadcaster()
+        switch_errors = SwitchErrorLog(logger)
         self.reconciler = Reconciler(
             follower_devices,
             get_desired_host=self._get_desired_host,
             host_number=host_number,
-            on_error=self._reconciler_error,
+            on_error=switch_errors.failed,
+            on_success=switch_errors.succeeded,
         )
 
         # Listen to change events for all relevant devices, one listener per
         # distinct receiver (leader and followers may share a receiver).
-        self.listeners = []
-        seen_receivers: list[Receiver] = []
+        receivers: list[Receiver] = []
         for device in (self.leader_device, *self.follower_devices):
-            if device.receiver in seen_receivers:
-                continue
-            seen_receivers.append(device.receiver)
-            device.receiver.enable_connection_notifications()
-            device.receiver.notify_devices()
-            self.listeners.append(
-                NotificationListener(
-                    device.receiver.path, partial(self.callback, device.receiver)
-                )
-            )
-
-        user_data_dir = platformdirs.user_data_dir(
-            constants.APP_NAME, constants.APP_AUTHOR
-        )
-        os.makedirs(user_data_dir, exist_ok=True)
-
-        self.db = sqlite3.Connection(
-            os.path.join(user_data_dir, "tokens.db"), check_same_thread=False
-        )
-        self.migrate_db()
+            if device.receiver not in receivers:
+                receivers.append(device.receiver)
+        # Each receiver is its own device node, so they can all be set up at
+        # once rather than one round trip after another.
+        with (
+            self.startup.phase("notifications"),
+            ThreadPoolExecutor(
+                max_workers=len(receivers), thread_name_prefix="notifications"
+            ) as executor,
+        ):
+            list(executor.map(_enable_notifications, receivers))
+        self.listeners = [
+            NotificationListener(receiver.path, partial(self.callback, receiver))
+            for receiver in receivers
+        ]
+
+        self.db = db if db is not None else open_token_db()
+        self.db_lock = threading.Lock()
+        self.load_auth_tokens()
+        self._restore_leader_host()
 
         super().__init__(*args, **kwargs)
 
@@ -141,16 +391,18 @@ class FlowServerAPI(Flask):
         """Start the reconciler and notification listeners.
 
         Deliberately not done in `__init__`: `callback()`/`report_leader_host()`
-        may call `self.tui.update_status(...)`, which requires the TUI's event
-        loop to already be running -- so when interactive, this is called from
+        publish status to `self.tui`, which is only set once the TUI's event
+        loop is running -- so when interactive, this is called from
         `FlowTUIApp.on_mount` instead of right after construction.
         """
         for listener in self.listeners:
             listener.start()
         self.reconciler.start()
+        if self.replicator is not None:
+            self.replicator.start()
 
     def _get_desired_host(self) -> int | None:
-        state = self.events.state
+        state = self.events.get_state("leader-host")
         return int(state) if state is not None else None
 
     def _build_status(self) -> ServerStatus:
@@ -175,53 +427,114 @@ class FlowServerAPI(Flask):
 
     def _publish_status(self) -> None:
         if self.tui is not None:
-            self.tui.update_status(render_server_status(self._build_status()))
-
-    def migrate_db(self) -> None:
-        cursor = self.db.cursor()
-        cursor.execute(
-            """
-            CREATE TABLE IF NOT EXISTS tokens (
-                name string primary key,
-                token string
-            );
-        """
-        )
-        self.db.commit()
-        cursor.close()
+            self.tui.publish_status(self._build_status())
 
-    def create_new_auth_token(self, name: str) -> str:
-        cursor = self.db.cursor()
+    def load_auth_tokens(self) -> None:
+        with self.db_lock:
+            rows = self.db.execute("SELECT name, token_hash FROM tokens").fetchall()
+        self._token_hashes = {name: bytes.fromhex(digest) for name, digest in rows}
 
+    def create_new_auth_token(self, name: str) -> str:
         new_token = str(uuid.uuid4())
-        cursor.execute(
-            """
-            INSERT INTO tokens (name, token)
-            VALUES (?, ?)
-            ON CONFLICT (name) DO UPDATE SET
-                token=excluded.token
-            ;
-        """,
-            (name, new_token),
-        )
-
-        self.db.commit()
-        cursor.close()
+        digest = _hash_token(new_token)
+
+        with self.db_lock, self.db:
+            self.db.execute(
+                """
+                INSERT INTO tokens (name, token_hash)
+                VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET
+                    token_hash=excluded.token_hash
+                ;
+            """,
+                (name, digest.hex()),
+            )
+            # Replaced rather than updated in place, so `verify_auth_token`
+            # can iterate whichever dict it picked up without a lock.
+            self._token_hashes = {**self._token_hashes, name: digest}
 
         return new_token
 
-    def verify_auth_token(self, token: str) -> bool:
-        cursor = self.db.cursor()
-
-        cursor.execute("""SELECT name FROM tokens WHERE token = ?""", (token,))
-
-        results = cursor.fetchall()
-
-        if len(results) > 0:
-            # Return the username (probably a host index)
-            return results[0][0]
-
-        return False
+    def replace_auth_tokens(self, token_hashes: dict[str, bytes]) -> None:
+        """Make `token_hashes` the whole token store, as mirrored from the
+        primary this is a standby of."""
+        if token_hashes == self._token_hashes:
+            return
+        with self.db_lock, self.db:
+            self.db.execute("DELETE FROM tokens")
+            self.db.executemany(
+                "INSERT INTO tokens (name, token_hash) VALUES (?, ?)",
+                [(name, digest.hex()) for name, digest in token_hashes.items()],
+            )
+            self._token_hashes = dict(token_hashes)
+        logger.info("Mirrored %d tokens from primary", len(token_hashes))
+
+    def verify_auth_token(self, token: str) -> str | bool:
+        """The name `token` was issued to, or False -- checked entirely in
+        memory, against every issued token, in constant time."""
+        digest = _hash_token(token)
+        match: str | bool = False
+        # No early exit: how long this takes mustn't depend on which (or
+        # whether any) stored token matched.
+        for name, stored in self._token_hashes.items():
+            if hmac.compare_digest(stored, digest):
+                match = name
+        AUTH_TOKEN_LOOKUPS.labels("valid" if match else "invalid").inc()
+        return match
+
+    def render_metrics(self) -> str:
+        """Every metric in the Prometheus text format: the process-wide ones
+        updated as things happen, then the event stream's as it is now."""
+        stats = self.events.stats
+        return REGISTRY.render() + "".join(
+            [
+                format_family(
+                    f"{METRICS_PREFIX}sse_subscribers",
+                    "gauge",
+                    "Clients subscribed to /events.",
+                    [("", (), stats.subscribers)],
+                ),
+                format_family(
+                    f"{METRICS_PREFIX}sse_queued_events",
+                    "gauge",
+                    "Events waiting to be sent to each /events subscriber.",
+                    [
+                        ("", (("subscriber", name),), depth)
+                        for name, depth in sorted(self.events.queue_depths.items())
+                    ],
+                ),
+                format_family(
+                    f"{METRICS_PREFIX}sse_dropped_events",
+                    "counter",
+                    "Informational events dropped for subscribers too far behind.",
+                    [("_total", (), stats.dropped)],
+                ),
+                format_family(
+                    f"{METRICS_PREFIX}sse_coalesced_events",
+                    "counter",
+                    "State events superseded before they could be sent.",
+                    [("_total", (), stats.coalesced)],
+                ),
+                format_family(
+                    f"{METRICS_PREFIX}startup_phase_seconds",
+                    "gauge",
+                    "How long each phase of startup took.",
+                    [
+                        ("", (("phase", phase.name),), phase.duration)
+                        for phase in self.startup.phases
+                    ],
+                ),
+                format_family(
+                    f"{METRICS_PREFIX}startup_milestone_seconds",
+                    "gauge",
+                    "When, after startup began, each milestone was reached.",
+                    [
+                        ("", (("milestone", name),), at)
+                        for name, at in self.startup.milestones.items()
+                    ],
+                ),
+            ]
+        )
 
     def callback(self, receiver: Receiver, notification: Notification) -> None:
         if notification.sub_id != 0x41:
@@ -245,9 +558,16 @@ class FlowServerAPI(Flask):
             self._leader_connected = connected
             if connected:
                 logger.info("Device %s connected", device.id)
+                self._announce_arrival()
                 self.report_leader_host(self.host_number)
             else:
                 logger.info("Device %s disconnected", device.id)
+                # Whatever was copied here is what the user will want to
+                # paste wherever they're headed. Read off this thread:
+                # `pyperclip` runs a subprocess, and this receiver's next
+                # notification may well be the leader arriving somewhere.
+                if self.clipboard_enabled:
+                    self._clipboard_executor.submit(self._capture_clipboard)
                 self._publish_status()
         else:
             self.reconciler.observe(device, connected)
@@ -257,19 +577,233 @@ class FlowServerAPI(Flask):
                 logger.info("Device %s disconnected", device.id)
             self._publish_status()
 
-    def report_leader_host(self, new_host: int) -> None:
-        """Record positive evidence that the leader is now on `new_host`."""
-        self.events.set_state("leader-host", str(new_host))
+    def _announce_arrival(self) -> None:
+        """Announce over multicast, if enabled, that the leader is here --
+        ahead of the report making it so, for peers on the LAN."""
+        if self.multicast is None:
+            return
+        entry = self.events.state.get("leader-host")
+        self.multicast.announce(
+            self.host_number, entry.version if entry is not None else 0
+        )
+
+    def report_leader_host(
+        self,
+        new_host: int,
+        *,
+        reporter: str | None = None,
+        stamp: ObservationStamp | None = None,
+    ) -> StateEntry:
+        """Record positive evidence that the leader is now on `new_host`, as
+        observed by `reporter` per `stamp` (or, without one, just now);
+        returns the leader host held afterward, and its version.
+
+        The newest observation wins, whatever order reports arrive in: one
+        observed before the leader host already held -- a report delayed,
+        or overtaken by another host's -- is ignored, as is a repeat of a
+        reporter's last applied report (a retried request). Either way
+        nothing is published, so no follower switches over and back."""
+        observed = time.monotonic() - (stamp.age if stamp is not None else 0.0)
+        with self._report_lock:
+            outcome = self._judge_report(reporter, stamp, observed)
+            if outcome != "applied":
+                LEADER_HOST_REPORTS.labels(outcome).inc()
+                logger.info(
+                    "Ignored %s report of leader host %s from %s",
+                    outcome,
+                    new_host,
+                    reporter,
+                )
+                return self.events.state["leader-host"]
+            version = self.events.set_state("leader-host", str(new_host))
+            self._leader_host_observed = observed
+            if reporter is not None and stamp is not None:
+                self._report_sequences[reporter] = (stamp.session, stamp.sequence)
+        LEADER_HOST_REPORTS.labels(outcome).inc()
+        if self.leader_host_provisional:
+            self.leader_host_provisional = False
+            logger.info("Leader host confirmed as %s", new_host)
         self.reconciler.poke()
         self._publish_status()
+        self._persist_leader_host(new_host, version)
+        if self.replicator is not None:
+            # Applied here regardless, so this host's followers needn't wait
+            # on the round trip; the primary's echo of it is then a no-op.
+            self.replicator.forward_leader_host(new_host, observed)
+        return StateEntry(str(new_host), version)
+
+    def _judge_report(
+        self, reporter: str | None, stamp: ObservationStamp | None, observed: float
+    ) -> str:
+        if reporter is not None and stamp is not None:
+            last = self._report_sequences.get(reporter)
+            if last is not None and last[0] == stamp.session:
+                if stamp.sequence == last[1]:
+                    return "duplicate"
+                if stamp.sequence < last[1]:
+                    return "stale"
+        if observed < self._leader_host_observed:
+            return "stale"
+        return "applied"
+
+    def mirror_state(self, key: str, value: str, version: int) -> None:
+        """Take `key` as the primary this is a standby of has it, at its
+        `version`."""
+        if self.events.get_state(key) == value:
+            return
+        version = self.events.restore_state(key, value, version)
+        if key == "leader-host":
+            self.leader_host_provisional = False
+            self.reconciler.poke()
+            self._publish_status()
+            self._persist_leader_host(int(value), version)
+
+    def register_standby(self, address: str, port: int, certificate: str) -> None:
+        """Announce to clients that a standby at `address`:`port`, presenting
+        `certificate`, can take over from this server."""
+        entry: dict[str, object] = {
+            "address": address,
+            "port": port,
+            "certificate": certificate,
+        }
+        with self._standbys_lock:
+            if self.standbys.get(f"{address}:{port}") == entry:
+                return
+            self.standbys[f"{address}:{port}"] = entry
+            self.events.set_state(
+                STANDBYS_STATE, json.dumps(list(self.standbys.values()))
+            )
+        logger.info("Standby registered at %s:%s", address, port)
+
+    def _persist_leader_host(self, host: int, version: int) -> None:
+        """Have `host`, at `version`, written to the database -- in the
+        background, so reports are answered without waiting on a commit.
+        Only the latest matters: one superseded before it's written isn't."""
+        with self._persist_lock:
+            pending = self._unpersisted
+            if pending is not None and pending[1] >= version:
+                return
+            self._unpersisted = (host, version)
+        if pending is None:
+            self._persist_executor.submit(self._write_unpersisted)
+
+    def flush_leader_host(self) -> None:
+        """Wait for the leader host to be written, e.g. before exiting."""
+        self._persist_executor.submit(lambda: None).result()
+
+    def _write_unpersisted(self) -> None:
+        with self._persist_lock:
+            unpersisted, self._unpersisted = self._unpersisted, None
+        if unpersisted is None:
+            return
+        host, version = unpersisted
+        try:
+            self._write_leader_host(host, version)
+        except sqlite3.Error as e:
+            logger.warning("Could not persist leader host %s: %s", host, e)
+
+    def _write_leader_host(self, host: int, version: int) -> None:
+        with self.db_lock, self.db:
+            # A mirror and a report can race each other here; only ever move
+            # forward.
+            self.db.execute(
+                """
+                INSERT INTO state (key, value, version, updated_at)
+                VALUES ('leader-host', ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value=excluded.value,
+                    version=excluded.version,
+                    updated_at=excluded.updated_at
+                WHERE excluded.version > state.version
+                ;
+            """,
+                (str(host), version, time.time()),
+            )
 
-    def _reconciler_error(self, device: PairedDevice, error: Exception) -> None:
-        logger.warning(
-            "Could not switch %s to the desired host yet (%s); will retry",
-            device.id,
-            error,
+    def _restore_leader_host(self) -> None:
+        """Pick up where the last run left off: publish the leader host it
+        last persisted, so subscribers' very first snapshot after a restart
+        already has it. It's provisional -- the leader may have moved while
+        nobody was listening -- until the next report confirms or replaces
+        it, e.g. a client re-announcing its devices as it reconnects."""
+        with self.db_lock:
+            row = self.db.execute(
+                "SELECT value, version, updated_at FROM state WHERE key = 'leader-host'"
+            ).fetchone()
+        if row is None:
+            return
+        value, version, updated_at = row
+        self.events.restore_state("leader-host", value, version)
+        self.leader_host_provisional = True
+        logger.info(
+            "Restored leader host %s, last reported %.0fs ago; provisional "
+            "until confirmed",
+            value,
+            max(time.time() - updated_at, 0),
         )
 
+    def multicast_secret(self) -> str:
+        """The secret multicast announcements are signed with (see
+        `multicast.derive_key`), generated on first use and kept in the
+        database, so paired clients' copies stay good across restarts."""
+        with self.db_lock, self.db:
+            row = self.db.execute(
+                "SELECT value FROM secrets WHERE name = 'multicast'"
+            ).fetchone()
+            if row is not None:
+                return row[0]
+            secret = generate_secret()
+            self.db.execute(
+                "INSERT INTO secrets (name, value) VALUES ('multicast', ?)",
+                (secret,),
+            )
+            return secret
+
+    def _capture_clipboard(self) -> None:
+        try:
+            local = pyperclip.paste().encode("utf-8")
+        except pyperclip.PyperclipException as e:
+            logger.debug("Could not read the clipboard: %s", e)
+        else:
+            self.note_clipboard(content_etag(local))
+
+    def note_clipboard(self, etag: str) -> None:
+        """Record that this host's clipboard holds contents tagged `etag`,
+        announcing it to every client if that's a change."""
+        with self._clipboard_lock:
+            if etag == self._clipboard_etag:
+                return
+            self._clipboard_etag = etag
+            self._clipboard_version += 1
+            self.events.set_state(
+                "clipboard-changed",
+                json.dumps({"version": self._clipboard_version, "hash": etag}),
+            )
+
+    def open_event_stream(
+        self, connecting_host: str, last_event_id: int | None
+    ) -> Subscription:
+        """Subscribe `connecting_host` to events and announce it to everyone
+        else; shared by every way of serving `/events`."""
+        subscription = self.events.subscribe(
+            name=connecting_host, last_event_id=last_event_id
+        )
+        if subscription.resumed:
+            logger.info("Host %s reconnected", connecting_host)
+        else:
+            logger.info("Host %s connected", connecting_host)
+        if self.startup.mark(FIRST_SUBSCRIBER):
+            self.startup.log(logger, "First /events connection accepted")
+        self.events.broadcast(
+            "host-connected", connecting_host, exclude=subscription.queue
+        )
+        self._publish_status()
+        return subscription
+
+    def close_event_stream(self, subscription: Subscription) -> None:
+        self.events.unsubscribe(subscription.queue)
+        self._publish_status()
+
 
 def bind_routes(app: FlowServerAPI) -> None:
     auth = HTTPTokenAuth(scheme="Bearer")
@@ -280,6 +814,10 @@ def bind_routes(app: FlowServerAPI) -> None:
 
     @app.route("/pairing", methods=["POST"])
     def pair():
+        if app.replicator is not None:
+            # Clients pair with the primary, and learn of standbys from it;
+            # a token issued here would be overwritten by the next mirror.
+            abort(403)
         # Serialized: two pairing attempts running at once would interleave
         # either their Prompt.ask() calls on the same stdin/stdout, or their
         # pairing modals on the same TUI.
@@ -328,40 +866,117 @@ def bind_routes(app: FlowServerAPI) -> None:
 
         response["leader"] = app.leader_device.id
         response["followers"] = [device.id for device in app.follower_devices]
+        if app.multicast is not None:
+            response["multicast"] = app.multicast.configuration()
+
+        return response
+
+    def report_leader_host() -> StateEntry:
+        return app.report_leader_host(
+            int(request.data),
+            reporter=str(auth.current_user()),
+            stamp=parse_observation_stamp(request.headers.get(OBSERVATION_HEADER)),
+        )
 
+    def state_headers(response: Response, entry: StateEntry) -> Response:
+        response.headers[VERSION_HEADER] = str(entry.version)
+        response.headers[VALUE_HEADER] = entry.value
         return response
 
     @app.route("/leader-host", methods=["PUT"])
     @auth.login_required
     def leader_host():
-        app.report_leader_host(int(request.data))
+        return state_headers(make_response(""), report_leader_host())
+
+    @app.route("/arrival", methods=["POST"])
+    @auth.login_required
+    def arrival():
+        """`PUT /leader-host` and a conditional `GET /clipboard` in one round
+        trip, for the host the leader just connected to. The clipboard comes
+        back as the body, or not at all (`204`) if `If-None-Match` names what
+        the client already holds."""
+        leader_host = report_leader_host()
+        if app.clipboard_enabled:
+            local = pyperclip.paste().encode("utf-8")
+            current = content_etag(local)
+            app.note_clipboard(current)
+            if request.if_none_match.contains(current):
+                response = make_response("", 204)
+                response.set_etag(current)
+            else:
+                response = clipboard_response(local, current)
+        else:
+            response = make_response("", 204)
+        return state_headers(response, leader_host)
+
+    def clipboard_response(local: bytes, current: str) -> Response:
+        """Clipboard contents `local` as a response body, compressed if the
+        client accepts it."""
+        encoding = choose_encoding(
+            local, accepted_encodings(request.headers.get("Accept-Encoding"))
+        )
+
+        def sent() -> Iterator[bytes]:
+            for chunk in encode_chunks(local, encoding):
+                CLIPBOARD_WIRE_BYTES.labels("sent").inc(len(chunk))
+                yield chunk
+            CLIPBOARD_BYTES.labels("sent").inc(len(local))
+
+        response = Response(sent(), mimetype="text/plain")
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.set_etag(current)
+        return response
+
+    @app.route("/replication/standby", methods=["PUT"])
+    @auth.login_required
+    def replication_standby():
+        if not is_standby_token_name(str(auth.current_user())):
+            abort(403)
+        request_data = request.json
+        app.register_standby(
+            request_data["address"],
+            int(request_data["port"]),
+            request_data["certificate"],
+        )
         return ""
 
+    @app.get("/replication/tokens")
+    @auth.login_required
+    def replication_tokens():
+        if not is_standby_token_name(str(auth.current_user())):
+            abort(403)
+        return {name: digest.hex() for name, digest in app._token_hashes.items()}
+
+    @app.get("/metrics")
+    @auth.login_required
+    def metrics():
+        return Response(app.render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
     @app.route("/events")
     @auth.login_required
     def events():
-        connecting_host = str(auth.current_user())
-        subscriber_queue, current = app.events.subscribe(name=connecting_host)
-        logger.info("Host %s connected", connecting_host)
-        app.events.broadcast(
-            "host-connected", connecting_host, exclude=subscriber_queue
+        subscription = app.open_event_stream(
+            str(auth.current_user()),
+            parse_last_event_id(request.headers.get("Last-Event-ID")),
         )
-        app._publish_status()
 
         def stream():
             try:
-                if current is not None:
-                    yield format_sse("leader-host", current)
+                yield from subscription.initial
                 while True:
                     try:
-                        yield subscriber_queue.get(timeout=KEEPALIVE_INTERVAL)
+                        yield subscription.queue.get(timeout=KEEPALIVE_INTERVAL)
                     except queue.Empty:
                         yield ": keepalive\n\n"
             finally:
-                app.events.unsubscribe(subscriber_queue)
-                app._publish_status()
+                app.close_event_stream(subscription)
 
-        return Response(stream(), mimetype="text/event-stream")
+        response = Response(stream(), mimetype="text/event-stream")
+        if subscription.resumed:
+            response.headers[RESUMED_HEADER] = "1"
+        return response
 
     @app.route("/clipboard", methods=["PUT", "GET"])
     @auth.login_required
@@ -369,16 +984,69 @@ def bind_routes(app: FlowServerAPI) -> None:
         if not app.clipboard_enabled:
             abort(404)
 
+        # What this host's clipboard holds right now -- it may have been
+        # copied to locally since any client last synced.
+        local = pyperclip.paste().encode("utf-8")
+        current = content_etag(local)
+        app.note_clipboard(current)
+
         if request.method == "GET":
-            return pyperclip.paste()
+            response = clipboard_response(local, current)
+            # A bodiless `304` if it's what the client already holds.
+            response.make_conditional(request)
         elif request.method == "PUT":
-            pyperclip.copy(request.data.decode("utf-8"))
-            logger.info(
-                "Clipboard set from client with %d bytes of data", len(request.data)
-            )
-            return ""
+            if request.if_match and not request.if_match.contains(current):
+                abort(412)
+            try:
+                encoding = parse_content_encoding(
+                    request.headers.get("Content-Encoding")
+                )
+            except ValueError:
+                response = make_response("", 415)
+                response.headers["Accept-Encoding"] = ", ".join(ENCODINGS)
+                return response
 
-        abort(405)
+            started = time.monotonic()
+            wire_size = 0
+
+            def received() -> Iterator[bytes]:
+                nonlocal wire_size
+                while chunk := request.stream.read(CHUNK_SIZE):
+                    wire_size += len(chunk)
+                    yield chunk
+
+            try:
+                data = decode_chunks(received(), encoding, app.max_clipboard_size)
+            except exceptions.ClipboardTooLarge:
+                logger.warning(
+                    "Refused a clipboard from %s over the %d-byte limit",
+                    request.remote_addr,
+                    app.max_clipboard_size,
+                )
+                abort(413)
+            except ValueError:
+                abort(400)
+            CLIPBOARD_BYTES.labels("received").inc(len(data))
+            CLIPBOARD_WIRE_BYTES.labels("received").inc(wire_size)
+
+            new = content_etag(data)
+            if new == current:
+                response = make_response("", 204)
+            else:
+                pyperclip.copy(data.decode("utf-8", "replace"))
+                app.note_clipboard(new)
+                logger.info(
+                    "Clipboard set from client: %s",
+                    describe_transfer(len(data), wire_size, time.monotonic() - started),
+                )
+                response = make_response("")
+            response.set_etag(new)
+        else:
+            abort(405)
+
+        # Which codings a `PUT` body may use (RFC 7694).
+        response.headers["Accept-Encoding"] = ", ".join(ENCODINGS)
+        return response
 
 
 class FlowServer(LogitechFlowKvmCommand):
@@ -398,6 +1066,43 @@ class FlowServer(LogitechFlowKvmCommand):
                 "/clipboard endpoint will be unavailable to clients."
             ),
         )
+        parser.add_argument(
+            "--max-clipboard-size",
+            default=MAX_CLIPBOARD_SIZE,
+            type=int,
+            help=(
+                "Largest clipboard, in bytes (uncompressed), this host will "
+                "accept from a client."
+            ),
+        )
+        parser.add_argument(
+            "--log-scrollback",
+            default=DEFAULT_LOG_SCROLLBACK,
+            type=int,
+            help=(
+                "Log lines the interactive display keeps before discarding the "
+                "oldest. The log file always has everything."
+            ),
+        )
+        parser.add_argument(
+            "--startup-profile",
+            action="store_true",
+            help=(
+                "Log when each phase of startup began and ended, and on which "
+                "thread, rather than only how long each took."
+            ),
+        )
+        parser.add_argument(
+            "--server-mode",
+            choices=["flask", "asyncio"],
+            default="flask",
+            help=(
+                "How to serve HTTP. 'flask' (the default) runs Flask's threaded "
+                "server, which dedicates a thread to every connected client; "
+                "'asyncio' serves every connection from a single event loop "
+                "instead, so idle /events subscribers don't each hold a thread."
+            ),
+        )
         parser.add_argument(
             "--hostname",
             "-H",
@@ -412,12 +1117,86 @@ class FlowServer(LogitechFlowKvmCommand):
             ),
         )
 
+        parser.add_argument(
+            "--standby-of",
+            metavar="HOST[:PORT]",
+            default=None,
+            help=(
+                "Run as a hot standby of the flow-server at HOST: mirror its "
+                "state and paired tokens, and take over for clients listing "
+                "this server (see flow-client's --standby-server) while it's "
+                "unreachable. Pairs with it first if not already paired."
+            ),
+        )
+
+        parser.add_argument(
+            "--multicast",
+            action="store_true",
+            help=(
+                "Also announce each leader-host change as a UDP multicast "
+                "datagram, so clients on the same network can switch without "
+                "waiting on the round trip through this server. The server "
+                "remains authoritative."
+            ),
+        )
+        parser.add_argument(
+            "--multicast-group",
+            metavar="GROUP[:PORT]",
+            default=MULTICAST_GROUP,
+            help=(
+                "Multicast group (and UDP port, by default the same as --port's) "
+                "for --multicast."
+            ),
+        )
+        parser.add_argument(
+            "--multicast-interface",
+            metavar="ADDRESS",
+            default="0.0.0.0",
+            help=(
+                "Address of the network interface to send multicast "
+                "announcements from. By default, the system chooses."
+            ),
+        )
+
+        parser.add_argument(
+            "--key-type",
+            choices=KEY_TYPES,
+            default=None,
+            help=(
+                "Key type for the server's TLS certificate. New certificates "
+                f"default to {DEFAULT_KEY_TYPE} (ECDSA P-256), which is quick to "
+                "generate and to handshake with; 'rsa' (4096-bit) is there for "
+                "compatibility. Giving this regenerates an existing certificate "
+                "of a different type, which makes paired clients re-pair; "
+                "omitting it keeps whatever certificate already exists."
+            ),
+        )
+
     def handle(self) -> None:
+        startup = StartupProfile(verbose=self.options.startup_profile)
+
+        # Neither needs the devices, so both run alongside finding them
+        # rather than after: on first run, or when the hostnames or key type
+        # changed, the certificate needs a new key -- quick for ECDSA, but
+        # seconds for RSA -- and the token database may need migrating.
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="startup")
+        certificate = executor.submit(
+            startup.run,
+            "certificate",
+            get_certificate_key_path,
+            "server",
+            create=True,
+            hostnames=self.options.hostname,
+            key_type=self.options.key_type,
+        )
+        token_db = executor.submit(startup.run, "token database", open_token_db)
+        executor.shutdown(wait=False)
+
         device_id_map: dict[str, PairedDevice | None] = {
             self.options.leader_device: None,
             **{follower: None for follower in self.options.follower_devices},
         }
-        with Progress(transient=True) as progress:
+        with startup.phase("devices"), Progress(transient=True) as progress:
             enumerate_task = progress.add_task(
                 "Finding devices...", total=get_theoretical_max_device_count()
             )
@@ -442,21 +1221,8 @@ class FlowServer(LogitechFlowKvmCommand):
         for device in self.options.follower_devices:
             follower_devices.append(found_devices[device])
 
-        cert_path, key_path = get_certificate_key_path(
-            "server", create=True, hostnames=self.options.hostname
-        )
-
-        logger.info("Leader: %s", self.options.leader_device)
-        logger.info("Followers: %s", ", ".join(self.options.follower_devices))
-        logger.info("Certificate: %s", cert_path)
-        logger.info("Key: %s", key_path)
-        logger.info("Binding interface: %s", self.options.binding_interface)
-        logger.info("Port: %s", self.options.port)
-        if self.options.hostname:
-            logger.info("Hostnames: %s", ", ".join(self.options.hostname))
-        if self.options.no_clipboard:
-            logger.info("Clipboard synchronization: disabled")
-
+        # Enabling notifications (in `FlowServerAPI`) can still overlap the
+        # certificate.
         app = FlowServerAPI(
             __name__,
             host_number=self.options.host_number,
@@ -466,33 +1232,111 @@ class FlowServer(LogitechFlowKvmCommand):
             binding_interface=self.options.binding_interface,
             port=self.options.port,
             clipboard_enabled=not self.options.no_clipboard,
+            max_clipboard_size=self.options.max_clipboard_size,
+            db=token_db.result(),
+            startup=startup,
         )
 
         bind_routes(app)
 
-        def run_flask() -> None:
-            app.run(
-                port=self.options.port,
-                host=self.options.binding_interface,
-                ssl_context=(cert_path, key_path),
-                threaded=True,
+        cert_path, key_path = certificate.result()
+        if self.options.standby_of:
+            app.replicator = self._create_replicator(app, cert_path)
+        if self.options.multicast:
+            group, multicast_port = parse_server_address(
+                self.options.multicast_group, self.options.port
             )
+            app.multicast = MulticastChannel(
+                app.multicast_secret(),
+                group=group,
+                port=multicast_port,
+                interface=self.options.multicast_interface,
+            )
+        startup.mark(READY)
+
+        logger.info("Leader: %s", self.options.leader_device)
+        logger.info("Followers: %s", ", ".join(self.options.follower_devices))
+        logger.info("Certificate: %s", cert_path)
+        logger.info("Key: %s", key_path)
+        logger.info("Binding interface: %s", self.options.binding_interface)
+        logger.info("Port: %s", self.options.port)
+        if self.options.hostname:
+            logger.info("Hostnames: %s", ", ".join(self.options.hostname))
+        if self.options.no_clipboard:
+            logger.info("Clipboard synchronization: disabled")
+        logger.info("Server mode: %s", self.options.server_mode)
+        startup.log(logger, "Started")
+
+        if app.replicator is not None:
+            logger.info("Standby of: %s", app.replicator.primary_url)
+        if app.multicast is not None:
+            logger.info("Multicast: %s:%s", app.multicast.group, app.multicast.port)
+
+        def run_server() -> None:
+            if self.options.server_mode == "asyncio":
+                run_async_server(
+                    app,
+                    host=self.options.binding_interface,
+                    port=self.options.port,
+                    cert_path=cert_path,
+                    key_path=key_path,
+                )
+            else:
+                app.run(
+                    port=self.options.port,
+                    host=self.options.binding_interface,
+                    ssl_context=(cert_path, key_path),
+                    threaded=True,
+                )
 
         if sys.stdout.isatty():
 
             def on_start(tui: FlowTUIApp) -> None:
                 app.tui = tui
                 app.start_background_threads()
-                threading.Thread(target=run_flask, daemon=True).start()
+                threading.Thread(target=run_server, daemon=True).start()
 
             # Textual owns the main thread's event loop from here; Ctrl+C
             # is handled internally as a quit keybinding, not a raised
             # KeyboardInterrupt.
-            FlowTUIApp("flow-server", on_start=on_start).run()
+            FlowTUIApp(
+                "flow-server",
+                on_start=on_start,
+                log_scrollback=self.options.log_scrollback,
+            ).run()
         else:
             logger.info("Press CTRL+C to exit")
             app.start_background_threads()
             try:
-                run_flask()
+                run_server()
             except KeyboardInterrupt:
                 pass
+        app.flush_leader_host()
+
+    def _create_replicator(self, app: FlowServerAPI, cert_path: str) -> Replicator:
+        host, port = parse_server_address(
+            self.options.standby_of, constants.DEFAULT_PORT
+        )
+        # What clients are told to connect to; the certificate lists every
+        # one of this machine's addresses and `--hostname`s.
+        if self.options.hostname:
+            address = self.options.hostname[0]
+        else:
+            address = local_address_towards(host, port)
+
+        primary_cert_path, token = get_host_certificate_path_and_token(host)
+        if token is None or not os.path.exists(primary_cert_path):
+            token = pair_with_server(host, port, standby_token_name(address))
+
+        session = create_session(primary_cert_path)
+        session.verify = primary_cert_path
+        session.headers["Authorization"] = f"Bearer {token}"
+        with open(cert_path) as inf:
+            certificate = inf.read()
+
+        return Replicator(
+            app,
+            f"https://{host}:{port}",
+            session,
+            {"address": address, "port": self.options.port, "certificate": certificate},
+        )
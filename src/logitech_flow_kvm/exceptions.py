@@ -28,3 +28,7 @@ class DeviceNotFound(UserError):
 
 class CannotChangeHost(UserError):
     pass
+
+
+class ClipboardTooLarge(LogitechFlowKvmError):
+    pass
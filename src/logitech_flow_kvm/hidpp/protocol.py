@@ -4,6 +4,8 @@ import threading
 import time
 from typing import Protocol
 
+from ..metrics import Counter
+from ..metrics import Histogram
 from .exceptions import ProtocolError
 from .models import Notification
 
@@ -16,6 +18,23 @@ _ERROR_RESOURCE_ERROR = 0x09
 
 DEFAULT_TIMEOUT = 2.0
 
+REQUESTS = Counter("hidpp_requests", "HID++ requests sent.", ("receiver",))
+REQUEST_TIMEOUTS = Counter(
+    "hidpp_request_timeouts",
+    "HID++ requests whose reply never arrived.",
+    ("receiver",),
+)
+REQUEST_ERRORS = Counter(
+    "hidpp_request_errors",
+    "HID++ requests answered with an error reply.",
+    ("receiver",),
+)
+REQUEST_SECONDS = Histogram(
+    "hidpp_request_duration_seconds",
+    "Round-trip time of answered HID++ requests.",
+    ("receiver",),
+)
+
 
 class Transport(Protocol):
     """The subset of `HidRawIO` this layer depends on, so tests can inject a fake."""
@@ -65,8 +84,15 @@ def make_notification(
 class HidppConnection:
     """Request/reply and ping logic for HID++1.0/2.0, layered over a raw transport."""
 
-    def __init__(self, transport: Transport):
+    def __init__(self, transport: Transport, *, name: str = ""):
+        """`name` (e.g. the receiver's hidraw path) labels this connection's
+        metrics."""
         self._transport = transport
+        # Looked up once here rather than per request.
+        self._requests = REQUESTS.labels(name)
+        self._timeouts = REQUEST_TIMEOUTS.labels(name)
+        self._errors = REQUEST_ERRORS.labels(name)
+        self._request_seconds = REQUEST_SECONDS.labels(name)
         # Serializes drain+write+read cycles across threads sharing this
         # connection (e.g. a Flask request thread and another caller both
         # acting on the same receiver) so one call can't consume another's
@@ -97,16 +123,19 @@ class HidppConnection:
         request_header = struct.pack("!H", request_id)
 
         with self._lock:
+            self._requests.inc()
             self._transport.drain()
+            started = time.monotonic()
             self._transport.write(devnumber, request_header + params, long_message)
 
             if no_reply:
                 return None
 
-            deadline = time.monotonic() + timeout
+            deadline = started + timeout
             while True:
                 remaining = deadline - time.monotonic()
                 if remaining <= 0:
+                    self._timeouts.inc()
                     return None
                 reply = self._transport.read(remaining)
                 if reply is None:
@@ -115,11 +144,15 @@ class HidppConnection:
                 if reply_devnumber != devnumber:
                     continue
 
-                if reply_data[:1] == b"\x8f" and reply_data[1:3] == request_header:
-                    raise ProtocolError(reply_data[3])
-                if reply_data[:1] == b"\xff" and reply_data[1:3] == request_header:
+                if reply_data[1:3] == request_header and reply_data[:1] in (
+                    b"\x8f",
+                    b"\xff",
+                ):
+                    self._errors.inc()
+                    self._request_seconds.observe(time.monotonic() - started)
                     raise ProtocolError(reply_data[3])
                 if reply_data[:2] == request_header:
+                    self._request_seconds.observe(time.monotonic() - started)
                     return reply_data[2:]
 
     def read_register(
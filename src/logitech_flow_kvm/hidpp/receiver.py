@@ -73,7 +73,7 @@ class Receiver:
         if transport is None:
             self._io = HidRawIO(info.path)
             transport = self._io
-        self._conn = HidppConnection(transport)
+        self._conn = HidppConnection(transport, name=info.path)
         self.max_devices = self._detect_max_devices()
 
     def close(self) -> None:
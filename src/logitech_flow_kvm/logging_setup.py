@@ -1,7 +1,10 @@
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
+import threading
 
 import platformdirs
 
@@ -12,6 +15,9 @@ LOG_FORMAT = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
 MAX_LOG_BYTES = 5 * 1024 * 1024
 LOG_BACKUP_COUNT = 5
 
+# Records waiting for the writer thread before new ones start being dropped.
+LOG_QUEUE_SIZE = 10_000
+
 
 def get_log_path() -> str:
     log_dir = platformdirs.user_log_dir(constants.APP_NAME, constants.APP_AUTHOR)
@@ -20,23 +26,102 @@ def get_log_path() -> str:
     return os.path.join(log_dir, "logitech-flow-kvm.log")
 
 
-def configure_logging(logger: logging.Logger | None = None) -> None:
-    """Attach a rotating file handler (always) and a plain stdout handler
-    (only when stdout isn't a TTY -- an interactive command builds its own
-    Textual log handler instead, once it knows it's actually running one)."""
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """A `QueueHandler` that never blocks the thread logging: should the
+    (bounded) queue be full, the record is dropped and counted instead, and
+    how many were dropped is logged once there's room again."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self._lock = threading.Lock()
+        self._dropped = 0
+        self.dropped_total = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        with self._lock:
+            dropped = self._dropped
+        if dropped:
+            if not self._offer(self._dropped_record(dropped)):
+                # Still full: the notice stays pending, and only `record`
+                # counts as dropped.
+                self._count_dropped()
+                return
+            with self._lock:
+                self._dropped -= dropped
+        if not self._offer(record):
+            self._count_dropped()
+
+    def _offer(self, record: logging.LogRecord) -> bool:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            return False
+        return True
+
+    def _count_dropped(self) -> None:
+        with self._lock:
+            self._dropped += 1
+            self.dropped_total += 1
+
+    def _dropped_record(self, dropped: int) -> logging.LogRecord:
+        return logging.LogRecord(
+            __name__,
+            logging.WARNING,
+            __file__,
+            0,
+            "%d log records dropped; logging fell behind",
+            (dropped,),
+            None,
+        )
+
+
+class FlushingQueueListener(logging.handlers.QueueListener):
+    """A `QueueListener` whose `stop` waits for room in a full queue rather
+    than raising, so every record logged before it is still written -- and
+    that can be stopped more than once."""
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            super().stop()
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)  # type: ignore[attr-defined]
+
+
+def configure_logging(
+    logger: logging.Logger | None = None,
+) -> logging.handlers.QueueListener:
+    """Write logs to a rotating file (always) and to plain stdout (only when
+    stdout isn't a TTY -- an interactive command builds its own Textual log
+    handler instead, once it knows it's actually running one).
+
+    Neither is attached to `logger` directly: it gets a `DroppingQueueHandler`,
+    and the returned listener's own thread does the writing (and rotating),
+    so a `logger.info` in a notification callback or request handler costs
+    its thread only an enqueue. The listener is stopped -- the queue flushed
+    -- at exit."""
     if logger is None:
         logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
     formatter = logging.Formatter(LOG_FORMAT)
+    handlers: list[logging.Handler] = []
 
     file_handler = logging.handlers.RotatingFileHandler(
         get_log_path(), maxBytes=MAX_LOG_BYTES, backupCount=LOG_BACKUP_COUNT
     )
     file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    handlers.append(file_handler)
 
     if not sys.stdout.isatty():
         stream_handler = logging.StreamHandler(sys.stdout)
         stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
+        handlers.append(stream_handler)
+
+    log_queue: queue.Queue[logging.LogRecord] = queue.Queue(LOG_QUEUE_SIZE)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    listener = FlushingQueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    return listener
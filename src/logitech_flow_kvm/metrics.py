@@ -0,0 +1,232 @@
+"""Counters and histograms cheap enough to update on every HID++ request and
+every published event, rendered in the Prometheus text exposition format
+for `flow-server`'s `/metrics`.
+
+Metrics are defined at module level next to the code that updates them, and
+register themselves with `REGISTRY` as they are -- the same shape as
+`prometheus_client`, kept to the little this needs. Each labelled series
+has its own lock, held only for the handful of additions an update makes,
+so updates from different threads (or to different receivers) never wait
+on each other and a scrape never blocks an update for longer than it takes
+to copy a few numbers.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import Iterable
+from collections.abc import Iterator
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Every metric name starts with this.
+PREFIX = "logitech_flow_kvm_"
+
+# Suited to HID++ round trips: a few ms over USB, up to the 2s timeout.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2)
+
+_Sample = tuple[str, Iterable[tuple[str, str]], float]
+_V = TypeVar("_V")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f"{{{pairs}}}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_family(
+    name: str,
+    kind: str,
+    documentation: str,
+    samples: Iterable[_Sample],
+) -> str:
+    """One metric family: its `HELP` and `TYPE` lines, then a line per
+    `(suffix, labels, value)` sample."""
+    lines = [f"# HELP {name} {_escape(documentation)}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: list[_Metric[Any]] = []
+
+    def register(self, metric: _Metric[Any]) -> None:
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = Registry()
+
+
+class _Metric(ABC, Generic[_V]):
+    kind: str
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        registry: Registry | None = REGISTRY,
+    ) -> None:
+        self.name = PREFIX + name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], _V] = {}
+        if not labelnames:
+            # Rendered (as zero) even before its first update.
+            self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    @abstractmethod
+    def _new_child(self) -> _V: ...
+
+    def labels(self, *labelvalues: str) -> _V:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} takes labels {self.labelnames}, got {labelvalues}"
+            )
+        # Unlocked fast path: after the first update, a series' child is
+        # only ever looked up.
+        child = self._children.get(labelvalues)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(labelvalues, self._new_child())
+        return child
+
+    def _series(self) -> list[tuple[tuple[tuple[str, str], ...], _V]]:
+        with self._lock:
+            children = list(self._children.items())
+        return [
+            (tuple(zip(self.labelnames, labelvalues, strict=True)), child)
+            for labelvalues, child in sorted(children, key=lambda item: item[0])
+        ]
+
+    @abstractmethod
+    def _samples(self) -> Iterator[_Sample]: ...
+
+    def render(self) -> str:
+        return format_family(self.name, self.kind, self.documentation, self._samples())
+
+
+class _CounterValue:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Counter(_Metric[_CounterValue]):
+    """A total that only goes up, e.g. requests made."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def _samples(self) -> Iterator[_Sample]:
+        for labels, child in self._series():
+            yield "_total", labels, child.value
+
+
+class _HistogramValue:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self._buckets = buckets
+        # Per bucket, not yet cumulative -- that's done when rendering, so
+        # an observation only ever touches one bucket.
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def snapshot(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class Histogram(_Metric[_HistogramValue]):
+    """A distribution of observed values, e.g. how long requests took."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        registry: Registry | None = REGISTRY,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _samples(self) -> Iterator[_Sample]:
+        for labels, child in self._series():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts, strict=True):
+                cumulative += count
+                yield "_bucket", (*labels, ("le", _format_value(bound))), cumulative
+            yield "_sum", labels, total
+            yield "_count", labels, cumulative
@@ -0,0 +1,281 @@
+"""A LAN fast path for leader-host changes: flow-server's `--multicast`.
+
+Every leader arrival is also announced as a UDP datagram to a multicast
+group, so peers on the same network can move their followers as soon as it
+lands -- well under a millisecond after it's sent, rather than after the
+report has reached the server over HTTPS and come back out over every
+client's `/events` stream. SSE remains the authoritative, reliable path:
+what's heard here is applied provisionally, and whatever the server says
+next replaces it. Multicast may lose, duplicate or reorder datagrams
+freely; nothing depends on any one of them arriving.
+
+Each datagram carries the announcing host, the sender's session and a
+sequence number (so the redundant copies of one announcement, and replays
+of it, are dropped), and the leader-host version the sender held when it
+saw the leader arrive: a datagram from before the latest change a receiver
+has heard of is stale. It's authenticated by an HMAC keyed from a secret
+the server generates and hands only to paired clients, with their
+configuration.
+"""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import hmac
+import itertools
+import logging
+import os
+import secrets
+import socket
+import struct
+import threading
+import time
+from collections.abc import Callable
+from typing import NamedTuple
+
+from . import constants
+from .metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# Organization-local scope (RFC 2365), so routers at the edge of the site
+# don't forward it -- and with a TTL of 1, nothing does.
+DEFAULT_GROUP = "239.255.70.76"
+DEFAULT_PORT = constants.DEFAULT_PORT
+TTL = 1
+
+# Each announcement is sent this many times, this far apart: a datagram
+# lost to a momentarily full buffer rarely takes its copies with it.
+REDUNDANCY = 3
+RESEND_INTERVAL = 0.005
+
+SESSION_SIZE = 16
+MAGIC = b"LFKM"
+# Magic, host, sender session, sequence, and base version; then the HMAC.
+_HEADER = struct.Struct("!4sB16sQQ")
+_DIGEST = hashlib.sha256
+DIGEST_SIZE = _DIGEST().digest_size
+DATAGRAM_SIZE = _HEADER.size + DIGEST_SIZE
+_KEY_CONTEXT = b"logitech-flow-kvm leader-host multicast"
+
+# Senders whose last sequence is remembered; the oldest is forgotten first.
+MAX_SESSIONS = 64
+# How often the receiving thread checks whether it's been stopped.
+POLL_INTERVAL = 0.5
+
+DATAGRAMS = Counter(
+    "multicast_datagrams",
+    "Multicast datagrams received, by result: accepted, duplicate (a "
+    "redundant copy or a replay), or rejected (failed authentication).",
+    ("result",),
+)
+# Counted by flow-client, which logs it (see its `fast_path_summary`) -- so
+# not registered: the server's /metrics would only ever show it as zero.
+FAST_PATH = Counter(
+    "multicast_fast_path",
+    "Leader-host changes to another host, by which path brought them here "
+    "first: multicast, or the server's /events stream (sse).",
+    ("winner",),
+    registry=None,
+)
+
+
+class Announcement(NamedTuple):
+    host: int
+    session: bytes
+    sequence: int
+    # The leader-host version the sender held when it saw the leader
+    # arrive (see `sse.EventBroadcaster`).
+    base_version: int
+
+
+def generate_secret() -> str:
+    return secrets.token_hex(32)
+
+
+def derive_key(secret: str) -> bytes:
+    """The HMAC key for datagrams, from the (hex) shared `secret` -- never
+    used for anything else, as it's handed out with every client's
+    configuration."""
+    return hmac.new(bytes.fromhex(secret), _KEY_CONTEXT, _DIGEST).digest()
+
+
+def encode(announcement: Announcement, key: bytes) -> bytes:
+    header = _HEADER.pack(MAGIC, *announcement)
+    return header + hmac.new(key, header, _DIGEST).digest()
+
+
+def decode(datagram: bytes, key: bytes) -> Announcement | None:
+    """The announcement in `datagram`, or `None` if it isn't one, or wasn't
+    signed with `key`."""
+    if len(datagram) != DATAGRAM_SIZE:
+        return None
+    header, digest = datagram[: _HEADER.size], datagram[_HEADER.size :]
+    if not hmac.compare_digest(digest, hmac.new(key, header, _DIGEST).digest()):
+        return None
+    magic, *fields = _HEADER.unpack(header)
+    if magic != MAGIC:
+        return None
+    return Announcement(*fields)
+
+
+class MulticastChannel:
+    """Announcements to, and from, every peer in `group`:`port` holding
+    `secret`, sent and received on the interface with address `interface`
+    (the system's choice, by default)."""
+
+    def __init__(
+        self,
+        secret: str,
+        *,
+        group: str = DEFAULT_GROUP,
+        port: int = DEFAULT_PORT,
+        interface: str = "0.0.0.0",
+        redundancy: int = REDUNDANCY,
+        resend_interval: float = RESEND_INTERVAL,
+    ):
+        self.secret = secret
+        self.group = group
+        self.port = port
+        self.interface = interface
+        self.redundancy = redundancy
+        self.resend_interval = resend_interval
+        self._key = derive_key(secret)
+
+        self.session = os.urandom(SESSION_SIZE)
+        self._sequence = itertools.count(1)
+        self._last_sequences: collections.OrderedDict[bytes, int] = (
+            collections.OrderedDict()
+        )
+        self._stop_event = threading.Event()
+        self._receiver: socket.socket | None = None
+        self._sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, TTL)
+        # Peers may well be on this same machine.
+        self._sender.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        if interface != "0.0.0.0":
+            self._sender.setsockopt(
+                socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface)
+            )
+
+    @classmethod
+    def from_configuration(
+        cls, configuration: dict, *, interface: str = "0.0.0.0"
+    ) -> MulticastChannel:
+        """The channel described by the server's `configuration()`."""
+        return cls(
+            configuration["secret"],
+            group=configuration["group"],
+            port=int(configuration["port"]),
+            interface=interface,
+        )
+
+    def configuration(self) -> dict[str, object]:
+        """What a client needs to join this channel, for its configuration."""
+        return {"group": self.group, "port": self.port, "secret": self.secret}
+
+    def announce(self, host: int, base_version: int) -> Announcement:
+        """Tell every peer the leader just arrived at `host`, having been
+        at the leader host of `base_version` before. The first copy is sent
+        before this returns; the rest follow from a background thread."""
+        announcement = Announcement(
+            host, self.session, next(self._sequence), base_version
+        )
+        datagram = encode(announcement, self._key)
+        self._send(datagram)
+        if self.redundancy > 1:
+            threading.Thread(
+                target=self._resend,
+                args=(datagram, self.redundancy - 1),
+                name="multicast-resend",
+                daemon=True,
+            ).start()
+        return announcement
+
+    def _send(self, datagram: bytes) -> None:
+        try:
+            self._sender.sendto(datagram, (self.group, self.port))
+        except OSError as e:
+            # No route to the group, say -- SSE will get it there anyway.
+            logger.debug("Could not send multicast announcement: %s", e)
+
+    def _resend(self, datagram: bytes, copies: int) -> None:
+        for _ in range(copies):
+            time.sleep(self.resend_interval)
+            self._send(datagram)
+
+    def listen(self, callback: Callable[[Announcement], None]) -> threading.Thread:
+        """Join the group and call `callback` with each other peer's
+        announcements, once apiece, from a thread of its own. With `port`
+        0, an unused one is chosen and `port` updated to it."""
+        self._receiver = self._join()
+        self.port = self._receiver.getsockname()[1]
+        thread = threading.Thread(
+            target=self._receive,
+            args=(self._receiver, callback),
+            name="multicast",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _join(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        # Every flow-client and flow-server on this machine binds the port.
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("", self.port))
+        sock.setsockopt(
+            socket.IPPROTO_IP,
+            socket.IP_ADD_MEMBERSHIP,
+            struct.pack(
+                "4s4s", socket.inet_aton(self.group), socket.inet_aton(self.interface)
+            ),
+        )
+        sock.settimeout(POLL_INTERVAL)
+        return sock
+
+    def _receive(
+        self, sock: socket.socket, callback: Callable[[Announcement], None]
+    ) -> None:
+        with sock:
+            while not self._stop_event.is_set():
+                try:
+                    datagram, _ = sock.recvfrom(DATAGRAM_SIZE + 1)
+                except TimeoutError:
+                    continue
+                except OSError as e:
+                    logger.warning("Stopped receiving multicast: %s", e)
+                    return
+                announcement = self._accept(datagram)
+                if announcement is None:
+                    continue
+                try:
+                    callback(announcement)
+                except Exception:
+                    logger.exception("Could not apply multicast announcement")
+
+    def _accept(self, datagram: bytes) -> Announcement | None:
+        announcement = decode(datagram, self._key)
+        if announcement is None:
+            DATAGRAMS.labels("rejected").inc()
+            return None
+        if announcement.session == self.session:
+            return None  # our own, looped back
+        last = self._last_sequences.get(announcement.session)
+        if last is not None and announcement.sequence <= last:
+            DATAGRAMS.labels("duplicate").inc()
+            return None
+        self._last_sequences[announcement.session] = announcement.sequence
+        self._last_sequences.move_to_end(announcement.session)
+        while len(self._last_sequences) > MAX_SESSIONS:
+            self._last_sequences.popitem(last=False)
+        DATAGRAMS.labels("accepted").inc()
+        return announcement
+
+    def close(self) -> None:
+        """Stop listening -- within `POLL_INTERVAL` -- and sending."""
+        self._stop_event.set()
+        self._sender.close()
@@ -9,10 +9,15 @@ does, replacing the old disconnect-triggered, one-shot "sleep and hope".
 
 from __future__ import annotations
 
+import logging
 import threading
+import time
 from collections.abc import Callable
+from dataclasses import dataclass
 
 from .hidpp import PairedDevice
+from .metrics import Counter
+from .metrics import Histogram
 from .util import change_device_host
 
 # Coarse safety-net interval -- normal operation wakes the loop immediately
@@ -21,6 +26,21 @@ from .util import change_device_host
 # has observed it connecting anywhere yet.
 RECONCILE_INTERVAL = 2.0
 
+# How often `SwitchErrorLog` summarizes a failure that keeps repeating.
+ERROR_SUMMARY_INTERVAL = 300.0
+
+SWITCH_ATTEMPTS = Counter(
+    "reconciler_switch_attempts", "Commands sent telling a follower to switch host."
+)
+SWITCH_FAILURES = Counter(
+    "reconciler_switch_failures", "Switch commands that failed to send."
+)
+CONVERGENCE_SECONDS = Histogram(
+    "reconciler_convergence_seconds",
+    "Time from first telling a follower to switch host to seeing it leave.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
 
 class Reconciler(threading.Thread):
     """Continuously nudges `devices` toward whatever `get_desired_host()` returns.
@@ -40,13 +60,17 @@ class Reconciler(threading.Thread):
         get_desired_host: Callable[[], int | None],
         host_number: int,
         on_error: Callable[[PairedDevice, Exception], None] | None = None,
+        on_success: Callable[[PairedDevice], None] | None = None,
     ):
         super().__init__(daemon=True)
         self._devices = devices
         self._get_desired_host = get_desired_host
         self._host_number = host_number
         self._on_error = on_error
+        self._on_success = on_success
         self._connected: dict[PairedDevice, bool] = dict.fromkeys(devices, False)
+        # When each device still connected here was first told to leave.
+        self._switching_since: dict[PairedDevice, float] = {}
         self._wake = threading.Event()
         self._stop = threading.Event()
 
@@ -55,6 +79,10 @@ class Reconciler(threading.Thread):
         if device not in self._connected:
             return
         self._connected[device] = connected
+        if not connected:
+            started = self._switching_since.pop(device, None)
+            if started is not None:
+                CONVERGENCE_SECONDS.observe(time.monotonic() - started)
         self.poke()
 
     def poke(self) -> None:
@@ -74,13 +102,19 @@ class Reconciler(threading.Thread):
     def reconcile_once(self) -> None:
         desired_host = self._get_desired_host()
         if desired_host is None or desired_host == self._host_number:
+            # Nothing to converge to (any more) -- not a convergence.
+            self._switching_since.clear()
             return
         for device in self._devices:
             if not self._connected[device]:
                 continue
+            if device not in self._switching_since:
+                self._switching_since[device] = time.monotonic()
+            SWITCH_ATTEMPTS.inc()
             try:
                 change_device_host(device, desired_host)
             except Exception as error:
+                SWITCH_FAILURES.inc()
                 # A device can easily be unreachable for the instant this
                 # live HID++ round-trip takes -- e.g. it's already mid-roam
                 # to somewhere else. That's normal, not fatal: the whole
@@ -90,3 +124,96 @@ class Reconciler(threading.Thread):
                 # device, forever) or skip the rest of this tick's devices.
                 if self._on_error is not None:
                     self._on_error(device, error)
+            else:
+                if self._on_success is not None:
+                    self._on_success(device)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+@dataclass
+class _Repeats:
+    first: float
+    last: float
+    last_summary: float
+    total: int = 1
+    since_summary: int = 0
+
+
+class SwitchErrorLog:
+    """Logs a `Reconciler`'s switch failures without logging every retry.
+
+    A device that stays unreachable fails the same way every tick, forever.
+    So per device and error type, only the first failure is logged in full;
+    after that, a summary of how often it repeated every `summary_interval`,
+    and once a switch command goes through, that the device recovered. A
+    failure after a quiet `summary_interval` is logged in full again. Meant
+    to be passed as `on_error`/`on_success`.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        *,
+        summary_interval: float = ERROR_SUMMARY_INTERVAL,
+    ):
+        self._logger = logger
+        self._summary_interval = summary_interval
+        self._lock = threading.Lock()
+        self._repeats: dict[tuple[str, str], _Repeats] = {}
+
+    def failed(self, device: PairedDevice, error: Exception) -> None:
+        key = (device.id, type(error).__name__)
+        now = time.monotonic()
+        with self._lock:
+            repeats = self._repeats.get(key)
+            if repeats is None or now - repeats.last >= self._summary_interval:
+                self._repeats[key] = _Repeats(first=now, last=now, last_summary=now)
+                summary = None
+            else:
+                repeats.last = now
+                repeats.total += 1
+                repeats.since_summary += 1
+                if now - repeats.last_summary < self._summary_interval:
+                    return
+                summary = (repeats.since_summary, now - repeats.last_summary)
+                repeats.last_summary = now
+                repeats.since_summary = 0
+        if summary is None:
+            self._logger.warning(
+                "Could not switch %s to the desired host yet (%s); will retry",
+                device.id,
+                error,
+            )
+        else:
+            count, elapsed = summary
+            self._logger.warning(
+                "Could not switch %s to the desired host yet (%s); "
+                "repeated %d times in %s",
+                device.id,
+                error,
+                count,
+                _format_duration(elapsed),
+            )
+
+    def succeeded(self, device: PairedDevice) -> None:
+        now = time.monotonic()
+        with self._lock:
+            ended = [
+                self._repeats.pop(key)
+                for key in list(self._repeats)
+                if key[0] == device.id
+            ]
+        if ended:
+            self._logger.info(
+                "Switched %s after %d failed attempts over %s",
+                device.id,
+                sum(repeats.total for repeats in ended),
+                _format_duration(now - min(repeats.first for repeats in ended)),
+            )
@@ -0,0 +1,244 @@
+"""Hot-standby flow-servers: a second flow-server (`flow-server --standby-of`)
+that follows the primary's `/events` stream, mirroring its versioned state
+and its token store, so that clients can fail over to it (see flow-client's
+`--standby-server`) and keep switching while the primary is away -- e.g.
+while the machine hosting it reboots.
+
+A standby registers itself with the primary (`PUT /replication/standby`),
+which publishes every registered standby as the `standbys` state key: that
+is how clients learn where else to go, and which certificate to trust there.
+Tokens are mirrored as the primary stores them, hashed, so a client's token
+works unchanged against either server; they're fetched again whenever a
+client connects to the primary, since a newly paired client connects at
+once.
+
+While following the primary, leader-host reports a standby receives are
+forwarded to it, keeping the primary authoritative. Once the primary is
+lost, the standby is simply a server in its own right, serving the state it
+last mirrored; the last report it couldn't forward is handed to the primary
+on reconnecting, before the standby goes back to mirroring, so whatever
+changed in the meantime isn't undone by the primary's older state. Forwarded
+reports are stamped (see `sse.ObservationStamp`) with when the standby
+received them, however late they're forwarded: one that the primary has
+since seen newer reports than is ignored there, not applied.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import logging
+import socket
+import threading
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+import requests
+
+from .sse import KEEPALIVE_INTERVAL
+from .sse import OBSERVATION_HEADER
+from .sse import SNAPSHOT_EVENT
+from .sse import ObservationStamp
+from .sse import SseDecoder
+from .sse import SseEvent
+
+if TYPE_CHECKING:
+    from .commands.flow_server import FlowServerAPI
+
+logger = logging.getLogger(__name__)
+
+# Tokens issued to names starting with this (see `standby_token_name`) are a
+# standby's, and the only ones allowed to use the `/replication` routes.
+STANDBY_NAME_PREFIX = "standby:"
+
+# The state keys a standby mirrors from its primary. Not `clipboard-changed`:
+# each server announces its own host's clipboard.
+REPLICATED_STATE = ("leader-host", "standbys")
+STANDBYS_STATE = "standbys"
+# Announced whenever a client connects to /events -- which a newly paired
+# client does straight away, so it's also when new tokens may have appeared.
+HOST_CONNECTED_EVENT = "host-connected"
+
+# Short: a primary that doesn't answer this quickly is as good as gone.
+CONNECT_TIMEOUT = 1.0
+# A primary that has sent nothing for two keepalives has vanished without
+# closing the connection (a pulled cable, say, rather than a reboot).
+READ_TIMEOUT = 2 * KEEPALIVE_INTERVAL
+
+MIN_BACKOFF = 1.0
+MAX_BACKOFF = 30.0
+
+
+def standby_token_name(address: str) -> str:
+    return f"{STANDBY_NAME_PREFIX}{address}"
+
+
+def is_standby_token_name(name: str) -> bool:
+    return name.startswith(STANDBY_NAME_PREFIX)
+
+
+def local_address_towards(host: str, port: int) -> str:
+    """This machine's address on the route to `host` -- what a standby
+    advertises to clients when not given a hostname. Nothing is sent."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.connect((host, port))
+        return sock.getsockname()[0]
+
+
+class Replicator(threading.Thread):
+    """Follows the primary at `primary_url` on behalf of standby `app`.
+
+    `session` must already carry the standby's `Authorization` (and trust
+    the primary's certificate); `registration` is the standby's own address,
+    port and certificate, as registered with the primary for clients.
+    """
+
+    def __init__(
+        self,
+        app: FlowServerAPI,
+        primary_url: str,
+        session: requests.Session,
+        registration: dict[str, object],
+        *,
+        read_timeout: float = READ_TIMEOUT,
+    ):
+        super().__init__(name="replicator", daemon=True)
+        self.app = app
+        self.primary_url = primary_url.rstrip("/")
+        self.session = session
+        self.registration = registration
+        self.read_timeout = read_timeout
+
+        # Whether the primary's stream is up -- while it is, the primary is
+        # authoritative and reports are forwarded there.
+        self.connected = False
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        # The last leader host reported here that the primary hasn't heard,
+        # when it was observed (by the monotonic clock), and the sequence it's
+        # forwarded under -- the same on every attempt, so the primary can
+        # recognize a repeat.
+        self._unforwarded: tuple[int, float, int] | None = None
+        self._report_session = uuid.uuid4().hex
+        self._report_sequence = itertools.count(1)
+
+    def _url(self, *route_segments: str) -> str:
+        return f"{self.primary_url}/{'/'.join(route_segments)}"
+
+    def run(self) -> None:
+        backoff = MIN_BACKOFF
+        while not self._stop_event.is_set():
+            error: Exception | None = None
+            try:
+                self._forward_unforwarded()
+                with self.session.get(
+                    self._url("events"),
+                    stream=True,
+                    timeout=(CONNECT_TIMEOUT, self.read_timeout),
+                ) as response:
+                    response.raise_for_status()
+                    # Subscribed: anything changing from here on arrives over
+                    # the stream, so these can't miss an update.
+                    self._register()
+                    self._sync_tokens()
+                    self._set_connected(True)
+                    backoff = MIN_BACKOFF
+                    decoder = SseDecoder()
+                    for chunk in response.iter_content(chunk_size=None):
+                        for event in decoder.feed(chunk):
+                            self._handle_event(event)
+                        if self._stop_event.is_set():
+                            return
+            except requests.exceptions.RequestException as e:
+                error = e
+            if self._stop_event.is_set():
+                return
+            self._set_connected(False, error)
+            if self._stop_event.wait(backoff):
+                return
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def stop(self) -> None:
+        """Stop following the primary -- at the latest, once its next
+        keepalive arrives."""
+        self._stop_event.set()
+
+    def _set_connected(self, connected: bool, error: Exception | None = None) -> None:
+        if connected == self.connected:
+            return
+        self.connected = connected
+        if connected:
+            logger.info("Following primary %s", self.primary_url)
+        else:
+            logger.warning(
+                "Lost primary %s (%s); serving as primary until it's back",
+                self.primary_url,
+                error or "stream ended",
+            )
+
+    def _handle_event(self, event: SseEvent) -> None:
+        if event.event == SNAPSHOT_EVENT:
+            for key, entry in json.loads(event.data).items():
+                if key in REPLICATED_STATE:
+                    self.app.mirror_state(key, entry["value"], entry["version"])
+        elif event.event == HOST_CONNECTED_EVENT:
+            self._sync_tokens()
+        elif event.event in REPLICATED_STATE and event.id is not None:
+            self.app.mirror_state(event.event, event.data, int(event.id))
+
+    def _register(self) -> None:
+        response = self.session.put(
+            self._url("replication", "standby"),
+            json=self.registration,
+            timeout=(CONNECT_TIMEOUT, self.read_timeout),
+        )
+        response.raise_for_status()
+
+    def _sync_tokens(self) -> None:
+        response = self.session.get(
+            self._url("replication", "tokens"),
+            timeout=(CONNECT_TIMEOUT, self.read_timeout),
+        )
+        response.raise_for_status()
+        self.app.replace_auth_tokens(
+            {name: bytes.fromhex(digest) for name, digest in response.json().items()}
+        )
+
+    def forward_leader_host(self, host: int, observed: float | None = None) -> bool:
+        """Report `host`, observed at `observed` by the monotonic clock (or
+        just now), to the primary; whether it took it. If it didn't, it's
+        reported on reconnecting instead."""
+        if observed is None:
+            observed = time.monotonic()
+        with self._lock:
+            self._unforwarded = (host, observed, next(self._report_sequence))
+        if not self.connected:
+            return False
+        try:
+            self._forward_unforwarded()
+        except requests.exceptions.RequestException as e:
+            logger.warning("Could not forward leader host to primary: %s", e)
+            return False
+        return True
+
+    def _forward_unforwarded(self) -> None:
+        with self._lock:
+            unforwarded = self._unforwarded
+        if unforwarded is None:
+            return
+        host, observed, sequence = unforwarded
+        stamp = ObservationStamp(
+            self._report_session, sequence, time.monotonic() - observed
+        )
+        response = self.session.put(
+            self._url("leader-host"),
+            data=str(host),
+            headers={OBSERVATION_HEADER: stamp.format()},
+            timeout=(CONNECT_TIMEOUT, CONNECT_TIMEOUT),
+        )
+        response.raise_for_status()
+        with self._lock:
+            # Unless another report arrived meanwhile; that one's next.
+            if self._unforwarded == unforwarded:
+                self._unforwarded = None
@@ -1,28 +1,270 @@
 """Server-Sent Events: encoding/decoding the wire format, and server-side fan-out.
 
 `EventBroadcaster` is the server side of the "Better Guarantees" design: it
-holds the one piece of state clients care about (the leader's current host)
-and fans out changes to every subscribed client, while also handing a brand
-new subscriber the current state as its first message -- atomically, so no
-update landing between "subscribe" and "read current state" can be missed.
+holds the state clients care about (most importantly, the leader's current
+host) and fans out changes to every subscribed client, while also handing a
+brand new subscriber a snapshot of all of it as its first message --
+atomically, so no update landing between "subscribe" and "read current
+state" can be missed.
+
+State is a set of keys, each with a version: the ID of the event that last
+set it. A change goes out as a delta -- an event named after the key, whose
+`id:` is the new version -- so a client can cheaply drop any delta older
+than what it already holds, and rebuild its whole view from one `snapshot`
+event after reconnecting.
+
+Every event is numbered (the SSE `id:` field), and the most recent ones are
+kept in a bounded replay buffer, so a client reconnecting with
+`Last-Event-ID` is handed exactly the events it missed instead of a fresh
+snapshot -- as long as it hasn't fallen further behind than the buffer holds.
 """
 
 from __future__ import annotations
 
+import bisect
+import itertools
+import json
 import queue
 import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import deque
+from collections.abc import Callable
 from collections.abc import Iterable
 from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import NamedTuple
+from typing import Protocol
+from typing import cast
 
-Subscription = "queue.Queue[str]"
+from .metrics import Counter
 
+# How many recent events are kept for replaying to reconnecting subscribers.
+# Events are tiny and rare (one per host switch or guest connection), so this
+# comfortably covers any realistic reconnect gap; a subscriber that fell
+# further behind than this just gets a snapshot instead.
+REPLAY_BUFFER_SIZE = 256
 
-def format_sse(event: str, data: str) -> str:
-    return f"event: {event}\ndata: {data}\n\n"
+# How many undelivered messages each subscriber may have waiting. State
+# events never count against this in a way that loses them (see
+# `SubscriberQueue.put`), so it only bounds how many informational events
+# (e.g. `host-connected`) a stalled subscriber can pile up.
+SUBSCRIBER_QUEUE_SIZE = 64
 
+EVENTS_PUBLISHED = Counter(
+    "sse_events_published", "Events published to /events subscribers.", ("event",)
+)
 
-def parse_sse_stream(lines: Iterable[str | None]) -> Iterator[tuple[str, str]]:
-    """Parse `event`/`data` pairs out of raw SSE lines (e.g. from `iter_lines()`).
+# The event type a full-state snapshot is sent as; see `_Broadcaster._snapshot`.
+SNAPSHOT_EVENT = "snapshot"
+
+# Response header `/events` sets when a `Last-Event-ID` reconnect was
+# satisfied by replaying missed events, rather than by a fresh snapshot.
+RESUMED_HEADER = "X-Event-Stream-Resumed"
+
+# Response header carrying the version a state write was published as (see
+# `EventBroadcaster.set_state`), for a writer to apply its own write with
+# rather than waiting for it to come back over `/events`.
+VERSION_HEADER = "X-State-Version"
+# Alongside it, the value the write left in place: the one written, unless
+# the server already held something observed more recently.
+VALUE_HEADER = "X-State-Value"
+
+# Request header stamping a leader-host report (`PUT /leader-host`,
+# `POST /arrival`) with when, and in what order, its reporter observed it;
+# see `ObservationStamp`.
+OBSERVATION_HEADER = "X-Observation"
+
+
+# How long an /events subscriber's connection can sit idle before we send a
+# keepalive comment -- long enough to be cheap, short enough that a dead TCP
+# connection (the client vanished without a clean close) gets noticed and its
+# queue cleaned up promptly rather than leaking forever.
+KEEPALIVE_INTERVAL = 15.0
+
+
+class ObservationStamp(NamedTuple):
+    """When, and in what order, a reporter observed what it reports.
+
+    Monotonic clocks on different machines can't be compared, so rather than
+    the moment of observation itself this carries `age`: how long before
+    sending the report the reporter observed it, by its own monotonic clock.
+    The server subtracts that from when the report arrived, placing every
+    reporter's observations on its own clock. `sequence` numbers a
+    reporter's reports -- a retried request repeats it -- and `session`
+    names the process numbering them, since the count restarts with it.
+    """
+
+    session: str
+    sequence: int
+    age: float
+
+    def format(self) -> str:
+        return f"{self.session} {self.sequence} {self.age:.6f}"
+
+
+def parse_observation_stamp(value: str | None) -> ObservationStamp | None:
+    if value is None:
+        return None
+    try:
+        session, sequence, age = value.split()
+        return ObservationStamp(session, int(sequence), max(float(age), 0.0))
+    except ValueError:
+        # Not one we understand -- treat the report as observed on arrival.
+        return None
+
+
+def parse_last_event_id(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        # Not one of ours -- treat it like no ID at all (i.e. send a snapshot).
+        return None
+
+
+class StateEntry(NamedTuple):
+    value: str
+    version: int
+
+
+class SseEvent(NamedTuple):
+    event: str
+    data: str
+    # The stream's last event ID as of this event (SSE carries it forward
+    # from the most recent `id:` field, even across events that lack one).
+    id: str | None = None
+
+
+class SubscriberQueue:
+    """A bounded buffer of formatted SSE messages waiting for one subscriber.
+
+    Two kinds of message go through it. State messages (`coalesce=True`,
+    e.g. `leader-host`) are latest-value-wins: a new one replaces any still
+    undelivered message of the same event type, so a flapping leader costs a
+    stalled subscriber one slot, not one per intermediate value. Everything
+    else is informational and simply dropped (and counted) once the buffer
+    is full. A slow subscriber can therefore never grow without bound, and
+    never has the current state stuck behind a backlog of stale values.
+
+    `get`/`get_nowait`/`empty` mirror `queue.Queue`, including raising
+    `queue.Empty`.
+    """
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._not_empty = threading.Condition(threading.Lock())
+        # (event type, formatted message, coalesce)
+        self._messages: deque[tuple[str, str, bool]] = deque()
+        # Informational messages discarded because the buffer was full.
+        self.dropped = 0
+        # State messages superseded by a newer one before being delivered.
+        self.coalesced = 0
+
+    def put(self, event: str, message: str, *, coalesce: bool = False) -> None:
+        with self._not_empty:
+            if coalesce:
+                for index, (pending_event, _, pending_coalesce) in enumerate(
+                    self._messages
+                ):
+                    if pending_coalesce and pending_event == event:
+                        del self._messages[index]
+                        self.coalesced += 1
+                        break
+            if len(self._messages) >= self.maxsize:
+                if not coalesce:
+                    self.dropped += 1
+                    return
+                # State must get through: make room by evicting the oldest
+                # informational message instead.
+                self._evict_oldest_informational()
+            self._messages.append((event, message, coalesce))
+            self._not_empty.notify()
+
+    def _evict_oldest_informational(self) -> None:
+        for index, (_, _, pending_coalesce) in enumerate(self._messages):
+            if not pending_coalesce:
+                del self._messages[index]
+                self.dropped += 1
+                return
+
+    def get(self, timeout: float | None = None) -> str:
+        with self._not_empty:
+            if not self._not_empty.wait_for(lambda: self._messages, timeout):
+                raise queue.Empty
+            return self._messages.popleft()[1]
+
+    def get_nowait(self) -> str:
+        with self._not_empty:
+            if not self._messages:
+                raise queue.Empty
+            return self._messages.popleft()[1]
+
+    def empty(self) -> bool:
+        return not self._messages
+
+    def qsize(self) -> int:
+        return len(self._messages)
+
+
+class Subscriber(Protocol):
+    """What `/events` reads one subscriber's messages from: either a
+    `SubscriberQueue` (`EventBroadcaster`) or a `LogCursor`
+    (`SequencedEventBroadcaster`)."""
+
+    dropped: int
+    coalesced: int
+
+    def get(self, timeout: float | None = None) -> str: ...
+
+    def get_nowait(self) -> str: ...
+
+    def empty(self) -> bool: ...
+
+    def qsize(self) -> int: ...
+
+
+@dataclass(frozen=True)
+class BroadcastStats:
+    subscribers: int
+    # Messages currently waiting, summed across every subscriber.
+    queued: int
+    # Lifetime totals, including subscribers that have since disconnected.
+    dropped: int
+    coalesced: int
+
+
+class Subscription(NamedTuple):
+    queue: Subscriber
+    # Already-formatted messages to send before anything from `queue`: the
+    # missed events when resuming, otherwise a snapshot of the current state.
+    initial: list[str]
+    resumed: bool
+
+
+class _LogEntry(NamedTuple):
+    id: int
+    event: str
+    message: str
+    exclude: Subscriber | None
+    # The name `exclude` subscribed under, if any: it's a new subscriber
+    # that resumes, so replays (see `_Broadcaster._events_since`) go by
+    # name instead.
+    exclude_name: str | None = None
+
+
+def _entry_id(entry: _LogEntry) -> int:
+    return entry.id
+
+
+def format_sse(event: str, data: str, id: int | None = None) -> str:
+    if id is None:
+        return f"event: {event}\ndata: {data}\n\n"
+    return f"id: {id}\nevent: {event}\ndata: {data}\n\n"
+
+
+def parse_sse_events(lines: Iterable[str | None]) -> Iterator[SseEvent]:
+    """Parse events out of raw SSE lines (e.g. from `iter_lines()`).
 
     Comment lines (leading `:`, used for keepalives) are skipped. A `data`
     field with no preceding `event` field defaults to the SSE-standard type
@@ -30,12 +272,13 @@ def parse_sse_stream(lines: Iterable[str | None]) -> Iterator[tuple[str, str]]:
     """
     event_type = "message"
     data_lines: list[str] = []
+    last_event_id: str | None = None
     for line in lines:
         if line is None:
             continue
         if line == "":
             if data_lines:
-                yield event_type, "\n".join(data_lines)
+                yield SseEvent(event_type, "\n".join(data_lines), last_event_id)
             event_type = "message"
             data_lines = []
             continue
@@ -48,25 +291,171 @@ def parse_sse_stream(lines: Iterable[str | None]) -> Iterator[tuple[str, str]]:
             event_type = value
         elif field == "data":
             data_lines.append(value)
+        elif field == "id" and "\0" not in value:
+            last_event_id = value
     if data_lines:
-        yield event_type, "\n".join(data_lines)
+        yield SseEvent(event_type, "\n".join(data_lines), last_event_id)
 
 
-class EventBroadcaster:
-    """Tracks one piece of broadcast state and fans out events to subscribers."""
+def parse_sse_stream(lines: Iterable[str | None]) -> Iterator[tuple[str, str]]:
+    """Like `parse_sse_events`, but yielding bare `(event, data)` pairs."""
+    for event in parse_sse_events(lines):
+        yield event.event, event.data
+
+
+class SseDecoder:
+    """Incremental SSE parser working directly on raw byte chunks (e.g. from
+    `Response.iter_content()`), however the stream happens to be split.
+
+    Lines may end in LF, CR or CRLF -- including a CRLF split across two
+    chunks; they're normalized to LF up front with `bytes.replace`. From
+    there, nothing is looked at until a whole event (up to its terminating
+    blank line) has arrived: the incomplete tail stays buffered as bytes,
+    complete events are split off in one pass, and each event's data is
+    decoded once, when it's dispatched. `last_event_id` and `retry` (the
+    server's requested reconnection delay, in milliseconds) persist across
+    events, per the SSE spec.
+    """
 
     def __init__(self) -> None:
+        self._buffer = b""
+        # The previous chunk ended in CR, so a leading LF here is the second
+        # half of that CRLF, not an (empty) line of its own.
+        self._skip_lf = False
+        self._started = False
+        self.last_event_id: str | None = None
+        self.retry: int | None = None
+
+    def feed(self, chunk: bytes) -> list[SseEvent]:
+        if self._skip_lf and chunk[:1] == b"\n":
+            chunk = chunk[1:]
+        self._skip_lf = False
+        if b"\r" in chunk:
+            self._skip_lf = chunk[-1:] == b"\r"
+            chunk = chunk.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+        if not self._started and chunk:
+            self._started = True
+            if chunk.startswith(b"\xef\xbb\xbf"):
+                chunk = chunk[3:]
+
+        buffer = self._buffer + chunk if self._buffer else chunk
+        end = buffer.rfind(b"\n\n")
+        if end == -1:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[end + 2 :]
+
+        events: list[SseEvent] = []
+        for block in buffer[:end].split(b"\n\n"):
+            self._parse_block(block, events)
+        return events
+
+    def _parse_block(self, block: bytes, events: list[SseEvent]) -> None:
+        event_type = b""
+        data: list[bytes] = []
+        for line in block.split(b"\n"):
+            if not line:
+                # A blank line inside a block -- i.e. more than one blank
+                # line in a row -- still ends whatever came before it.
+                if data:
+                    events.append(self._dispatch(event_type, data))
+                event_type = b""
+                data = []
+                continue
+            field, _, value = line.partition(b":")
+            if value[:1] == b" ":
+                value = value[1:]
+            if field == b"data":
+                data.append(value)
+            elif field == b"event":
+                event_type = value
+            elif field == b"id":
+                if b"\0" not in value:
+                    self.last_event_id = value.decode("utf-8", "replace")
+            elif field == b"retry":
+                if value.isdigit():
+                    self.retry = int(value)
+            # Anything else -- including comments, whose field name is
+            # empty -- is ignored.
+        if data:
+            events.append(self._dispatch(event_type, data))
+
+    def _dispatch(self, event_type: bytes, data: list[bytes]) -> SseEvent:
+        return SseEvent(
+            event_type.decode("utf-8", "replace") or "message",
+            (data[0] if len(data) == 1 else b"\n".join(data)).decode(
+                "utf-8", "replace"
+            ),
+            self.last_event_id,
+        )
+
+
+class _Broadcaster(ABC):
+    """Everything about tracking state, numbering events and replaying them
+    that doesn't depend on how events then reach each subscriber -- see
+    `EventBroadcaster` and `SequencedEventBroadcaster` for the two ways
+    they can."""
+
+    def __init__(self, replay_buffer_size: int = REPLAY_BUFFER_SIZE) -> None:
         self._lock = threading.Lock()
-        self._subscribers: list[queue.Queue[str]] = []
+        self._subscribers: list[Subscriber] = []
         # Which host each subscriber connected as, when known -- not every
-        # queue.Queue[str] key is guaranteed a name (subscribe()'s `name` is
-        # optional), so this is a lookup, not a parallel list.
-        self._subscriber_names: dict[queue.Queue[str], str] = {}
-        self._state: str | None = None
+        # subscriber is guaranteed a name (subscribe()'s `name` is optional),
+        # so this is a lookup, not a parallel list.
+        self._subscriber_names: dict[Subscriber, str] = {}
+        # Counters carried over from subscribers that have since gone away,
+        # so `stats` totals don't shrink when a subscriber disconnects.
+        self._departed_dropped = 0
+        self._departed_coalesced = 0
+        self._state: dict[str, StateEntry] = {}
+        # IDs start from the current time (in ms) rather than from zero, so
+        # the IDs a previous server process handed out are always older than
+        # anything this one can replay -- a client reconnecting across a
+        # restart gets a snapshot, never someone else's events.
+        self._last_id = time.time_ns() // 1_000_000
+        self._history: deque[_LogEntry] = deque(maxlen=replay_buffer_size)
+        # IDs aren't contiguous (see `restore_state`), so what can still be
+        # replayed is tracked directly: every event after this ID is in
+        # `_history`. And how many events have been published, for counting
+        # how far behind a reader is.
+        self._evicted_id = self._last_id
+        self._published = 0
+        self._listeners: list[Callable[[], None]] = []
+
+    @property
+    def state(self) -> dict[str, StateEntry]:
+        with self._lock:
+            return dict(self._state)
+
+    def get_state(self, key: str) -> str | None:
+        entry = self._state.get(key)
+        return entry.value if entry is not None else None
+
+    @property
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    @property
+    def stats(self) -> BroadcastStats:
+        with self._lock:
+            return BroadcastStats(
+                subscribers=len(self._subscribers),
+                queued=sum(q.qsize() for q in self._subscribers),
+                dropped=self._departed_dropped
+                + sum(q.dropped for q in self._subscribers),
+                coalesced=self._departed_coalesced
+                + sum(q.coalesced for q in self._subscribers),
+            )
 
     @property
-    def state(self) -> str | None:
-        return self._state
+    def queue_depths(self) -> dict[str, int]:
+        """How many messages are waiting for each named subscriber (summed,
+        for a host connected more than once)."""
+        depths: dict[str, int] = {}
+        with self._lock:
+            for q, name in self._subscriber_names.items():
+                depths[name] = depths.get(name, 0) + q.qsize()
+        return depths
 
     @property
     def subscriber_names(self) -> list[str]:
@@ -79,40 +468,250 @@ class EventBroadcaster:
                 if q in self._subscriber_names
             ]
 
-    def subscribe(self, name: str | None = None) -> tuple[queue.Queue[str], str | None]:
-        """Register a new subscriber and atomically read the current state.
+    def subscribe(
+        self, name: str | None = None, last_event_id: int | None = None
+    ) -> Subscription:
+        """Register a new subscriber and atomically read what it must be sent
+        first.
+
+        Registering and reading under the same lock `broadcast` numbers and
+        delivers events under is what makes this atomic: every event either
+        landed before (and is covered by the returned `initial` messages) or
+        lands after (and this subscriber is already in `_subscribers`, so it
+        receives it as a normal message). Either way, nothing that happens in
+        between can be missed -- or delivered twice.
 
-        Registering before reading is what makes this atomic: a concurrent
-        `set_state`/`broadcast` either finishes first (and shows up in the
-        `current` value returned here) or starts after (and this subscriber
-        is already in `_subscribers`, so it receives it as a normal message).
-        Either way, nothing that happens in between can be missed.
+        With a `last_event_id` still covered by the replay buffer, `initial`
+        is every event after it; otherwise it's a single snapshot of every
+        state key (see `_snapshot`).
         """
-        q: queue.Queue[str] = queue.Queue()
         with self._lock:
+            q = self._new_subscriber()
             self._subscribers.append(q)
             if name is not None:
                 self._subscriber_names[q] = name
-            current = self._state
-        return q, current
+            missed = self._events_since(last_event_id, name)
+            if missed is not None:
+                return Subscription(q, missed, resumed=True)
+            return Subscription(q, [self._snapshot()], resumed=False)
+
+    def _events_since(
+        self, last_event_id: int | None, name: str | None = None
+    ) -> list[str] | None:
+        """Every buffered event after `last_event_id`, or None if that isn't
+        knowable -- no ID given, an ID from before the oldest buffered event
+        (fell off the ring), or one this broadcaster never issued (e.g. from
+        before a server restart).
+
+        Events that were kept from a subscriber named `name` aren't replayed
+        either: the one resuming is presumably that same host, reconnecting,
+        and shouldn't be sent its own announcements."""
+        if last_event_id is None or last_event_id < self._evicted_id:
+            return None
+        index = bisect.bisect_right(self._history, last_event_id, key=_entry_id)
+        # Only an ID issued here: IDs can jump (see `restore_state`), and
+        # one from inside a jump or past the newest is someone else's.
+        if last_event_id != self._evicted_id and (
+            index == 0 or self._history[index - 1].id != last_event_id
+        ):
+            return None
+        return [
+            entry.message
+            for entry in itertools.islice(self._history, index, None)
+            if name is None or entry.exclude_name != name
+        ]
 
-    def unsubscribe(self, q: queue.Queue[str]) -> None:
+    def _snapshot(self) -> str:
+        """The full state as one `snapshot` event: a JSON object mapping each
+        key to its `value` and `version`. Sent even when there's no state yet,
+        so a client always knows its previous view has been replaced."""
+        data = json.dumps(
+            {
+                key: {"value": entry.value, "version": entry.version}
+                for key, entry in self._state.items()
+            }
+        )
+        return format_sse(SNAPSHOT_EVENT, data, id=self._last_id)
+
+    def unsubscribe(self, q: Subscriber) -> None:
         with self._lock:
             if q in self._subscribers:
                 self._subscribers.remove(q)
+                self._departed_dropped += q.dropped
+                self._departed_coalesced += q.coalesced
             self._subscriber_names.pop(q, None)
 
-    def set_state(self, event: str, data: str) -> None:
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call `callback()` after every event is published, e.g. to wake an
+        event loop whose subscribers can't block on `get()`.
+
+        It's called with the broadcaster's lock held, so it must be quick and
+        must not call back into the broadcaster -- `loop.call_soon_threadsafe`
+        is the intended use.
+        """
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def set_state(self, key: str, value: str) -> int:
+        """Set `key` to `value` and broadcast it as a delta; returns the new
+        version."""
+        with self._lock:
+            self._publish(key, value, exclude=None, coalesce=True)
+            self._state[key] = StateEntry(value, self._last_id)
+            return self._last_id
+
+    def restore_state(self, key: str, value: str, version: int) -> int:
+        """Set `key` to `value` as a previous server process last held it, at
+        `version`; returns the new version.
+
+        Every event ID from here on is numbered past `version`, so even with
+        the clock having gone backwards since (see `_last_id`), nothing this
+        process sends can look older than what the last one did.
+        """
         with self._lock:
-            self._state = data
-        self.broadcast(event, data)
+            self._last_id = max(self._last_id, version)
+            self._publish(key, value, exclude=None, coalesce=True)
+            self._state[key] = StateEntry(value, self._last_id)
+            return self._last_id
 
     def broadcast(
-        self, event: str, data: str, *, exclude: queue.Queue[str] | None = None
+        self, event: str, data: str, *, exclude: Subscriber | None = None
     ) -> None:
-        message = format_sse(event, data)
         with self._lock:
-            subscribers = list(self._subscribers)
-        for subscriber in subscribers:
-            if subscriber is not exclude:
-                subscriber.put(message)
+            self._publish(event, data, exclude=exclude, coalesce=False)
+
+    def _publish(
+        self, event: str, data: str, *, exclude: Subscriber | None, coalesce: bool
+    ) -> None:
+        # Called with `_lock` held, so event IDs, the replay buffer and every
+        # subscriber all see events in the same order.
+        self._last_id += 1
+        self._published += 1
+        entry = _LogEntry(
+            self._last_id,
+            event,
+            format_sse(event, data, id=self._last_id),
+            exclude,
+            self._subscriber_names.get(exclude) if exclude is not None else None,
+        )
+        if len(self._history) == self._history.maxlen:
+            self._evicted_id = self._history[0].id
+        self._history.append(entry)
+        self._deliver(entry, coalesce=coalesce)
+        EVENTS_PUBLISHED.labels(event).inc()
+        for callback in self._listeners:
+            callback()
+
+    @abstractmethod
+    def _new_subscriber(self) -> Subscriber: ...
+
+    @abstractmethod
+    def _deliver(self, entry: _LogEntry, *, coalesce: bool) -> None: ...
+
+
+class EventBroadcaster(_Broadcaster):
+    """Tracks broadcast state and fans out events to subscribers, copying
+    each event into every subscriber's own `SubscriberQueue`."""
+
+    def _new_subscriber(self) -> SubscriberQueue:
+        return SubscriberQueue()
+
+    def _deliver(self, entry: _LogEntry, *, coalesce: bool) -> None:
+        for subscriber in cast("list[SubscriberQueue]", self._subscribers):
+            if subscriber is not entry.exclude:
+                subscriber.put(entry.event, entry.message, coalesce=coalesce)
+
+
+class LogCursor:
+    """One subscriber's read position in a `SequencedEventBroadcaster`'s log.
+
+    Holds nothing but the ID of the last event it has handed out (and how
+    many events had been published by then): messages are read straight out
+    of the shared log, never copied per subscriber.
+    """
+
+    def __init__(
+        self, log: SequencedEventBroadcaster, position: int, published: int
+    ) -> None:
+        self._log = log
+        self.position = position
+        self.published = published
+        # Events skipped because this cursor fell behind the start of the
+        # log (it jumps to a snapshot instead -- see `_next_message`).
+        self.dropped = 0
+        # Never anything to coalesce: a lagging cursor costs no memory.
+        self.coalesced = 0
+
+    def get(self, timeout: float | None = None) -> str:
+        return self._log._read(self, timeout)
+
+    def get_nowait(self) -> str:
+        return self._log._read(self, 0)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def qsize(self) -> int:
+        return self._log._published - self.published
+
+
+class SequencedEventBroadcaster(_Broadcaster):
+    """Alternative to `EventBroadcaster`: one shared, append-only log of
+    events (the same ring that serves `Last-Event-ID` replays), with each
+    subscriber just a `LogCursor` into it.
+
+    Publishing is one append plus one `Condition.notify_all`, with no
+    per-subscriber copy or queue operation -- though `notify_all` itself
+    still releases each *waiting* subscriber thread's wakeup lock, so waking
+    N blocked readers is inherently N cheap operations. A cursor that falls
+    behind the start of the log skips straight to a snapshot of the current
+    state, so slow readers never cost memory either.
+
+    flow-server doesn't use it: it's kept for comparison, in
+    `benchmarks/sse_fanout.py`.
+    """
+
+    def __init__(self, replay_buffer_size: int = REPLAY_BUFFER_SIZE) -> None:
+        super().__init__(replay_buffer_size)
+        self._changed = threading.Condition(self._lock)
+
+    def _new_subscriber(self) -> LogCursor:
+        return LogCursor(self, self._last_id, self._published)
+
+    def _deliver(self, entry: _LogEntry, *, coalesce: bool) -> None:
+        self._changed.notify_all()
+
+    def _read(self, cursor: LogCursor, timeout: float | None) -> str:
+        message: str | None = None
+
+        def ready() -> bool:
+            nonlocal message
+            message = self._next_message(cursor)
+            return message is not None
+
+        with self._changed:
+            if not self._changed.wait_for(ready, timeout) or message is None:
+                raise queue.Empty
+            return message
+
+    def _next_message(self, cursor: LogCursor) -> str | None:
+        # Called with `_lock` held.
+        if cursor.position < self._evicted_id:
+            cursor.dropped += self._published - cursor.published
+            cursor.position = self._last_id
+            cursor.published = self._published
+            return self._snapshot()
+        # By ID, not by offset from the oldest: IDs can jump (see
+        # `restore_state`).
+        index = bisect.bisect_right(self._history, cursor.position, key=_entry_id)
+        for entry in itertools.islice(self._history, index, None):
+            cursor.position = entry.id
+            cursor.published += 1
+            if entry.exclude is not cursor:
+                return entry.message
+        return None
@@ -0,0 +1,117 @@
+"""Wall-clock timing of flow-server's startup, phase by phase.
+
+Startup runs its independent phases -- finding devices, checking (or
+generating) the certificate, opening the token database -- concurrently,
+so what matters is when each started and finished relative to the others,
+not just how long each took. `StartupProfile` records exactly that, plus
+milestones such as the first client's `/events` connection being accepted:
+how long after launch this host was actually of use to anyone.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import threading
+import time
+from collections.abc import Callable
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import TypeVar
+
+_T = TypeVar("_T")
+
+
+@dataclass(frozen=True)
+class Phase:
+    name: str
+    # Seconds since the profile was created.
+    started: float
+    duration: float
+    thread: str
+
+    @property
+    def finished(self) -> float:
+        return self.started + self.duration
+
+
+class StartupProfile:
+    """Phases and milestones of one startup, recorded from any thread.
+
+    `verbose` (flow-server's `--startup-profile`) logs the full report rather
+    than a one-line summary.
+    """
+
+    def __init__(self, *, verbose: bool = False):
+        self.verbose = verbose
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self.phases: list[Phase] = []
+        self.milestones: dict[str, float] = {}
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = self.elapsed()
+        try:
+            yield
+        finally:
+            phase = Phase(
+                name=name,
+                started=started,
+                duration=self.elapsed() - started,
+                thread=threading.current_thread().name,
+            )
+            with self._lock:
+                self.phases.append(phase)
+
+    def run(
+        self, name: str, func: Callable[..., _T], /, *args: object, **kwargs: object
+    ) -> _T:
+        """`func(*args, **kwargs)`, timed as the phase `name` -- for handing
+        to an executor."""
+        with self.phase(name):
+            return func(*args, **kwargs)
+
+    def mark(self, name: str) -> bool:
+        """Record reaching the milestone `name`, if it hasn't been already;
+        whether this was the first time."""
+        elapsed = self.elapsed()
+        with self._lock:
+            if name in self.milestones:
+                return False
+            self.milestones[name] = elapsed
+            return True
+
+    def summary(self) -> str:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase.started)
+            milestones = dict(self.milestones)
+        parts = [f"{phase.name} {phase.duration:.2f}s" for phase in phases]
+        parts += [f"{name} at {at:.2f}s" for name, at in milestones.items()]
+        return ", ".join(parts)
+
+    def report(self) -> str:
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase.started)
+            milestones = dict(self.milestones)
+        width = max([len(p.name) for p in phases] + [len(m) for m in milestones] + [5])
+        lines = [f"{'phase':<{width}}  start    end      took     thread"]
+        for phase in phases:
+            lines.append(
+                f"{phase.name:<{width}}  {phase.started:<7.3f}  "
+                f"{phase.finished:<7.3f}  {phase.duration:<7.3f}  {phase.thread}"
+            )
+        for name, at in milestones.items():
+            lines.append(f"{name:<{width}}  {'':<7}  {at:<7.3f}")
+        return "\n".join(lines)
+
+    def log(self, logger: logging.Logger, message: str) -> None:
+        """Log `message` followed by the report (when `verbose`) or the
+        summary."""
+        if self.verbose:
+            logger.info("%s:\n%s", message, self.report())
+        else:
+            logger.info("%s (%s)", message, self.summary())
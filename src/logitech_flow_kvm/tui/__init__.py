@@ -1,4 +1,6 @@
+from .app import DEFAULT_LOG_SCROLLBACK
 from .app import FlowTUIApp
+from .logging_handler import LogBuffer
 from .logging_handler import TextualLogHandler
 from .pairing import PairingCodeModal
 from .widgets import ClientStatus
@@ -7,15 +9,19 @@ from .widgets import ServerStatus
 from .widgets import StatusPanel
 from .widgets import render_client_status
 from .widgets import render_server_status
+from .widgets import render_status
 
 __all__ = [
+    "DEFAULT_LOG_SCROLLBACK",
     "ClientStatus",
     "DeviceStatus",
     "FlowTUIApp",
+    "LogBuffer",
     "PairingCodeModal",
     "ServerStatus",
     "StatusPanel",
     "TextualLogHandler",
     "render_client_status",
     "render_server_status",
+    "render_status",
 ]
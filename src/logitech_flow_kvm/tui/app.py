@@ -5,15 +5,29 @@ import queue
 from collections.abc import Callable
 from pathlib import Path
 
-from rich.console import RenderableType
 from textual.app import App
 from textual.app import ComposeResult
 from textual.widgets import RichLog
 
 from ..logging_setup import LOG_FORMAT
+from .logging_handler import LogBuffer
 from .logging_handler import TextualLogHandler
 from .pairing import PairingCodeModal
+from .widgets import ClientStatus
+from .widgets import ServerStatus
 from .widgets import StatusPanel
+from .widgets import render_status
+
+# Most times a second the status panel is re-rendered, however often the
+# status itself changes.
+STATUS_REFRESH_RATE = 10
+
+# How often waiting log lines are written to the log panel, in one batch.
+LOG_FLUSH_INTERVAL = 0.1
+
+# Lines the log panel keeps before discarding the oldest; the full log is
+# always in the log file regardless.
+DEFAULT_LOG_SCROLLBACK = 5000
 
 
 class FlowTUIApp(App):
@@ -29,27 +43,43 @@ class FlowTUIApp(App):
 
     CSS_PATH = Path(__file__).parent / "app.tcss"
 
-    def __init__(self, title: str, on_start: Callable[[FlowTUIApp], None]):
+    def __init__(
+        self,
+        title: str,
+        on_start: Callable[[FlowTUIApp], None],
+        *,
+        log_scrollback: int = DEFAULT_LOG_SCROLLBACK,
+    ):
         super().__init__()
         self.title = title
         self._on_start = on_start
+        self._log_scrollback = log_scrollback
         self._log_handler: logging.Handler | None = None
+        self.log_buffer = LogBuffer()
+        # Latest status published, and the one on screen. Only ever replaced
+        # whole (by publishers) or read (by `_refresh_status`), never
+        # modified, so neither side needs a lock.
+        self._published_status: ServerStatus | ClientStatus | None = None
+        self._rendered_status: ServerStatus | ClientStatus | None = None
 
     def compose(self) -> ComposeResult:
         yield StatusPanel(id="status-panel")
-        yield RichLog(id="log-panel", markup=True, wrap=True)
+        yield RichLog(
+            id="log-panel", markup=True, wrap=True, max_lines=self._log_scrollback
+        )
 
     def on_mount(self) -> None:
-        log_panel = self.query_one(RichLog)
-
-        def sink(line: str) -> None:
-            self.call_from_thread(log_panel.write, line)
-
-        handler = TextualLogHandler(sink)
+        # Emitting a record only ever appends it to `log_buffer`: whichever
+        # thread logged -- a notification listener mid-switch, say -- never
+        # waits on the UI. `_flush_log` writes them out from here.
+        handler = TextualLogHandler(self.log_buffer.append)
         handler.setFormatter(logging.Formatter(LOG_FORMAT))
         logging.getLogger().addHandler(handler)
         self._log_handler = handler
 
+        self.set_interval(LOG_FLUSH_INTERVAL, self._flush_log)
+        self.set_interval(1 / STATUS_REFRESH_RATE, self._refresh_status)
+
         self._on_start(self)
 
     def on_unmount(self) -> None:
@@ -57,10 +87,31 @@ class FlowTUIApp(App):
             logging.getLogger().removeHandler(self._log_handler)
             self._log_handler = None
 
-    def update_status(self, renderable: RenderableType) -> None:
-        """Thread-safe: call from any background thread to refresh the
-        status panel."""
-        self.call_from_thread(self.query_one(StatusPanel).update, renderable)
+    def _flush_log(self) -> None:
+        lines, dropped = self.log_buffer.drain()
+        log_panel = self.query_one(RichLog)
+        if dropped:
+            log_panel.write(f"[yellow]({dropped} log lines dropped here)[/]")
+        for line in lines:
+            log_panel.write(line)
+
+    def publish_status(self, status: ServerStatus | ClientStatus) -> None:
+        """Thread-safe, and never waits on the UI: call from any background
+        thread to have the status panel show `status`.
+
+        Only the latest status published counts. The panel picks it up on
+        its next refresh (at most `STATUS_REFRESH_RATE` times a second), and
+        only re-renders it if it differs from what's already shown -- so a
+        burst of notifications costs one render, and a no-op one none.
+        """
+        self._published_status = status
+
+    def _refresh_status(self) -> None:
+        status = self._published_status
+        if status is None or status == self._rendered_status:
+            return
+        self.query_one(StatusPanel).update(render_status(status))
+        self._rendered_status = status
 
     def request_pairing_code(self, remote_addr: str) -> str | None:
         """Thread-safe: call from the Flask request thread to show the
@@ -1,16 +1,21 @@
 import logging
+import threading
+from collections import deque
 from collections.abc import Callable
 
+# How many log lines may wait between two flushes to the log panel before the
+# oldest start being dropped -- far beyond anything but a runaway burst.
+LOG_BUFFER_SIZE = 1000
+
 
 class TextualLogHandler(logging.Handler):
     """Bridges stdlib logging records into a Textual widget.
 
     Deliberately decoupled from Textual's runtime: `sink` is a plain
     callable, so this is unit-testable without a real `App`/event loop. The
-    caller is responsible for making `sink` thread-safe -- `FlowTUIApp` wraps
-    a `RichLog` widget's `write` in `App.call_from_thread` for this reason,
-    since log records can arrive from any of the background threads flow-
-    server/flow-client run.
+    caller is responsible for making `sink` thread-safe -- and quick, since
+    log records arrive on whichever of flow-server/flow-client's background
+    threads emitted them. `FlowTUIApp` uses a `LogBuffer`'s `append`.
     """
 
     def __init__(self, sink: Callable[[str], None]):
@@ -25,3 +30,36 @@ class TextualLogHandler(logging.Handler):
             return
 
         self._sink(message)
+
+
+class LogBuffer:
+    """Log lines on their way to the log panel: appended from any thread
+    without ever waiting on the UI, and taken from it in batches.
+
+    Bounded: should lines arrive faster than they're taken, the oldest
+    waiting are dropped, and counted, rather than queued without limit.
+    """
+
+    def __init__(self, maxlen: int = LOG_BUFFER_SIZE):
+        self._lock = threading.Lock()
+        self._lines: deque[str] = deque(maxlen=maxlen)
+        self._dropped = 0
+        # Every line ever dropped, for reporting; `_dropped` only counts
+        # those since the last `drain`.
+        self.dropped_total = 0
+
+    def append(self, line: str) -> None:
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._dropped += 1
+                self.dropped_total += 1
+            self._lines.append(line)
+
+    def drain(self) -> tuple[list[str], int]:
+        """Take every waiting line, and how many were dropped since the last
+        call."""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            dropped, self._dropped = self._dropped, 0
+        return lines, dropped
@@ -88,6 +88,12 @@ def render_client_status(status: ClientStatus) -> Table:
     return table
 
 
+def render_status(status: ServerStatus | ClientStatus) -> Table:
+    if isinstance(status, ServerStatus):
+        return render_server_status(status)
+    return render_client_status(status)
+
+
 class StatusPanel(Static):
     """Top panel: a live-updating view of whatever `ServerStatus`/
     `ClientStatus` renderable it's last been given."""
@@ -0,0 +1,291 @@
+import asyncio
+import contextlib
+import socket
+import threading
+import time
+from collections.abc import Iterator
+
+import platformdirs
+import pytest
+import requests
+
+from logitech_flow_kvm.aio_server import AsyncFlowServer
+from logitech_flow_kvm.commands import flow_server
+from logitech_flow_kvm.commands.flow_server import FlowServerAPI
+from logitech_flow_kvm.commands.flow_server import bind_routes
+from logitech_flow_kvm.reconciler import Reconciler
+from logitech_flow_kvm.sse import RESUMED_HEADER
+from logitech_flow_kvm.sse import SNAPSHOT_EVENT
+from logitech_flow_kvm.sse import SseDecoder
+from logitech_flow_kvm.sse import SseEvent
+from test_flow_server import DummyListener
+from test_flow_server import make_device
+
+
+@pytest.fixture(autouse=True)
+def no_background_threads(monkeypatch, tmp_path):
+    monkeypatch.setattr(flow_server, "NotificationListener", DummyListener)
+    monkeypatch.setattr(Reconciler, "start", lambda self: None)
+    monkeypatch.setattr(platformdirs, "user_data_dir", lambda *a, **k: str(tmp_path))
+
+
+@pytest.fixture
+def app():
+    api = FlowServerAPI(
+        __name__,
+        host_number=1,
+        leader_device=make_device(1, "LEADER01"),
+        follower_devices=[make_device(1, "FOLLOW01")],
+        hostnames=[],
+        binding_interface="127.0.0.1",
+        port=0,
+    )
+    bind_routes(api)
+    return api
+
+
+@pytest.fixture
+def server(app):
+    """An `AsyncFlowServer` on its own loop thread, as flow-server runs it
+    under the TUI -- plain TCP, since TLS is just `asyncio.start_server`'s."""
+    with _serving(app) as server:
+        yield server
+
+
+@contextlib.contextmanager
+def _serving(app) -> Iterator[AsyncFlowServer]:
+    server = AsyncFlowServer(
+        app, host="127.0.0.1", port=0, ssl_context=None, keepalive_interval=0.2
+    )
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(timeout=5)
+
+    yield server
+
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(timeout=5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5)
+    loop.close()
+
+
+def _url(server: AsyncFlowServer, path: str) -> str:
+    return f"http://127.0.0.1:{server.bound_port}{path}"
+
+
+def _auth_headers(app, name: str) -> dict[str, str]:
+    token = app.create_new_auth_token(name)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _next_events(chunks: Iterator[bytes], decoder: SseDecoder) -> list[SseEvent]:
+    # One `iter_content()` iterator per response: abandoning one closes the
+    # connection underneath it.
+    for chunk in chunks:
+        events = decoder.feed(chunk)
+        if events:
+            return events
+    raise AssertionError("stream ended")
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class TestWsgiRoutes:
+    def test_configuration_is_served_by_the_flask_app(self, app, server):
+        response = requests.get(
+            _url(server, "/configuration"), headers=_auth_headers(app, "1"), timeout=5
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "leader": app.leader_device.id,
+            "followers": [device.id for device in app.follower_devices],
+        }
+
+    def test_requires_authentication(self, server):
+        response = requests.get(_url(server, "/configuration"), timeout=5)
+
+        assert response.status_code == 401
+
+    def test_put_leader_host_passes_the_request_body_through(self, app, server):
+        response = requests.put(
+            _url(server, "/leader-host"),
+            data=b"2",
+            headers=_auth_headers(app, "2"),
+            timeout=5,
+        )
+
+        assert response.status_code == 200
+        assert app._get_desired_host() == 2
+
+    def test_chunked_request_bodies_are_reassembled(self, app, server, monkeypatch):
+        copied: dict[str, str] = {}
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        monkeypatch.setattr(
+            flow_server.pyperclip, "copy", lambda text: copied.update(text=text)
+        )
+
+        response = requests.put(
+            _url(server, "/clipboard"),
+            data=iter([b"from-", b"client"]),  # sent chunked
+            headers=_auth_headers(app, "2"),
+            timeout=5,
+        )
+
+        assert response.status_code == 200
+        assert copied["text"] == "from-client"
+
+    def test_connections_are_kept_alive_between_requests(self, app, server):
+        headers = "".join(f"{k}: {v}\r\n" for k, v in _auth_headers(app, "1").items())
+        request = f"GET /configuration HTTP/1.1\r\nHost: x\r\n{headers}\r\n".encode()
+
+        with socket.create_connection(("127.0.0.1", server.bound_port), 5) as sock:
+            stream = sock.makefile("rb")
+            for _ in range(2):
+                sock.sendall(request)
+                assert stream.readline() == b"HTTP/1.1 200 OK\r\n"
+                response_headers = {}
+                while (line := stream.readline()) != b"\r\n":
+                    name, _, value = line.decode().partition(":")
+                    response_headers[name.lower()] = value.strip()
+                assert response_headers["connection"] == "keep-alive"
+                stream.read(int(response_headers["content-length"]))
+
+    def test_bodies_are_limited_by_the_apps_clipboard_limit(self, app, monkeypatch):
+        copied: dict[str, str] = {}
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        monkeypatch.setattr(
+            flow_server.pyperclip, "copy", lambda text: copied.update(text=text)
+        )
+        app.max_clipboard_size = 128 * 1024
+
+        with _serving(app) as server:
+            for size, status in ((128 * 1024, 200), (256 * 1024, 413)):
+                response = requests.put(
+                    _url(server, "/clipboard"),
+                    data=iter([b"x" * size]),  # sent chunked
+                    headers=_auth_headers(app, "2"),
+                    timeout=5,
+                )
+
+                assert response.status_code == status
+        assert len(copied["text"]) == 128 * 1024
+
+    def test_malformed_requests_are_rejected(self, server):
+        with socket.create_connection(("127.0.0.1", server.bound_port), 5) as sock:
+            sock.sendall(b"nonsense\r\n\r\n")
+
+            assert sock.makefile("rb").readline() == b"HTTP/1.1 400 Bad Request\r\n"
+
+
+class TestEventsRoute:
+    def test_requires_authentication(self, server):
+        response = requests.get(_url(server, "/events"), timeout=5)
+
+        assert response.status_code == 401
+
+    @pytest.mark.parametrize("method", ["HEAD", "POST"])
+    def test_other_methods_are_refused_without_subscribing(self, app, server, method):
+        response = requests.request(
+            method, _url(server, "/events"), headers=_auth_headers(app, "2"), timeout=5
+        )
+
+        assert response.status_code == 405
+        assert response.headers["Allow"] == "GET"
+        assert app.events.subscriber_names == []
+
+    def test_new_subscriber_receives_a_snapshot_then_deltas(self, app, server):
+        app.report_leader_host(2)
+
+        with requests.get(
+            _url(server, "/events"),
+            headers=_auth_headers(app, "A"),
+            stream=True,
+            timeout=5,
+        ) as response:
+            chunks = response.iter_content(chunk_size=None)
+            decoder = SseDecoder()
+            assert response.headers["Content-Type"].startswith("text/event-stream")
+            assert [e.event for e in _next_events(chunks, decoder)] == [SNAPSHOT_EVENT]
+
+            app.report_leader_host(3)
+
+            (event,) = _next_events(chunks, decoder)
+            assert (event.event, event.data) == ("leader-host", "3")
+            assert event.id == str(app.events.last_event_id)
+
+    def test_reconnecting_with_last_event_id_replays_missed_events(self, app, server):
+        app.report_leader_host(2)
+        seen = app.events.last_event_id
+        app.report_leader_host(3)
+        headers = {**_auth_headers(app, "A"), "Last-Event-ID": str(seen)}
+
+        with requests.get(
+            _url(server, "/events"), headers=headers, stream=True, timeout=5
+        ) as response:
+            assert response.headers[RESUMED_HEADER] == "1"
+            chunks = response.iter_content(chunk_size=None)
+            (event,) = _next_events(chunks, SseDecoder())
+            assert (event.event, event.data) == ("leader-host", "3")
+
+    def test_idle_streams_get_keepalives(self, app, server):
+        with requests.get(
+            _url(server, "/events"),
+            headers=_auth_headers(app, "A"),
+            stream=True,
+            timeout=5,
+        ) as response:
+            chunks = response.iter_content(chunk_size=None)
+            next(chunks)  # the initial snapshot
+
+            assert next(chunks) == b": keepalive\n\n"
+
+    def test_disconnecting_unsubscribes(self, app, server):
+        response = requests.get(
+            _url(server, "/events"),
+            headers=_auth_headers(app, "A"),
+            stream=True,
+            timeout=5,
+        )
+        chunks = response.iter_content(chunk_size=None)
+        next(chunks)
+        assert app.events.subscriber_names == ["A"]
+
+        response.close()
+
+        _wait_until(lambda: app.events.subscriber_names == [])
+
+    def test_many_idle_subscribers_share_the_loop_thread(self, app, server):
+        request = (
+            "GET /events HTTP/1.1\r\nHost: x\r\n"
+            + "".join(f"{k}: {v}\r\n" for k, v in _auth_headers(app, "A").items())
+            + "\r\n"
+        ).encode()
+        threads_before = threading.active_count()
+        sockets = [
+            socket.create_connection(("127.0.0.1", server.bound_port), 5)
+            for _ in range(200)
+        ]
+        try:
+            for sock in sockets:
+                sock.sendall(request)
+            _wait_until(lambda: app.events.stats.subscribers == len(sockets))
+
+            app.report_leader_host(4)
+
+            for sock in sockets:
+                received = b""
+                while b"event: leader-host\n" not in received:
+                    received += sock.recv(65536)
+            # Only the (bounded) worker pool used to open each stream -- not
+            # a thread per subscriber.
+            assert threading.active_count() - threads_before < 50
+        finally:
+            for sock in sockets:
+                sock.close()
@@ -0,0 +1,236 @@
+import datetime
+import ipaddress
+import os
+import ssl
+
+import platformdirs
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ed25519
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+from logitech_flow_kvm import certificates
+from logitech_flow_kvm.exceptions import NoCertificateAvailable
+
+
+@pytest.fixture
+def user_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        platformdirs, "user_data_dir", lambda *args, **kwargs: str(tmp_path)
+    )
+    return tmp_path
+
+
+class TestGetAllIps:
+    def test_returns_ipv4_addresses(self):
+        ips = certificates.get_all_ips()
+
+        assert ips
+        for ip in ips:
+            assert isinstance(ipaddress.ip_address(ip), ipaddress.IPv4Address)
+
+
+class TestGetCertificateKeyPath:
+    def test_raises_when_no_certificate_exists(self, user_data_dir):
+        with pytest.raises(NoCertificateAvailable):
+            certificates.get_certificate_key_path("server")
+
+    def test_creates_certificate_and_key(self, user_data_dir):
+        cert_path, key_path = certificates.get_certificate_key_path(
+            "server", create=True
+        )
+
+        assert os.path.exists(cert_path)
+        assert os.path.exists(key_path)
+
+        with open(cert_path, "rb") as inf:
+            certificate = x509.load_pem_x509_certificate(inf.read())
+        with open(key_path, "rb") as inf:
+            key = load_pem_private_key(inf.read(), password=None)
+
+        assert isinstance(key, ec.EllipticCurvePrivateKey)
+        assert key.curve.name == "secp256r1"
+        assert (os.stat(key_path).st_mode & 0o777) == 0o600
+
+        san = certificate.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName
+        )
+        san_ips = {str(ip) for ip in san.value.get_values_for_type(x509.IPAddress)}
+        assert san_ips == set(certificates.get_all_ips())
+
+        lifetime = certificate.not_valid_after_utc - certificate.not_valid_before_utc
+        assert lifetime == datetime.timedelta(days=10 * 365)
+
+        # Without CA:TRUE, modern OpenSSL refuses to use this self-signed
+        # cert as a trust anchor (requests' verify=<path> does exactly that).
+        basic_constraints = certificate.extensions.get_extension_for_class(
+            x509.BasicConstraints
+        )
+        assert basic_constraints.value.ca is True
+        assert basic_constraints.critical is True
+
+    def test_reuses_existing_certificate(self, user_data_dir):
+        first = certificates.get_certificate_key_path("server", create=True)
+        with open(first[0], "rb") as inf:
+            first_contents = inf.read()
+
+        second = certificates.get_certificate_key_path("server")
+
+        assert first == second
+        with open(second[0], "rb") as inf:
+            assert inf.read() == first_contents
+
+    def test_certificate_includes_requested_hostnames(self, user_data_dir):
+        cert_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["foo.lan", "bar.lan"]
+        )
+
+        with open(cert_path, "rb") as inf:
+            certificate = x509.load_pem_x509_certificate(inf.read())
+
+        san = certificate.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName
+        )
+        assert set(san.value.get_values_for_type(x509.DNSName)) == {
+            "foo.lan",
+            "bar.lan",
+        }
+
+    def test_reuses_certificate_when_hostnames_unchanged(self, user_data_dir):
+        first_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["foo.lan"]
+        )
+        with open(first_path, "rb") as inf:
+            first_contents = inf.read()
+
+        second_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["foo.lan"]
+        )
+        with open(second_path, "rb") as inf:
+            assert inf.read() == first_contents
+
+
+def _key(key_path: str):
+    with open(key_path, "rb") as inf:
+        return load_pem_private_key(inf.read(), password=None)
+
+
+def _contents(path: str) -> bytes:
+    with open(path, "rb") as inf:
+        return inf.read()
+
+
+class TestCertificateKeyTypes:
+    def test_rsa_is_available_for_compatibility(self, user_data_dir):
+        _, key_path = certificates.get_certificate_key_path(
+            "server", create=True, key_type="rsa"
+        )
+
+        key = _key(key_path)
+        assert isinstance(key, rsa.RSAPrivateKey)
+        assert key.key_size == 4096
+
+    def test_ed25519(self, user_data_dir):
+        cert_path, key_path = certificates.get_certificate_key_path(
+            "server", create=True, key_type="ed25519"
+        )
+
+        assert isinstance(_key(key_path), ed25519.Ed25519PrivateKey)
+        # Loads as a usable server certificate.
+        ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER).load_cert_chain(cert_path, key_path)
+
+    def test_an_existing_certificate_of_another_type_is_kept_by_default(
+        self, user_data_dir
+    ):
+        cert_path, key_path = certificates.get_certificate_key_path(
+            "server", create=True, key_type="rsa"
+        )
+        before = _contents(cert_path)
+
+        certificates.get_certificate_key_path("server", create=True)
+
+        assert _contents(cert_path) == before
+        assert isinstance(_key(key_path), rsa.RSAPrivateKey)
+
+    def test_an_explicit_key_type_change_regenerates(self, user_data_dir):
+        cert_path, key_path = certificates.get_certificate_key_path(
+            "server", create=True, key_type="ecdsa"
+        )
+        before = _contents(cert_path)
+
+        certificates.get_certificate_key_path("server", create=True, key_type="ed25519")
+
+        assert _contents(cert_path) != before
+        assert isinstance(_key(key_path), ed25519.Ed25519PrivateKey)
+
+    def test_a_mismatched_certificate_and_key_are_regenerated(self, user_data_dir):
+        cert_path, key_path = certificates.get_certificate_key_path(
+            "server", create=True
+        )
+        other_cert, other_key = certificates.get_certificate_key_path(
+            "other", create=True
+        )
+        # As if interrupted between writing the new key and its certificate.
+        os.replace(other_key, key_path)
+
+        certificates.get_certificate_key_path("server", create=True)
+
+        ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER).load_cert_chain(cert_path, key_path)
+
+    def test_legacy_rsa_keys_in_traditional_format_still_load(self, user_data_dir):
+        cert_path, key_path = certificates.get_certificate_key_path(
+            "server", create=True, key_type="rsa"
+        )
+        before = _contents(cert_path)
+        legacy = _key(key_path).private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        )
+        with open(key_path, "wb") as outf:
+            outf.write(legacy)
+
+        certificates.get_certificate_key_path("server")
+
+        assert _contents(cert_path) == before
+
+    def test_regenerates_when_hostnames_change(self, user_data_dir):
+        first_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["foo.lan"]
+        )
+        with open(first_path, "rb") as inf:
+            first_contents = inf.read()
+
+        second_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["bar.lan"]
+        )
+        with open(second_path, "rb") as inf:
+            second_contents = inf.read()
+
+        assert second_contents != first_contents
+
+        certificate = x509.load_pem_x509_certificate(second_contents)
+        san = certificate.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName
+        )
+        assert set(san.value.get_values_for_type(x509.DNSName)) == {"bar.lan"}
+
+    def test_ip_address_changes_do_not_trigger_regeneration(
+        self, user_data_dir, monkeypatch
+    ):
+        monkeypatch.setattr(certificates, "get_all_ips", lambda: ["10.0.0.1"])
+        first_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["foo.lan"]
+        )
+        with open(first_path, "rb") as inf:
+            first_contents = inf.read()
+
+        monkeypatch.setattr(certificates, "get_all_ips", lambda: ["10.0.0.2"])
+        second_path, _ = certificates.get_certificate_key_path(
+            "server", create=True, hostnames=["foo.lan"]
+        )
+        with open(second_path, "rb") as inf:
+            assert inf.read() == first_contents
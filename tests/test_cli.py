@@ -0,0 +1,134 @@
+import importlib.metadata
+import logging
+import subprocess
+import sys
+from unittest import mock
+
+import pytest
+
+from logitech_flow_kvm import cli
+from logitech_flow_kvm.cli import COMMANDS_ENTRYPOINT
+from logitech_flow_kvm.cli import CommandRunner
+
+# What switch-to-host may spend importing, all told: it's bound to hotkeys,
+# so has to be done in tens of milliseconds. Generous, since CI machines are
+# slow and noisy -- the heavy packages it must never import (below) are the
+# precise check.
+SWITCH_TO_HOST_IMPORT_BUDGET = 0.1
+
+HEAVY_MODULES = ("cryptography", "flask", "psutil", "requests", "rich", "textual")
+
+PARSE_SWITCH_TO_HOST = (
+    "from logitech_flow_kvm.cli import CommandRunner, COMMANDS_ENTRYPOINT\n"
+    "CommandRunner(COMMANDS_ENTRYPOINT).parse_args(['switch-to-host', 'x', '2'])\n"
+)
+
+
+def _import_times(code: str) -> tuple[float, set[str]]:
+    """Total time, in seconds, `python -X importtime` reports `code` spending
+    in imports (not counting interpreter startup's own), and every module it
+    imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    startup = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", ""],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    startup_modules = {
+        line.split("|")[2].strip()
+        for line in startup.stderr.splitlines()
+        if line.count("|") == 2
+    }
+
+    total = 0
+    modules: set[str] = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header
+        modules.add(name.strip())
+        # Only top-level imports: their cumulative times include the rest.
+        if not name.startswith("  ") and name.strip() not in startup_modules:
+            total += int(cumulative)
+    return total / 1_000_000, modules
+
+
+class TestCommandRunner:
+    def test_only_the_named_command_is_loaded(self):
+        runner = CommandRunner(COMMANDS_ENTRYPOINT)
+
+        options = runner.parse_args(["switch-to-host", "/dev/hidraw0", "2"])
+
+        assert list(runner._commands) == ["switch-to-host"]
+        assert (options.command, options.host) == ("switch-to-host", 2)
+
+    def test_every_command_is_loaded_for_help(self):
+        runner = CommandRunner(COMMANDS_ENTRYPOINT)
+
+        with pytest.raises(SystemExit):
+            runner.parse_args(["--help"])
+
+        assert set(runner._commands) == {
+            "flow-client",
+            "flow-server",
+            "list-devices",
+            "switch-to-host",
+            "watch",
+        }
+
+    def test_broken_entry_points_are_skipped_with_a_warning(self, monkeypatch, caplog):
+        installed = importlib.metadata.entry_points(group=COMMANDS_ENTRYPOINT)
+        broken = [
+            importlib.metadata.EntryPoint(
+                "missing",
+                "logitech_flow_kvm.no_such_module:Command",
+                COMMANDS_ENTRYPOINT,
+            ),
+            importlib.metadata.EntryPoint(
+                "not-a-command", "argparse:Namespace", COMMANDS_ENTRYPOINT
+            ),
+        ]
+        monkeypatch.setattr(
+            cli.importlib.metadata,
+            "entry_points",
+            lambda group: [*installed, *broken],
+        )
+        runner = CommandRunner(COMMANDS_ENTRYPOINT)
+
+        with caplog.at_level(logging.WARNING), pytest.raises(SystemExit):
+            runner.parse_args(["--help"])
+
+        assert set(runner._commands) == {entry_point.name for entry_point in installed}
+        assert len(caplog.records) == 2
+
+    def test_runs_the_named_command_with_its_options(self):
+        argv = ["switch-to-host", "/dev/hidraw0", "2"]
+        loaded = CommandRunner(COMMANDS_ENTRYPOINT)
+        loaded.parse_args(argv)
+        command = loaded._commands["switch-to-host"]
+
+        with mock.patch.object(command, "handle", autospec=True) as handle:
+            CommandRunner(COMMANDS_ENTRYPOINT).run(argv)
+
+        (instance,) = handle.call_args.args
+        assert isinstance(instance, command)
+        assert (instance.options.device, instance.options.host) == ("/dev/hidraw0", 2)
+
+    def test_switch_to_host_imports_nothing_heavy(self):
+        _, modules = _import_times(PARSE_SWITCH_TO_HOST)
+
+        imported = {name.partition(".")[0] for name in modules}
+        assert imported.isdisjoint(HEAVY_MODULES)
+
+    def test_switch_to_host_starts_within_its_import_budget(self):
+        elapsed, _ = _import_times(PARSE_SWITCH_TO_HOST)
+
+        assert elapsed < SWITCH_TO_HOST_IMPORT_BUDGET
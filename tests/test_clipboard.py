@@ -0,0 +1,86 @@
+import gzip
+import os
+import zlib
+
+import pytest
+
+from logitech_flow_kvm import exceptions
+from logitech_flow_kvm.clipboard import MIN_COMPRESS_SIZE
+from logitech_flow_kvm.clipboard import accepted_encodings
+from logitech_flow_kvm.clipboard import choose_encoding
+from logitech_flow_kvm.clipboard import decode_chunks
+from logitech_flow_kvm.clipboard import encode_chunks
+from logitech_flow_kvm.clipboard import max_encoded_size
+from logitech_flow_kvm.clipboard import parse_content_encoding
+
+
+class TestEncoding:
+    @pytest.mark.parametrize("encoding", [None, "gzip", "deflate"])
+    def test_roundtrips(self, encoding):
+        data = b"clipboard contents " * 10000
+
+        chunks = list(encode_chunks(data, encoding))
+
+        assert decode_chunks(chunks, encoding, len(data)) == data
+
+    def test_gzip_is_standard_gzip(self):
+        data = b"clipboard contents " * 100
+
+        assert gzip.decompress(b"".join(encode_chunks(data, "gzip"))) == data
+
+    @pytest.mark.parametrize("encoding", [None, "gzip", "deflate"])
+    def test_incompressible_contents_stay_within_the_bound(self, encoding):
+        data = os.urandom(1024 * 1024)
+
+        encoded = b"".join(encode_chunks(data, encoding))
+
+        assert len(encoded) <= max_encoded_size(len(data))
+
+    def test_small_contents_are_not_compressed(self):
+        assert choose_encoding(b"x" * (MIN_COMPRESS_SIZE - 1), ["gzip"]) is None
+        assert choose_encoding(b"x" * MIN_COMPRESS_SIZE, ["gzip"]) == "gzip"
+
+
+class TestDecodeChunks:
+    def test_rejects_contents_over_the_limit(self):
+        with pytest.raises(exceptions.ClipboardTooLarge):
+            decode_chunks([b"x" * 10, b"x"], None, 10)
+
+    def test_rejects_compressed_contents_that_inflate_past_the_limit(self):
+        bomb = zlib.compress(b"\0" * 64 * 1024 * 1024)
+
+        with pytest.raises(exceptions.ClipboardTooLarge):
+            decode_chunks([bomb], "deflate", 1024)
+
+    def test_rejects_truncated_contents(self):
+        encoded = b"".join(encode_chunks(b"x" * 4096, "gzip"))
+
+        with pytest.raises(ValueError):
+            decode_chunks([encoded[:-8]], "gzip", 8192)
+
+    def test_rejects_corrupt_contents(self):
+        with pytest.raises(ValueError):
+            decode_chunks([b"not gzip at all"], "gzip", 8192)
+
+
+class TestHeaders:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (None, ()),
+            ("gzip", ("gzip",)),
+            ("deflate, gzip;q=0.5", ("gzip", "deflate")),
+            ("gzip;q=0, deflate", ("deflate",)),
+            ("br, *", ("gzip", "deflate")),
+            ("br", ()),
+        ],
+    )
+    def test_accepted_encodings(self, value, expected):
+        assert accepted_encodings(value) == expected
+
+    def test_parse_content_encoding(self):
+        assert parse_content_encoding(None) is None
+        assert parse_content_encoding("identity") is None
+        assert parse_content_encoding(" GZIP ") == "gzip"
+        with pytest.raises(ValueError):
+            parse_content_encoding("br")
@@ -1,5 +1,10 @@
 import argparse
+import gzip
+import http.server
+import json
+import ssl
 import threading
+import time
 import types
 from typing import Any
 from unittest.mock import Mock
@@ -9,9 +14,18 @@ import pytest
 import requests
 
 from logitech_flow_kvm import exceptions
+from logitech_flow_kvm.certificates import get_certificate_key_path
+from logitech_flow_kvm.clipboard import content_etag
 from logitech_flow_kvm.commands import flow_client
 from logitech_flow_kvm.commands.flow_client import FlowClient
 from logitech_flow_kvm.hidpp.models import Notification
+from logitech_flow_kvm.multicast import FAST_PATH
+from logitech_flow_kvm.multicast import Announcement
+from logitech_flow_kvm.sse import OBSERVATION_HEADER
+from logitech_flow_kvm.sse import RESUMED_HEADER
+from logitech_flow_kvm.sse import VALUE_HEADER
+from logitech_flow_kvm.sse import VERSION_HEADER
+from logitech_flow_kvm.sse import parse_observation_stamp
 from logitech_flow_kvm.util import set_host_certificate_and_token
 
 
@@ -27,6 +41,8 @@ class FakeResponse:
         json_data=None,
         text: str = "",
         lines: list[str] | None = None,
+        headers: dict[str, str] | None = None,
+        content: bytes | None = None,
     ):
         self.ok = ok
         self.status_code = (
@@ -35,6 +51,23 @@ class FakeResponse:
         self._json = json_data
         self.text = text
         self._lines = lines or []
+        self.headers = headers or {}
+        self.content = content if content is not None else text.encode()
+        self.raw = types.SimpleNamespace(stream=self._stream)
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.closed = True
+
+    def _stream(self, amt: int, decode_content: bool = True):
+        for start in range(0, len(self.content), amt):
+            yield self.content[start : start + amt]
 
     def json(self):
         return self._json
@@ -43,8 +76,8 @@ class FakeResponse:
         if not self.ok:
             raise requests.exceptions.HTTPError("request failed")
 
-    def iter_lines(self, decode_unicode: bool = True):
-        return iter(self._lines)
+    def iter_content(self, chunk_size: int | None = 1):
+        return iter([("\n".join(self._lines) + "\n").encode()])
 
 
 @pytest.fixture
@@ -58,6 +91,8 @@ def user_data_dir(tmp_path, monkeypatch):
 def make_client(**attrs) -> FlowClient:
     options = argparse.Namespace(host_number=2, server="myserver", port=24801)
     client = FlowClient(options=options)
+    # Clipboard fetches run inline, so tests can see what they did.
+    attrs.setdefault("_fetch_in_background", lambda target: target())
     for key, value in attrs.items():
         setattr(client, key, value)
     return client
@@ -148,6 +183,141 @@ class TestRequest:
 
         assert "Authorization" not in captured["kwargs"]["headers"]
 
+    def test_uses_the_pooled_session_once_there_is_one(self):
+        session = Mock()
+        client = make_client(cert="/path/to/cert", token="tok123", session=session)
+
+        client.request("PUT", "https://x", data="2")
+
+        session.request.assert_called_once_with(
+            "PUT",
+            "https://x",
+            headers={"Authorization": "Bearer tok123"},
+            data="2",
+            verify="/path/to/cert",
+        )
+
+    def test_an_explicit_session_takes_precedence(self):
+        pooled, events = Mock(), Mock()
+        client = make_client(cert="/path/to/cert", session=pooled)
+
+        client.request("GET", "https://x", session=events)
+
+        events.request.assert_called_once()
+        pooled.request.assert_not_called()
+
+    def test_an_explicit_verify_bypasses_the_session(self, monkeypatch):
+        session = Mock()
+        client = make_client(cert="/path/to/cert", session=session)
+        monkeypatch.setattr(
+            flow_client.requests, "request", lambda *a, **k: FakeResponse()
+        )
+
+        client.request("OPTIONS", "https://x", verify=False)
+
+        session.request.assert_not_called()
+
+
+@pytest.fixture
+def tls_server(user_data_dir):
+    """A local HTTPS server (keep-alive capable) presenting a flow-server
+    certificate for `localhost`, counting the connections it accepts. The
+    body of every `PUT` is recorded -- and the first is answered by
+    dropping the connection, as a pooled one the server had closed would
+    be."""
+    cert_path, key_path = get_certificate_key_path(
+        "server", create=True, hostnames=["localhost"]
+    )
+    connections: list[object] = []
+    put_bodies: list[bytes] = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            connections.append(self.connection)
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def do_PUT(self):
+            if self.headers.get("Transfer-Encoding") == "chunked":
+                body = b""
+                while size := int(self.rfile.readline(), 16):
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+                self.rfile.readline()
+            else:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            put_bodies.append(body)
+            if len(put_bodies) == 1:
+                self.close_connection = True
+                return
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield types.SimpleNamespace(
+        url=f"https://localhost:{server.server_address[1]}/",
+        port=server.server_address[1],
+        cert_path=cert_path,
+        connections=connections,
+        put_bodies=put_bodies,
+    )
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestCreateSession:
+    def test_reuses_one_connection_across_requests(self, tls_server):
+        session = flow_client.create_session(tls_server.cert_path)
+
+        for _ in range(3):
+            response = session.get(tls_server.url, verify=tls_server.cert_path)
+            assert response.text == "ok"
+
+        assert len(tls_server.connections) == 1
+
+    def test_loads_the_certificate_once_rather_than_per_connection(
+        self, tls_server, monkeypatch
+    ):
+        session = flow_client.create_session(tls_server.cert_path)
+        adapter = session.get_adapter(tls_server.url)
+        assert isinstance(adapter, flow_client.PinnedCAAdapter)
+        loads: list[object] = []
+        monkeypatch.setattr(
+            ssl.SSLContext,
+            "load_verify_locations",
+            lambda self, *a, **k: loads.append(a),
+        )
+
+        session.get(tls_server.url, verify=tls_server.cert_path)
+        adapter.poolmanager.clear()  # force a second connection
+        session.get(tls_server.url, verify=tls_server.cert_path)
+
+        assert len(tls_server.connections) == 2
+        assert loads == []
+
+    def test_rejects_a_server_it_was_not_pinned_to(self, tls_server):
+        other_cert, _ = get_certificate_key_path("other", create=True)
+        session = flow_client.create_session(other_cert)
+
+        with pytest.raises(requests.exceptions.SSLError):
+            session.get(tls_server.url, verify=other_cert)
+
 
 class TestPair:
     def test_success_stores_certificate_and_token(self, monkeypatch):
@@ -279,7 +449,7 @@ class TestGetCertificatePathAndToken:
 
 
 class TestCallback:
-    def test_leader_connect_reports_leader_host_and_pulls_the_clipboard(
+    def test_leader_connect_arrives_and_copies_the_returned_clipboard(
         self, monkeypatch
     ):
         reconciler = Mock()
@@ -289,10 +459,8 @@ class TestCallback:
         calls = []
 
         def fake_request(method, url, **kwargs):
-            calls.append((method, url))
-            if method == "PUT":
-                return FakeResponse(ok=True)
-            return FakeResponse(ok=True, text="clip-from-server")
+            calls.append((method, url, kwargs.get("data")))
+            return FakeResponse(text="clip-from-server", headers={VERSION_HEADER: "7"})
 
         monkeypatch.setattr(client, "request", fake_request)
         copied: dict[str, Any] = {}
@@ -302,11 +470,140 @@ class TestCallback:
 
         client.callback(receiver, connection_notification(1, connected=True))
 
-        assert ("PUT", client.build_url("leader-host")) in calls
-        assert ("GET", client.build_url("clipboard")) in calls
+        # One round trip for both.
+        assert calls == [("POST", client.build_url("arrival"), "2")]
         assert copied["text"] == "clip-from-server"
+        # Applied without waiting for the echo over /events...
+        assert client.leader_host == 2
+        reconciler.poke.assert_called_once()
         reconciler.observe.assert_not_called()
 
+        # ...which is then dropped as a duplicate.
+        client._handle_event("leader-host", "2", "7")
+        reconciler.poke.assert_called_once()
+
+    def test_leader_connect_falls_back_for_servers_without_arrival(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        calls = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append((method, url))
+            if method == "POST":
+                return FakeResponse(ok=False, status_code=404)
+            return FakeResponse(text="clip-from-server")
+
+        monkeypatch.setattr(client, "request", fake_request)
+        copied: dict[str, Any] = {}
+        monkeypatch.setattr(
+            flow_client.pyperclip, "copy", lambda text: copied.update(text=text)
+        )
+
+        for _ in range(2):
+            client._clipboard_etag = None
+            client.callback(receiver, connection_notification(1, connected=True))
+
+        assert calls == [
+            ("POST", client.build_url("arrival")),
+            ("PUT", client.build_url("leader-host")),
+            ("GET", client.build_url("clipboard")),
+            ("PUT", client.build_url("leader-host")),
+            ("GET", client.build_url("clipboard")),
+        ]
+        assert copied["text"] == "clip-from-server"
+
+    def test_reports_are_stamped_in_sequence(self, monkeypatch):
+        client = make_client(
+            leader_id="LEADER01", reconciler=Mock(), _arrival_supported=False
+        )
+        client.clipboard_enabled = False
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        stamps = []
+
+        def fake_request(method, url, **kwargs):
+            stamps.append(
+                parse_observation_stamp(kwargs["headers"][OBSERVATION_HEADER])
+            )
+            return FakeResponse()
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        for _ in range(2):
+            client.callback(receiver, connection_notification(1, connected=True))
+
+        first, second = stamps
+        assert first is not None and second is not None
+        assert first.session == second.session
+        assert (first.sequence, second.sequence) == (1, 2)
+        assert 0 <= first.age < 1
+
+    def test_a_report_older_than_the_servers_applies_the_servers(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        client.clipboard_enabled = False
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(
+            client,
+            "request",
+            lambda *a, **k: FakeResponse(
+                status_code=204, headers={VERSION_HEADER: "7", VALUE_HEADER: "3"}
+            ),
+        )
+
+        client.callback(receiver, connection_notification(1, connected=True))
+
+        assert client.leader_host == 3
+
+    def test_leader_arrival_moves_followers_before_the_server_answers(
+        self, monkeypatch
+    ):
+        reconciler = Mock()
+        client = make_client(leader_id="LEADER01", reconciler=reconciler)
+        client.clipboard_enabled = False
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+
+        def fake_request(method, url, **kwargs):
+            assert client.leader_host == 2
+            assert client.leader_host_provisional
+            reconciler.poke.assert_called_once()
+            # From before the leader arrived: noted, not applied.
+            client._handle_event("leader-host", "1", "5")
+            assert client.leader_host == 2
+            return FakeResponse(status_code=204, headers={VERSION_HEADER: "7"})
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        client.callback(receiver, connection_notification(1, connected=True))
+
+        assert client.leader_host == 2
+        assert not client.leader_host_provisional
+        reconciler.poke.assert_called_once()
+
+    def test_a_failed_report_stays_provisional_until_the_server_speaks(
+        self, monkeypatch
+    ):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        client.clipboard_enabled = False
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(
+            client,
+            "request",
+            Mock(side_effect=requests.exceptions.ConnectionError()),
+        )
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.callback(receiver, connection_notification(1, connected=True))
+
+        assert (client.leader_host, client.leader_host_provisional) == (2, True)
+
+        client._handle_event("leader-host", "3", "9")
+
+        assert (client.leader_host, client.leader_host_provisional) == (3, False)
+
     def test_leader_disconnect_pushes_the_local_clipboard(self, monkeypatch):
         reconciler = Mock()
         client = make_client(leader_id="LEADER01", reconciler=reconciler)
@@ -327,6 +624,345 @@ class TestCallback:
         assert sent["url"] == client.build_url("clipboard")
         assert sent["data"] == b"local-clip"
 
+    def test_leader_disconnect_skips_the_push_when_nothing_changed(self, monkeypatch):
+        client = make_client(
+            leader_id="LEADER01",
+            reconciler=Mock(),
+            _clipboard_etag=content_etag(b"local-clip"),
+        )
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: "local-clip")
+        request_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(client, "request", request_mock)
+
+        client.callback(receiver, connection_notification(1, connected=False))
+
+        request_mock.assert_not_called()
+
+    def test_a_successful_push_is_remembered(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: "local-clip")
+        monkeypatch.setattr(
+            client, "request", lambda *a, **k: FakeResponse(status_code=204)
+        )
+
+        client.callback(receiver, connection_notification(1, connected=False))
+
+        assert client._clipboard_etag == content_etag(b"local-clip")
+
+    def test_push_is_compressed_once_the_server_accepts_it(self, monkeypatch):
+        text = "local-clip " * 1000
+        client = make_client(_clipboard_encodings=("gzip",))
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: text)
+        sent: dict[str, Any] = {}
+
+        def fake_request(method, url, **kwargs):
+            sent.update(headers=kwargs.get("headers"), body=kwargs["data"])
+            return FakeResponse(ok=True)
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        client._push_clipboard()
+
+        assert sent["headers"] == {"Content-Encoding": "gzip"}
+        assert gzip.decompress(sent["body"]) == text.encode()
+
+    def test_a_retried_compressed_push_sends_the_whole_body_again(
+        self, tls_server, monkeypatch
+    ):
+        text = "local-clip " * 1000
+        client = make_client(
+            _clipboard_encodings=("gzip",),
+            cert=tls_server.cert_path,
+            session=flow_client.create_session(tls_server.cert_path),
+        )
+        client.options.server = "localhost"
+        client.options.port = tls_server.port
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: text)
+
+        client._push_clipboard()
+
+        first, retried = tls_server.put_bodies
+        assert retried == first
+        assert gzip.decompress(retried) == text.encode()
+        assert client._clipboard_etag == content_etag(text.encode())
+
+    def test_push_is_not_compressed_for_servers_that_never_said_so(self, monkeypatch):
+        text = "local-clip " * 1000
+        client = make_client()
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: text)
+        sent: dict[str, Any] = {}
+
+        def fake_request(method, url, **kwargs):
+            sent.update(kwargs)
+            return FakeResponse(ok=True, headers={"Accept-Encoding": "gzip"})
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        client._push_clipboard()
+
+        assert sent["data"] == text.encode()
+        assert "headers" not in sent
+        assert client._clipboard_encodings == ("gzip",)
+
+    def test_push_over_the_size_limit_is_skipped(self, monkeypatch):
+        client = make_client(max_clipboard_size=4)
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: "local-clip")
+        request_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(client, "request", request_mock)
+
+        client._push_clipboard()
+
+        request_mock.assert_not_called()
+
+    def test_pull_decodes_a_compressed_response(self, monkeypatch):
+        text = "clip " * 1000
+        client = make_client()
+        monkeypatch.setattr(
+            client,
+            "request",
+            lambda *a, **k: FakeResponse(
+                content=gzip.compress(text.encode()),
+                headers={"Content-Encoding": "gzip"},
+            ),
+        )
+        copied: dict[str, Any] = {}
+        monkeypatch.setattr(
+            flow_client.pyperclip, "copy", lambda text: copied.update(text=text)
+        )
+
+        client._pull_clipboard()
+
+        assert copied["text"] == text
+        assert client._clipboard_etag == content_etag(text.encode())
+
+    def test_pull_over_the_size_limit_is_not_copied(self, monkeypatch):
+        client = make_client(max_clipboard_size=1024)
+        response = FakeResponse(
+            content=gzip.compress(b"\0" * 1024 * 1024),
+            headers={"Content-Encoding": "gzip"},
+        )
+        monkeypatch.setattr(client, "request", lambda *a, **k: response)
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_client.pyperclip, "copy", copy_mock)
+
+        client._pull_clipboard()
+
+        assert client._clipboard_etag is None
+        assert response.closed
+
+    def test_pull_sends_the_etag_it_holds_and_skips_the_copy_on_304(self, monkeypatch):
+        etag = content_etag(b"clip")
+        client = make_client(
+            leader_id="LEADER01", reconciler=Mock(), _clipboard_etag=etag
+        )
+        sent: dict[str, Any] = {}
+
+        def fake_request(method, url, **kwargs):
+            sent.update(headers=kwargs.get("headers"))
+            return FakeResponse(status_code=304)
+
+        monkeypatch.setattr(client, "request", fake_request)
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_client.pyperclip, "copy", copy_mock)
+
+        client._pull_clipboard()
+
+        assert sent["headers"] == {
+            "Accept-Encoding": "gzip, deflate",
+            "If-None-Match": f'"{etag}"',
+        }
+
+    def test_pull_remembers_the_etag_of_what_it_copied(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        monkeypatch.setattr(
+            client,
+            "request",
+            lambda *a, **k: FakeResponse(text="clip", headers={"ETag": '"abc"'}),
+        )
+        monkeypatch.setattr(flow_client.pyperclip, "copy", lambda text: None)
+
+        client._pull_clipboard()
+
+        assert client._clipboard_etag == "abc"
+
+    def test_announced_clipboard_is_prefetched_but_not_copied(self, monkeypatch):
+        client = make_client()
+        monkeypatch.setattr(
+            client, "request", lambda *a, **k: FakeResponse(text="clip")
+        )
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_client.pyperclip, "copy", copy_mock)
+        etag = content_etag(b"clip")
+
+        client._handle_event(
+            "clipboard-changed", json.dumps({"version": 1, "hash": etag}), "7"
+        )
+
+        assert client._prefetched_clipboard == (etag, b"clip")
+
+    def test_leader_connect_copies_the_prefetched_clipboard(self, monkeypatch):
+        etag = content_etag(b"clip")
+        client = make_client(
+            leader_id="LEADER01",
+            reconciler=Mock(),
+            _server_clipboard_etag=etag,
+            _prefetched_clipboard=(etag, b"clip"),
+        )
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        calls = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append((method, url, kwargs["headers"].get("If-None-Match")))
+            return FakeResponse(status_code=204, headers={"ETag": f'"{etag}"'})
+
+        monkeypatch.setattr(client, "request", fake_request)
+        copied: dict[str, Any] = {}
+        monkeypatch.setattr(
+            flow_client.pyperclip, "copy", lambda text: copied.update(text=text)
+        )
+
+        client.callback(receiver, connection_notification(1, connected=True))
+
+        assert calls == [("POST", client.build_url("arrival"), f'"{etag}"')]
+        assert copied["text"] == "clip"
+        assert client._clipboard_etag == etag
+        assert client._prefetched_clipboard is None
+
+    def test_leader_connect_copies_only_after_reporting_and_in_the_background(
+        self, monkeypatch
+    ):
+        held, etag = content_etag(b"held"), content_etag(b"clip")
+        background: list[Any] = []
+        client = make_client(
+            leader_id="LEADER01",
+            reconciler=Mock(),
+            _clipboard_etag=held,
+            _server_clipboard_etag=etag,
+            _prefetched_clipboard=(etag, b"clip"),
+            _fetch_in_background=background.append,
+        )
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        sent: list[str] = []
+        response = FakeResponse(status_code=204, headers={"ETag": f'"{etag}"'})
+
+        def fake_request(method, url, **kwargs):
+            sent.append(kwargs["headers"]["If-None-Match"])
+            return response
+
+        monkeypatch.setattr(client, "request", fake_request)
+        copy_mock = Mock()
+        monkeypatch.setattr(flow_client.pyperclip, "copy", copy_mock)
+
+        client.callback(receiver, connection_notification(1, connected=True))
+
+        assert sent == [f'"{held}", "{etag}"']
+        copy_mock.assert_not_called()
+        assert not response.closed
+        (receive,) = background
+        receive()
+        copy_mock.assert_called_once_with("clip")
+        assert response.closed
+
+    def test_background_fetches_run_one_at_a_time_on_one_thread(self):
+        client = FlowClient(
+            options=argparse.Namespace(host_number=2, server="myserver", port=24801)
+        )
+        running = threading.Lock()
+        threads: list[str] = []
+        done = threading.Event()
+
+        def fetch() -> None:
+            assert running.acquire(blocking=False), "ran alongside another"
+            threads.append(threading.current_thread().name)
+            time.sleep(0.01)
+            running.release()
+            if len(threads) == 3:
+                done.set()
+
+        for _ in range(3):
+            client._fetch_in_background(fetch)
+
+        assert done.wait(timeout=5)
+        assert len(set(threads)) == 1
+        client._clipboard_executor.shutdown()
+
+    def test_the_announcement_of_our_own_push_is_not_fetched(self, monkeypatch):
+        background: list[Any] = []
+        client = make_client(
+            leader_id="LEADER01",
+            reconciler=Mock(),
+            _fetch_in_background=background.append,
+        )
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: "local-clip")
+        etag = content_etag(b"local-clip")
+
+        def fake_request(method, url, **kwargs):
+            # Announced over /events before the `PUT` is answered.
+            client._clipboard_changed(etag)
+            return FakeResponse(ok=True)
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        client.callback(receiver, connection_notification(1, connected=False))
+
+        assert background == []
+        assert client._clipboard_etag == etag
+
+    def test_a_push_does_not_overwrite_a_copy_made_meanwhile(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(flow_client.pyperclip, "paste", lambda: "local-clip")
+        monkeypatch.setattr(flow_client.pyperclip, "copy", lambda text: None)
+        server_etag = content_etag(b"server-clip")
+
+        def fake_request(method, url, **kwargs):
+            client._copy_clipboard(server_etag, b"server-clip")
+            return FakeResponse(ok=True)
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        client.callback(receiver, connection_notification(1, connected=False))
+
+        assert client._clipboard_etag == server_etag
+
+    def test_a_newer_announcement_discards_the_prefetched_clipboard(self, monkeypatch):
+        old = content_etag(b"old")
+        client = make_client(
+            _server_clipboard_etag=old,
+            _prefetched_clipboard=(old, b"old"),
+            _fetch_in_background=lambda target: None,
+        )
+
+        client._clipboard_changed(content_etag(b"new"))
+
+        assert client._prefetched_clipboard is None
+
+    def test_follower_connect_fetches_in_the_background_without_a_prefetch(
+        self, monkeypatch
+    ):
+        background: list[Any] = []
+        client = make_client(
+            leader_id="LEADER01",
+            reconciler=Mock(),
+            _fetch_in_background=background.append,
+        )
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="FOLLOW01")
+        monkeypatch.setattr(client, "request", lambda *a, **k: FakeResponse())
+
+        client.callback(receiver, connection_notification(1, connected=True))
+
+        assert background == [client._pull_clipboard]
+
     def test_leader_connect_skips_the_clipboard_when_disabled(self, monkeypatch):
         reconciler = Mock()
         client = make_client(
@@ -346,8 +982,7 @@ class TestCallback:
 
         client.callback(receiver, connection_notification(1, connected=True))
 
-        assert ("PUT", client.build_url("leader-host")) in calls
-        assert ("GET", client.build_url("clipboard")) not in calls
+        assert calls == [("POST", client.build_url("arrival"))]
         copy_mock.assert_not_called()
 
     def test_leader_disconnect_skips_the_clipboard_when_disabled(self, monkeypatch):
@@ -425,6 +1060,68 @@ class TestHandleEvent:
         assert client.leader_host == 3
         reconciler.poke.assert_called_once()
 
+    def test_leader_host_delta_older_than_what_we_hold_is_dropped(self):
+        reconciler = Mock()
+        client = make_client(reconciler=reconciler)
+        client._handle_event("leader-host", "3", "20")
+        reconciler.poke.reset_mock()
+
+        client._handle_event("leader-host", "1", "19")
+
+        assert client.leader_host == 3
+        reconciler.poke.assert_not_called()
+
+    def test_duplicate_leader_host_delta_is_dropped(self):
+        reconciler = Mock()
+        client = make_client(reconciler=reconciler)
+        client._handle_event("leader-host", "3", "20")
+        reconciler.poke.reset_mock()
+
+        client._handle_event("leader-host", "3", "20")
+
+        reconciler.poke.assert_not_called()
+
+    def test_snapshot_applies_every_key(self):
+        reconciler = Mock()
+        client = make_client(reconciler=reconciler)
+
+        client._handle_event(
+            "snapshot", json.dumps({"leader-host": {"value": "4", "version": 7}}), "9"
+        )
+
+        assert client.leader_host == 4
+        assert client._state_versions == {"leader-host": 7}
+        reconciler.poke.assert_called_once()
+
+    def test_snapshot_replaces_versions_even_when_they_went_backwards(self):
+        # e.g. a restarted server, whose versions start over below ours.
+        client = make_client(reconciler=Mock())
+        client._handle_event("leader-host", "3", "500")
+
+        client._handle_event(
+            "snapshot", json.dumps({"leader-host": {"value": "2", "version": 7}}), "9"
+        )
+        client._handle_event("leader-host", "1", "10")
+
+        assert client.leader_host == 1
+
+    def test_snapshot_resets_versions_under_the_state_lock(self):
+        client = make_client(reconciler=Mock())
+        client._handle_event("leader-host", "3", "20")
+        snapshot = json.dumps({"leader-host": {"value": "1", "version": 5}})
+
+        with client._state_lock:
+            applier = threading.Thread(
+                target=client._handle_event, args=("snapshot", snapshot)
+            )
+            applier.start()
+            applier.join(timeout=0.05)
+            assert client._state_versions == {"leader-host": 20}
+        applier.join(timeout=5)
+
+        assert client._state_versions == {"leader-host": 5}
+        assert client.leader_host == 1
+
     def test_host_connected_only_prints(self):
         reconciler = Mock()
         client = make_client(reconciler=reconciler)
@@ -454,6 +1151,95 @@ class TestConsumeEvents:
         assert client.leader_host == 5
         fake_receiver.notify_devices.assert_called_once()
 
+    def test_remembers_the_last_event_id_and_sends_it_on_reconnect(self, monkeypatch):
+        client = make_client(reconciler=Mock())
+        client._stop = threading.Event()
+        client.local_receivers = []
+        stream = FakeResponse(
+            ok=True, lines=["id: 41", "event: leader-host", "data: 5", ""]
+        )
+        request_mock = Mock(return_value=stream)
+        monkeypatch.setattr(client, "request", request_mock)
+        sleeps: list[float] = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) >= 2:
+                client._stop.set()
+
+        monkeypatch.setattr(flow_client.time, "sleep", fake_sleep)
+
+        client._consume_events()
+
+        assert client._last_event_id == "41"
+        first_call, second_call = request_mock.call_args_list
+        assert "Last-Event-ID" not in first_call.kwargs["headers"]
+        assert second_call.kwargs["headers"]["Last-Event-ID"] == "41"
+
+    def test_does_not_renotify_local_receivers_when_resumed(self, monkeypatch):
+        client = make_client(reconciler=Mock(), _last_event_id="41")
+        client._stop = threading.Event()
+        fake_receiver = Mock()
+        client.local_receivers = [fake_receiver]
+        stream = FakeResponse(ok=True, lines=[], headers={RESUMED_HEADER: "1"})
+        monkeypatch.setattr(client, "request", Mock(return_value=stream))
+        monkeypatch.setattr(flow_client.time, "sleep", lambda s: client._stop.set())
+
+        client._consume_events()
+
+        fake_receiver.notify_devices.assert_not_called()
+
+    def test_a_report_that_failed_offline_is_sent_again_when_resumed(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        client.clipboard_enabled = False
+        client._stop = threading.Event()
+        client.local_receivers = []
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(
+            client,
+            "request",
+            Mock(side_effect=requests.exceptions.ConnectionError()),
+        )
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.callback(receiver, connection_notification(1, connected=True))
+        calls: list[tuple[str, str, Any]] = []
+
+        def fake_request(method, url, **kwargs):
+            calls.append((method, url, kwargs.get("data")))
+            if url == client.build_url("events"):
+                return FakeResponse(lines=[], headers={RESUMED_HEADER: "1"})
+            return FakeResponse(headers={VERSION_HEADER: "4"})
+
+        monkeypatch.setattr(client, "request", fake_request)
+        monkeypatch.setattr(flow_client.time, "sleep", lambda s: client._stop.set())
+
+        client._consume_events()
+
+        assert calls == [
+            ("GET", client.build_url("events"), None),
+            ("PUT", client.build_url("leader-host"), "2"),
+        ]
+        assert (client.leader_host, client.leader_host_provisional) == (2, False)
+        assert client._unsent_report is None
+
+    def test_a_failed_report_is_forgotten_once_the_leader_leaves(self, monkeypatch):
+        client = make_client(leader_id="LEADER01", reconciler=Mock())
+        client.clipboard_enabled = False
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+        monkeypatch.setattr(
+            client,
+            "request",
+            Mock(side_effect=requests.exceptions.ConnectionError()),
+        )
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.callback(receiver, connection_notification(1, connected=True))
+
+        client.callback(receiver, connection_notification(1, connected=False))
+
+        assert client._unsent_report is None
+
     def test_retries_with_growing_backoff_while_the_connection_stays_down(
         self, monkeypatch
     ):
@@ -567,6 +1353,216 @@ class TestConsumeEvents:
         assert observed == [True, False]
 
 
+class TestFailover:
+    def test_fails_over_to_a_standby_at_once_and_starts_afresh(
+        self, user_data_dir, monkeypatch
+    ):
+        set_host_certificate_and_token("standby", "PEM-DATA", "tok")
+        client = make_client(
+            reconciler=Mock(),
+            _last_event_id="41",
+            standby_servers=[("standby", 24802)],
+        )
+        client._stop = threading.Event()
+        client.local_receivers = []
+        urls: list[str] = []
+
+        def fake_request(method, url, **kwargs):
+            urls.append(url)
+            if len(urls) == 1:
+                raise requests.exceptions.ConnectionError()
+            assert "Last-Event-ID" not in kwargs["headers"]
+            client._stop.set()
+            return FakeResponse(ok=True, lines=[])
+
+        monkeypatch.setattr(client, "request", fake_request)
+        sleep_mock = Mock()
+        monkeypatch.setattr(flow_client.time, "sleep", sleep_mock)
+
+        client._consume_events()
+
+        assert urls == [
+            "https://myserver:24801/events",
+            "https://standby:24802/events",
+        ]
+        sleep_mock.assert_not_called()
+        assert client.build_url() == "https://standby:24802/"
+
+    def test_closes_the_sessions_it_replaces(self, user_data_dir, monkeypatch):
+        set_host_certificate_and_token("standby", "PEM-DATA", "tok")
+        old_session, old_events_session = Mock(), Mock()
+        client = make_client(
+            session=old_session,
+            events_session=old_events_session,
+            standby_servers=[("standby", 24802)],
+        )
+        monkeypatch.setattr(flow_client, "create_session", lambda cert: Mock())
+
+        client._use_server(1)
+
+        old_session.close.assert_called_once()
+        old_events_session.close.assert_called_once()
+        assert client.session is not old_session
+        assert client.events_session is not old_events_session
+
+    def test_backs_off_only_once_every_server_has_failed_in_turn(
+        self, user_data_dir, monkeypatch
+    ):
+        set_host_certificate_and_token("standby", "PEM-DATA", "tok")
+        client = make_client(reconciler=Mock(), standby_servers=[("standby", 24802)])
+        client._stop = threading.Event()
+        client.local_receivers = []
+        urls: list[str] = []
+
+        def fake_request(method, url, **kwargs):
+            urls.append(url)
+            raise requests.exceptions.ConnectionError()
+
+        monkeypatch.setattr(client, "request", fake_request)
+        sleeps: list[float] = []
+
+        def fake_sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) >= 2:
+                client._stop.set()
+
+        monkeypatch.setattr(flow_client.time, "sleep", fake_sleep)
+
+        client._consume_events()
+
+        assert urls == [
+            "https://myserver:24801/events",
+            "https://standby:24802/events",
+            "https://myserver:24801/events",
+            "https://standby:24802/events",
+        ]
+        assert sleeps == [
+            flow_client.EVENTS_MIN_BACKOFF,
+            flow_client.EVENTS_MIN_BACKOFF * 2,
+        ]
+
+    def test_skips_standbys_whose_certificate_is_unknown(
+        self, user_data_dir, monkeypatch
+    ):
+        client = make_client(reconciler=Mock(), standby_servers=[("standby", 24802)])
+        client._stop = threading.Event()
+        client.local_receivers = []
+        request_mock = Mock(side_effect=requests.exceptions.ConnectionError())
+        monkeypatch.setattr(client, "request", request_mock)
+        monkeypatch.setattr(flow_client.time, "sleep", lambda s: client._stop.set())
+
+        client._consume_events()
+
+        (call,) = request_mock.call_args_list
+        assert call.args[1] == "https://myserver:24801/events"
+
+    def test_learns_standbys_and_their_certificates_from_the_server(
+        self, user_data_dir
+    ):
+        client = make_client(reconciler=Mock(), token="tok")
+        standbys = [
+            {"address": "standby", "port": 24802, "certificate": "PEM-DATA"},
+            {"address": "myserver", "port": 24801, "certificate": "OURS"},
+        ]
+
+        client._handle_event("standbys", json.dumps(standbys), "7")
+
+        assert client.standby_servers == [("standby", 24802)]
+        assert (user_data_dir / "standby.cert").read_text() == "PEM-DATA"
+
+
+class TestMulticast:
+    def announcement(self, host: int, base_version: int) -> Announcement:
+        return Announcement(host, b"S" * 16, 1, base_version)
+
+    def test_leader_arrival_is_announced_before_it_is_reported(self, monkeypatch):
+        multicast = Mock()
+        client = make_client(
+            leader_id="LEADER01", reconciler=Mock(), multicast=multicast
+        )
+        client.clipboard_enabled = False
+        client._handle_event("leader-host", "1", "40")
+        receiver = Mock()
+        receiver.get_device.return_value = types.SimpleNamespace(id="LEADER01")
+
+        def fake_request(method, url, **kwargs):
+            multicast.announce.assert_called_once_with(2, 40)
+            return FakeResponse(status_code=204, headers={VERSION_HEADER: "41"})
+
+        monkeypatch.setattr(client, "request", fake_request)
+
+        client.callback(receiver, connection_notification(1, connected=True))
+
+        multicast.announce.assert_called_once()
+
+    def test_an_announcement_moves_followers_until_the_server_confirms_it(self):
+        reconciler = Mock()
+        client = make_client(reconciler=reconciler, multicast=Mock())
+        client._handle_event("leader-host", "1", "40")
+        reconciler.poke.reset_mock()
+        won = FAST_PATH.labels("multicast").value
+
+        client._multicast_announced(self.announcement(3, 40))
+
+        assert (client.leader_host, client.leader_host_provisional) == (3, True)
+        reconciler.poke.assert_called_once()
+
+        client._handle_event("leader-host", "3", "41")
+
+        assert (client.leader_host, client.leader_host_provisional) == (3, False)
+        reconciler.poke.assert_called_once()
+        assert FAST_PATH.labels("multicast").value == won + 1
+
+    def test_an_announcement_from_before_what_the_server_said_is_ignored(self):
+        reconciler = Mock()
+        client = make_client(reconciler=reconciler, multicast=Mock())
+        client._handle_event("leader-host", "1", "40")
+        client._handle_event("leader-host", "4", "41")
+        reconciler.poke.reset_mock()
+        lost = FAST_PATH.labels("sse").value
+
+        client._multicast_announced(self.announcement(3, 40))
+
+        assert client.leader_host == 4
+        reconciler.poke.assert_not_called()
+        # Counted when the server's change to 4 arrived, with nothing heard.
+        assert FAST_PATH.labels("sse").value == lost
+
+    def test_the_server_saying_otherwise_wins(self):
+        reconciler = Mock()
+        client = make_client(reconciler=reconciler, multicast=Mock())
+        client._handle_event("leader-host", "1", "40")
+        client._multicast_announced(self.announcement(3, 40))
+        reconciler.poke.reset_mock()
+        lost = FAST_PATH.labels("sse").value
+
+        client._handle_event("leader-host", "4", "41")
+
+        assert (client.leader_host, client.leader_host_provisional) == (4, False)
+        reconciler.poke.assert_called_once()
+        assert FAST_PATH.labels("sse").value == lost + 1
+
+    def test_an_unconfirmed_announcement_gives_way_to_the_server(self):
+        client = make_client(reconciler=Mock(), multicast=Mock())
+        client._handle_event("leader-host", "1", "40")
+        client._multicast_announced(self.announcement(3, 40))
+        heard = client._multicast_heard
+        assert heard is not None
+
+        client._expire_multicast(heard)
+
+        assert (client.leader_host, client.leader_host_provisional) == (1, False)
+
+    def test_ignored_while_our_own_arrival_awaits_the_server(self):
+        client = make_client(reconciler=Mock(), multicast=Mock())
+        client._handle_event("leader-host", "1", "40")
+        client._apply_local_arrival()
+
+        client._multicast_announced(self.announcement(3, 40))
+
+        assert client.leader_host == 2
+
+
 class TestBuildStatus:
     def test_reflects_leader_host_and_follower_connection_state(self):
         # A hashable stand-in -- `_connected` is keyed by device, and
@@ -615,7 +1611,7 @@ class TestPublishStatus:
 
         client._publish_status()
 
-        tui.update_status.assert_called_once()
+        tui.publish_status.assert_called_once()
 
 
 class TestStartBackgroundThreads:
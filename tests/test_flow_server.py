@@ -1,3 +1,6 @@
+import gzip
+import json
+import sqlite3
 import threading
 import time
 from unittest.mock import Mock
@@ -8,14 +11,27 @@ import pytest
 from hidpp_fakes import ScriptedReply
 from hidpp_fakes import ScriptedTransport
 from hidpp_fakes import register_matcher
+from logitech_flow_kvm.clipboard import content_etag
 from logitech_flow_kvm.commands import flow_server
+from logitech_flow_kvm.commands.flow_server import AUTH_TOKEN_LOOKUPS
+from logitech_flow_kvm.commands.flow_server import CLIPBOARD_BYTES
+from logitech_flow_kvm.commands.flow_server import FIRST_SUBSCRIBER
+from logitech_flow_kvm.commands.flow_server import LEADER_HOST_REPORTS
 from logitech_flow_kvm.commands.flow_server import FlowServerAPI
 from logitech_flow_kvm.commands.flow_server import bind_routes
 from logitech_flow_kvm.hidpp.models import Notification
 from logitech_flow_kvm.hidpp.models import ReceiverInfo
 from logitech_flow_kvm.hidpp.receiver import PairedDevice
 from logitech_flow_kvm.hidpp.receiver import Receiver
+from logitech_flow_kvm.multicast import MulticastChannel
 from logitech_flow_kvm.reconciler import Reconciler
+from logitech_flow_kvm.sse import OBSERVATION_HEADER
+from logitech_flow_kvm.sse import RESUMED_HEADER
+from logitech_flow_kvm.sse import SNAPSHOT_EVENT
+from logitech_flow_kvm.sse import VALUE_HEADER
+from logitech_flow_kvm.sse import VERSION_HEADER
+from logitech_flow_kvm.sse import ObservationStamp
+from logitech_flow_kvm.sse import format_sse
 
 RECEIVER_INFO = ReceiverInfo(
     path="/dev/hidraw4", product_id=0xC548, kind="bolt", interface=2
@@ -133,6 +149,52 @@ class TestReportLeaderHost:
     def test_desired_host_is_none_before_any_report(self, app):
         assert app._get_desired_host() is None
 
+    def test_an_older_observation_is_ignored(self, app):
+        applied = app.report_leader_host(
+            3, reporter="3", stamp=ObservationStamp("a", 1, 0.0)
+        )
+
+        # Observed (5s ago) before host 3's report, but arrived after it.
+        result = app.report_leader_host(
+            2, reporter="2", stamp=ObservationStamp("b", 1, 5.0)
+        )
+
+        assert result == applied
+        assert app._get_desired_host() == 3
+        assert app.events.last_event_id == applied.version
+
+    def test_a_repeated_report_is_applied_once(self, app):
+        stamp = ObservationStamp("a", 1, 0.0)
+        applied = app.report_leader_host(2, reporter="2", stamp=stamp)
+        app.reconciler._wake.clear()
+
+        assert app.report_leader_host(2, reporter="2", stamp=stamp) == applied
+        assert not app.reconciler._wake.is_set()
+
+    def test_an_earlier_report_from_the_same_reporter_is_ignored(self, app):
+        app.report_leader_host(2, reporter="2", stamp=ObservationStamp("a", 5, 0.0))
+        app.report_leader_host(3, reporter="3")
+
+        app.report_leader_host(2, reporter="2", stamp=ObservationStamp("a", 4, 0.0))
+
+        assert app._get_desired_host() == 3
+
+    def test_a_restarted_reporter_numbers_its_reports_afresh(self, app):
+        app.report_leader_host(2, reporter="2", stamp=ObservationStamp("a", 5, 0.0))
+        app.report_leader_host(3, reporter="3")
+
+        app.report_leader_host(2, reporter="2", stamp=ObservationStamp("b", 1, 0.0))
+
+        assert app._get_desired_host() == 2
+
+    def test_outcomes_are_counted(self, app):
+        stale = LEADER_HOST_REPORTS.labels("stale").value
+        app.report_leader_host(3)
+
+        app.report_leader_host(2, reporter="2", stamp=ObservationStamp("a", 1, 5.0))
+
+        assert LEADER_HOST_REPORTS.labels("stale").value == stale + 1
+
 
 class TestCallback:
     def test_leader_connect_reports_leader_host(self, app, leader_device):
@@ -140,11 +202,56 @@ class TestCallback:
 
         assert app._get_desired_host() == app.host_number
 
+    def test_leader_connect_is_announced_before_it_is_reported(
+        self, app, leader_device
+    ):
+        version = app.report_leader_host(3).version
+        announced: list[tuple[int, int, int | None]] = []
+        app.multicast = Mock()
+        app.multicast.announce.side_effect = lambda host, base_version: (
+            announced.append((host, base_version, app._get_desired_host()))
+        )
+
+        app.callback(leader_device.receiver, connect_notification(leader_device))
+
+        assert announced == [(app.host_number, version, 3)]
+        assert app._get_desired_host() == app.host_number
+
     def test_leader_disconnect_does_not_report_anything(self, app, leader_device):
         app.callback(leader_device.receiver, disconnect_notification(leader_device))
 
         assert app._get_desired_host() is None
 
+    def test_leader_disconnect_announces_a_changed_clipboard(
+        self, app, leader_device, monkeypatch
+    ):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+
+        app.callback(leader_device.receiver, disconnect_notification(leader_device))
+        app._clipboard_executor.submit(lambda: None).result(timeout=5)
+
+        assert json.loads(app.events.get_state("clipboard-changed")) == {
+            "version": 1,
+            "hash": content_etag(b"server-clip"),
+        }
+
+    def test_leader_disconnect_does_not_wait_on_the_clipboard(
+        self, app, leader_device, monkeypatch
+    ):
+        pasted = threading.Event()
+        monkeypatch.setattr(
+            flow_server.pyperclip,
+            "paste",
+            lambda: "server-clip" if pasted.wait(timeout=5) else "",
+        )
+
+        app.callback(leader_device.receiver, disconnect_notification(leader_device))
+
+        assert app.events.get_state("clipboard-changed") is None
+        pasted.set()
+        app._clipboard_executor.submit(lambda: None).result(timeout=5)
+        assert app.events.get_state("clipboard-changed") is not None
+
     def test_follower_connect_is_observed_by_the_reconciler(self, app, follower_device):
         app.callback(follower_device.receiver, connect_notification(follower_device))
 
@@ -184,24 +291,24 @@ class TestCallback:
         app.tui = Mock()
 
         app.callback(leader_device.receiver, connect_notification(leader_device))
-        assert app.tui.update_status.call_count == 1
+        assert app.tui.publish_status.call_count == 1
 
         app.callback(leader_device.receiver, disconnect_notification(leader_device))
-        assert app.tui.update_status.call_count == 2
+        assert app.tui.publish_status.call_count == 2
 
     def test_follower_connect_and_disconnect_publish_status(self, app, follower_device):
         app.tui = Mock()
 
         app.callback(follower_device.receiver, connect_notification(follower_device))
-        assert app.tui.update_status.call_count == 1
+        assert app.tui.publish_status.call_count == 1
 
         app.callback(follower_device.receiver, disconnect_notification(follower_device))
-        assert app.tui.update_status.call_count == 2
+        assert app.tui.publish_status.call_count == 2
 
     def test_does_not_publish_status_without_a_tui(self, app, follower_device):
         assert app.tui is None
 
-        # Would raise if it tried to call `update_status` on `None`.
+        # Would raise if it tried to call `publish_status` on `None`.
         app.callback(follower_device.receiver, connect_notification(follower_device))
 
 
@@ -241,6 +348,88 @@ class TestBuildStatus:
         assert app._build_status().desired_host == 3
 
 
+class TestStartup:
+    def test_every_receiver_has_notifications_enabled_once(self):
+        transports = [_receiver_transport(), _receiver_transport()]
+        leader_receiver = Receiver(RECEIVER_INFO, transport=transports[0])
+        follower_receiver = Receiver(RECEIVER_INFO, transport=transports[1])
+        devices = [
+            PairedDevice(
+                receiver=receiver,
+                number=number,
+                wpid="0000",
+                kind="mouse",
+                serial=f"SERIAL{number}",
+                codename=None,
+            )
+            for number, receiver in [
+                (1, leader_receiver),
+                (2, follower_receiver),
+                (3, follower_receiver),
+            ]
+        ]
+
+        api = FlowServerAPI(
+            __name__,
+            host_number=1,
+            leader_device=devices[0],
+            follower_devices=devices[1:],
+            hostnames=[],
+            binding_interface="0.0.0.0",
+            port=24801,
+        )
+
+        assert len(api.listeners) == 2
+        # Enabling notifications, then asking for every device's status.
+        assert [len(transport.writes) for transport in transports] == [2, 2]
+        assert [phase.name for phase in api.startup.phases] == ["notifications"]
+
+    def test_uses_an_already_open_token_database(self, leader_device, tmp_path):
+        db = flow_server.open_token_db()
+
+        api = FlowServerAPI(
+            __name__,
+            host_number=1,
+            leader_device=leader_device,
+            follower_devices=[],
+            hostnames=[],
+            binding_interface="0.0.0.0",
+            port=24801,
+            db=db,
+        )
+
+        assert api.db is db
+
+    def test_the_first_events_connection_is_a_milestone(self, app):
+        first = app.open_event_stream("A", None)
+        at = app.startup.milestones[FIRST_SUBSCRIBER]
+        second = app.open_event_stream("B", None)
+
+        assert app.startup.milestones[FIRST_SUBSCRIBER] == at
+        app.close_event_stream(first)
+        app.close_event_stream(second)
+
+    def test_startup_timings_are_reported_as_metrics(self, app):
+        subscription = app.open_event_stream("A", None)
+
+        lines = app.render_metrics().splitlines()
+
+        assert any(
+            line.startswith(
+                'logitech_flow_kvm_startup_phase_seconds{phase="notifications"} '
+            )
+            for line in lines
+        )
+        assert any(
+            line.startswith(
+                "logitech_flow_kvm_startup_milestone_seconds"
+                '{milestone="first /events connection"} '
+            )
+            for line in lines
+        )
+        app.close_event_stream(subscription)
+
+
 class TestStartBackgroundThreads:
     def test_starts_the_reconciler_and_every_listener(self, app):
         app.reconciler.start = Mock()
@@ -258,6 +447,200 @@ def _auth_headers(app, name: str) -> dict[str, str]:
     return {"Authorization": f"Bearer {token}"}
 
 
+def _reopen(app) -> FlowServerAPI:
+    """A fresh FlowServerAPI over the same token database, as after a restart."""
+    return FlowServerAPI(
+        __name__,
+        host_number=app.host_number,
+        leader_device=app.leader_device,
+        follower_devices=app.follower_devices,
+        hostnames=[],
+        binding_interface="0.0.0.0",
+        port=24801,
+    )
+
+
+class TestAuthTokens:
+    def test_issued_tokens_verify_as_their_name(self, app):
+        token = app.create_new_auth_token("2")
+
+        assert app.verify_auth_token(token) == "2"
+
+    def test_unknown_tokens_do_not_verify(self, app):
+        app.create_new_auth_token("2")
+
+        assert app.verify_auth_token("not-a-token") is False
+
+    def test_reissuing_replaces_the_previous_token(self, app):
+        old = app.create_new_auth_token("2")
+        new = app.create_new_auth_token("2")
+
+        assert app.verify_auth_token(old) is False
+        assert app.verify_auth_token(new) == "2"
+
+    def test_verification_never_touches_the_database(self, app):
+        token = app.create_new_auth_token("2")
+        app.db.close()
+
+        assert app.verify_auth_token(token) == "2"
+
+    def test_only_hashes_are_stored(self, app):
+        token = app.create_new_auth_token("2")
+
+        rows = app.db.execute("SELECT * FROM tokens").fetchall()
+
+        assert rows and all(token not in row for row in rows)
+
+    def test_tokens_survive_a_restart(self, app):
+        token = app.create_new_auth_token("2")
+        app.db.close()
+
+        assert _reopen(app).verify_auth_token(token) == "2"
+
+    def test_plaintext_tokens_from_older_versions_are_migrated(self, app, tmp_path):
+        app.db.close()
+        db = sqlite3.connect(tmp_path / "tokens.db")
+        db.executescript(
+            """
+            DROP TABLE tokens;
+            CREATE TABLE tokens (name string primary key, token string);
+            INSERT INTO tokens VALUES ('2', 'legacy-token');
+            PRAGMA user_version = 0;
+        """
+        )
+        db.close()
+
+        reopened = _reopen(app)
+
+        assert reopened.verify_auth_token("legacy-token") == "2"
+        assert (
+            reopened.db.execute("PRAGMA user_version").fetchone()[0]
+            == flow_server.TOKEN_SCHEMA_VERSION
+        )
+        assert reopened.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'tokens_token_hash'"
+        ).fetchone()
+
+
+class TestLeaderHostPersistence:
+    def test_the_leader_host_survives_a_restart_as_provisional(self, app):
+        app.report_leader_host(2)
+        app.flush_leader_host()
+        app.db.close()
+
+        reopened = _reopen(app)
+
+        assert reopened._get_desired_host() == 2
+        assert reopened.leader_host_provisional is True
+        # A subscriber's very first snapshot already has it.
+        (snapshot,) = reopened.events.subscribe().initial
+        assert snapshot.encode() == _leader_host_snapshot(reopened, 2)
+
+    def test_restored_versions_are_newer_than_the_last_runs(self, app):
+        version = app.report_leader_host(2).version
+        app.flush_leader_host()
+        app.db.close()
+
+        reopened = _reopen(app)
+
+        assert reopened.events.state["leader-host"].version > version
+
+    def test_the_next_report_confirms_or_replaces_it(self, app):
+        app.report_leader_host(2)
+        app.flush_leader_host()
+        app.db.close()
+        reopened = _reopen(app)
+
+        reopened.report_leader_host(3)
+
+        assert reopened.leader_host_provisional is False
+        reopened.flush_leader_host()
+        reopened.db.close()
+        assert _reopen(reopened)._get_desired_host() == 3
+
+    def test_reports_are_answered_without_waiting_on_the_database(self, app):
+        def report() -> None:
+            app.report_leader_host(2)
+            app.report_leader_host(3)
+
+        with app.db_lock:
+            reporter = threading.Thread(target=report, daemon=True)
+            reporter.start()
+            reporter.join(timeout=5)
+            assert not reporter.is_alive()
+
+        app.flush_leader_host()
+        assert app.db.execute(
+            "SELECT value FROM state WHERE key = 'leader-host'"
+        ).fetchone() == ("3",)
+
+    def test_only_the_latest_of_a_burst_of_reports_is_written(self, app, monkeypatch):
+        written: list[int] = []
+        write = app._write_leader_host
+
+        def record(host, version):
+            written.append(host)
+            write(host, version)
+
+        monkeypatch.setattr(app, "_write_leader_host", record)
+        with app.db_lock:
+            for host in (2, 3, 4):
+                app.report_leader_host(host)
+            time.sleep(0.05)  # the first has been picked up, and waits
+
+        app.flush_leader_host()
+        assert written[-1] == 4
+        assert len(written) <= 2
+
+    def test_nothing_is_restored_on_first_run(self, app):
+        assert app._get_desired_host() is None
+        assert app.leader_host_provisional is False
+
+    def test_an_older_version_never_overwrites_a_newer_one(self, app):
+        app.report_leader_host(3)
+
+        app._persist_leader_host(2, version=1)
+        app.flush_leader_host()
+
+        assert app.db.execute(
+            "SELECT value FROM state WHERE key = 'leader-host'"
+        ).fetchone() == ("3",)
+
+    def test_the_multicast_secret_survives_a_restart(self, app):
+        secret = app.multicast_secret()
+        app.db.close()
+
+        assert _reopen(app).multicast_secret() == secret
+
+    def test_the_multicast_secret_is_kept_apart_from_the_state(self, app):
+        secret = app.multicast_secret()
+
+        assert app.db.execute("SELECT key FROM state").fetchall() == []
+        assert app.db.execute("SELECT name, value FROM secrets").fetchall() == [
+            ("multicast", secret)
+        ]
+
+    def test_a_multicast_secret_kept_as_state_is_migrated(self, app, tmp_path):
+        app.db.close()
+        db = sqlite3.connect(tmp_path / "tokens.db")
+        db.executescript(
+            """
+            DROP TABLE secrets;
+            INSERT INTO state VALUES ('multicast-secret', 'legacy-secret', 0, 0);
+            PRAGMA user_version = 3;
+        """
+        )
+        db.close()
+
+        reopened = _reopen(app)
+
+        assert reopened.multicast_secret() == "legacy-secret"
+        assert reopened.db.execute("SELECT key FROM state").fetchall() == []
+
+    def test_the_database_uses_a_write_ahead_log(self, app):
+        assert app.db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+
 class TestConfigurationRoute:
     def test_returns_leader_and_follower_ids(self, app, leader_device, follower_device):
         client = app.test_client()
@@ -270,6 +653,21 @@ class TestConfigurationRoute:
             "followers": [follower_device.id],
         }
 
+    def test_includes_the_multicast_channel_when_enabled(self, app):
+        app.multicast = MulticastChannel(
+            app.multicast_secret(), group="239.255.70.76", port=24801
+        )
+        client = app.test_client()
+
+        response = client.get("/configuration", headers=_auth_headers(app, "1"))
+
+        assert response.json["multicast"] == {
+            "group": "239.255.70.76",
+            "port": 24801,
+            "secret": app.multicast_secret(),
+        }
+        app.multicast.close()
+
     def test_requires_authentication(self, app):
         client = app.test_client()
 
@@ -289,16 +687,143 @@ class TestLeaderHostRoute:
         assert response.status_code == 200
         assert app._get_desired_host() == 2
 
+    def test_an_older_observation_answers_with_what_is_held(self, app):
+        held = app.report_leader_host(3)
+        client = app.test_client()
+
+        response = client.put(
+            "/leader-host",
+            data=b"2",
+            headers={
+                **_auth_headers(app, "2"),
+                OBSERVATION_HEADER: ObservationStamp("a", 1, 5.0).format(),
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.headers[VALUE_HEADER] == "3"
+        assert response.headers[VERSION_HEADER] == str(held.version)
+        assert app._get_desired_host() == 3
+
+
+def _sse(app, event: str, data: str) -> bytes:
+    """The wire form of the most recent event `app` published."""
+    return format_sse(event, data, id=app.events.last_event_id).encode()
+
+
+def _leader_host_snapshot(app, host: int) -> bytes:
+    version = app.events.state["leader-host"].version
+    data = json.dumps({"leader-host": {"value": str(host), "version": version}})
+    return format_sse(SNAPSHOT_EVENT, data, id=app.events.last_event_id).encode()
+
+
+class TestMetricsRoute:
+    def test_requires_authentication(self, app):
+        response = app.test_client().get("/metrics")
+
+        assert response.status_code == 401
+
+    def test_reports_event_stream_and_process_metrics(self, app):
+        subscription = app.events.subscribe(name="2")
+        app.report_leader_host(2)
+        client = app.test_client()
+
+        response = client.get("/metrics", headers=_auth_headers(app, "1"))
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        lines = response.text.splitlines()
+        assert "logitech_flow_kvm_sse_subscribers 1" in lines
+        assert 'logitech_flow_kvm_sse_queued_events{subscriber="2"} 1' in lines
+        assert "# TYPE logitech_flow_kvm_hidpp_request_duration_seconds histogram" in (
+            lines
+        )
+        assert "# TYPE logitech_flow_kvm_reconciler_switch_attempts counter" in lines
+        app.events.unsubscribe(subscription.queue)
+
+    def test_counts_valid_and_invalid_tokens(self, app):
+        client = app.test_client()
+        valid = AUTH_TOKEN_LOOKUPS.labels("valid").value
+        invalid = AUTH_TOKEN_LOOKUPS.labels("invalid").value
+
+        client.get("/configuration", headers=_auth_headers(app, "1"))
+        client.get("/configuration", headers={"Authorization": "Bearer nope"})
+
+        assert AUTH_TOKEN_LOOKUPS.labels("valid").value == valid + 1
+        assert AUTH_TOKEN_LOOKUPS.labels("invalid").value == invalid + 1
+
+    def test_counts_clipboard_bytes_in_each_direction(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        monkeypatch.setattr(flow_server.pyperclip, "copy", lambda text: None)
+        client = app.test_client()
+        sent = CLIPBOARD_BYTES.labels("sent").value
+        received = CLIPBOARD_BYTES.labels("received").value
+
+        client.get("/clipboard", headers=_auth_headers(app, "2"))
+        client.put("/clipboard", data=b"from-client", headers=_auth_headers(app, "2"))
+
+        assert CLIPBOARD_BYTES.labels("sent").value == sent + len(b"server-clip")
+        assert CLIPBOARD_BYTES.labels("received").value == received + len(
+            b"from-client"
+        )
+
+
+class TestArrivalRoute:
+    def test_reports_the_leader_host_and_returns_the_clipboard(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        client = app.test_client()
+
+        response = client.post("/arrival", data=b"2", headers=_auth_headers(app, "2"))
+
+        assert response.status_code == 200
+        assert response.text == "server-clip"
+        assert response.headers["ETag"] == f'"{content_etag(b"server-clip")}"'
+        assert app._get_desired_host() == 2
+        assert response.headers[VERSION_HEADER] == str(
+            app.events.state["leader-host"].version
+        )
+
+    def test_omits_a_clipboard_the_client_already_holds(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        client = app.test_client()
+        headers = {
+            **_auth_headers(app, "2"),
+            "If-None-Match": f'"{content_etag(b"server-clip")}"',
+        }
+
+        response = client.post("/arrival", data=b"2", headers=headers)
+
+        assert response.status_code == 204
+        assert app._get_desired_host() == 2
+
+    def test_omits_the_clipboard_when_disabled(self, app, monkeypatch):
+        app.clipboard_enabled = False
+        paste_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_server.pyperclip, "paste", paste_mock)
+        client = app.test_client()
+
+        response = client.post("/arrival", data=b"2", headers=_auth_headers(app, "2"))
+
+        assert response.status_code == 204
+        assert app._get_desired_host() == 2
+
+    def test_requires_authentication(self, app):
+        response = app.test_client().post("/arrival", data=b"2")
+
+        assert response.status_code == 401
+        assert app._get_desired_host() is None
+
 
 class TestEventsRoute:
     def test_new_subscriber_immediately_receives_the_current_state(self, app):
         app.report_leader_host(2)
+        expected = _leader_host_snapshot(app, 2)
         client = app.test_client()
 
         response = client.get("/events", headers=_auth_headers(app, "A"))
         first_chunk = next(response.response)
 
-        assert first_chunk == b"event: leader-host\ndata: 2\n\n"
+        assert first_chunk == expected
         response.response.close()
 
     def test_a_second_subscriber_triggers_a_host_connected_broadcast(self, app):
@@ -311,7 +836,7 @@ class TestEventsRoute:
         response_b = client.get("/events", headers=_auth_headers(app, "B"))
 
         second_chunk_for_a = next(response_a.response)
-        assert second_chunk_for_a == b"event: host-connected\ndata: B\n\n"
+        assert second_chunk_for_a == _sse(app, "host-connected", "B")
 
         response_a.response.close()
         response_b.response.close()
@@ -325,7 +850,7 @@ class TestEventsRoute:
 
         app.report_leader_host(3)
 
-        assert next(response.response) == b"event: leader-host\ndata: 3\n\n"
+        assert next(response.response) == _sse(app, "leader-host", "3")
         response.response.close()
 
     def test_closing_the_stream_unsubscribes_it(self, app):
@@ -333,21 +858,47 @@ class TestEventsRoute:
         client = app.test_client()
 
         response = client.get("/events", headers=_auth_headers(app, "A"))
-        # Advance the generator past its first (non-blocking, since state is
-        # already set) yield so it's actually suspended inside the try/finally
+        # Advance the generator past its first (non-blocking, since it's the
+        # initial snapshot) yield so it's actually suspended inside the try/finally
         # before closing it -- closing a never-started generator wouldn't run
         # the `finally: app.events.unsubscribe(...)` cleanup at all.
         next(response.response)
         response.response.close()
 
+    def test_reconnecting_with_last_event_id_replays_missed_events(self, app):
+        app.report_leader_host(2)
+        seen = app.events.last_event_id
+        app.report_leader_host(3)
+        client = app.test_client()
+        headers = {**_auth_headers(app, "A"), "Last-Event-ID": str(seen)}
+
+        response = client.get("/events", headers=headers)
+
+        assert response.headers[RESUMED_HEADER] == "1"
+        assert (
+            next(response.response)
+            == format_sse("leader-host", "3", id=seen + 1).encode()
+        )
+        response.response.close()
+
+    def test_an_unknown_last_event_id_falls_back_to_a_snapshot(self, app):
+        app.report_leader_host(2)
+        expected = _leader_host_snapshot(app, 2)
+        client = app.test_client()
+        headers = {**_auth_headers(app, "A"), "Last-Event-ID": "not-a-number"}
+
+        response = client.get("/events", headers=headers)
+
+        assert RESUMED_HEADER not in response.headers
+        assert next(response.response) == expected
+        response.response.close()
+
 
 class TestConnectedGuests:
-    # Every test here sets the leader host before opening /events, exactly
-    # like TestEventsRoute above -- with no state set yet, the stream's
-    # first chunk blocks on the 15s keepalive wait, and Flask's test client
-    # drives at least one chunk of the generator during `client.get()`
-    # itself (not just on an explicit `next()`), so skipping this makes
-    # every test in this class slow instead of just wrong.
+    # Flask's test client drives at least one chunk of the generator during
+    # `client.get()` itself (not just on an explicit `next()`). That chunk is
+    # always the initial snapshot, so it never blocks on the 15s keepalive
+    # wait; the leader host is set first just so there's state to snapshot.
 
     def test_subscribing_adds_the_authenticated_host_to_the_roster(self, app):
         app.report_leader_host(2)
@@ -374,12 +925,12 @@ class TestConnectedGuests:
         client = app.test_client()
 
         response = client.get("/events", headers=_auth_headers(app, "2"))
-        assert app.tui.update_status.call_count == 1
+        assert app.tui.publish_status.call_count == 1
         next(response.response)  # advance past the initial snapshot
 
         response.response.close()
 
-        assert app.tui.update_status.call_count == 2
+        assert app.tui.publish_status.call_count == 2
 
     def test_build_status_reflects_connected_guests(self, app):
         app.report_leader_host(2)
@@ -403,6 +954,7 @@ class TestClipboardRoute:
 
     def test_put_sets_the_local_clipboard_when_enabled(self, app, monkeypatch):
         copied: dict[str, str] = {}
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
         monkeypatch.setattr(
             flow_server.pyperclip, "copy", lambda text: copied.update(text=text)
         )
@@ -415,6 +967,143 @@ class TestClipboardRoute:
         assert response.status_code == 200
         assert copied["text"] == "from-client"
 
+    def test_get_tags_the_clipboard_with_its_content_hash(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        client = app.test_client()
+
+        response = client.get("/clipboard", headers=_auth_headers(app, "2"))
+
+        assert response.headers["ETag"] == f'"{content_etag(b"server-clip")}"'
+
+    def test_get_is_not_modified_when_the_client_already_has_it(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        client = app.test_client()
+        headers = {
+            **_auth_headers(app, "2"),
+            "If-None-Match": f'"{content_etag(b"server-clip")}"',
+        }
+
+        response = client.get("/clipboard", headers=headers)
+
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_get_is_sent_in_full_once_the_clipboard_changed(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "newer-clip")
+        client = app.test_client()
+        headers = {
+            **_auth_headers(app, "2"),
+            "If-None-Match": f'"{content_etag(b"server-clip")}"',
+        }
+
+        response = client.get("/clipboard", headers=headers)
+
+        assert response.status_code == 200
+        assert response.text == "newer-clip"
+
+    def test_put_of_unchanged_contents_is_a_no_op(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "same-clip")
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_server.pyperclip, "copy", copy_mock)
+        client = app.test_client()
+
+        response = client.put(
+            "/clipboard", data=b"same-clip", headers=_auth_headers(app, "2")
+        )
+
+        assert response.status_code == 204
+        assert response.headers["ETag"] == f'"{content_etag(b"same-clip")}"'
+
+    def test_put_with_a_stale_if_match_is_rejected(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "newer-clip")
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_server.pyperclip, "copy", copy_mock)
+        client = app.test_client()
+        headers = {
+            **_auth_headers(app, "2"),
+            "If-Match": f'"{content_etag(b"server-clip")}"',
+        }
+
+        response = client.put("/clipboard", data=b"from-client", headers=headers)
+
+        assert response.status_code == 412
+
+    def test_put_announces_the_new_clipboard_once(self, app, monkeypatch):
+        clipboard = {"text": "server-clip"}
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: clipboard["text"])
+        monkeypatch.setattr(
+            flow_server.pyperclip, "copy", lambda text: clipboard.update(text=text)
+        )
+        client = app.test_client()
+
+        client.put("/clipboard", data=b"from-client", headers=_auth_headers(app, "2"))
+        announced = app.events.last_event_id
+        client.put("/clipboard", data=b"from-client", headers=_auth_headers(app, "2"))
+
+        assert app.events.last_event_id == announced
+        assert json.loads(app.events.get_state("clipboard-changed")) == {
+            "version": 2,  # the first was the server's own, seen before the PUT
+            "hash": content_etag(b"from-client"),
+        }
+
+    def test_get_is_compressed_when_the_client_accepts_it(self, app, monkeypatch):
+        text = "server-clip " * 1000
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: text)
+        client = app.test_client()
+        headers = {**_auth_headers(app, "2"), "Accept-Encoding": "gzip"}
+
+        response = client.get("/clipboard", headers=headers)
+
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.data) == text.encode()
+        assert response.headers["ETag"] == f'"{content_etag(text.encode())}"'
+
+    def test_put_accepts_a_compressed_body(self, app, monkeypatch):
+        text = "from-client " * 1000
+        copied: dict[str, str] = {}
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        monkeypatch.setattr(
+            flow_server.pyperclip, "copy", lambda text: copied.update(text=text)
+        )
+        client = app.test_client()
+        headers = {**_auth_headers(app, "2"), "Content-Encoding": "gzip"}
+
+        response = client.put(
+            "/clipboard", data=gzip.compress(text.encode()), headers=headers
+        )
+
+        assert response.status_code == 200
+        assert copied["text"] == text
+        assert response.headers["Accept-Encoding"] == "gzip, deflate"
+
+    def test_put_over_the_size_limit_is_rejected(self, app, monkeypatch):
+        app.max_clipboard_size = 1024
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_server.pyperclip, "copy", copy_mock)
+        client = app.test_client()
+        headers = {**_auth_headers(app, "2"), "Content-Encoding": "gzip"}
+
+        # Tiny on the wire; far over the limit once inflated.
+        response = client.put(
+            "/clipboard", data=gzip.compress(b"\0" * 1024 * 1024), headers=headers
+        )
+
+        assert response.status_code == 413
+
+    def test_put_with_an_unknown_coding_is_rejected(self, app, monkeypatch):
+        monkeypatch.setattr(flow_server.pyperclip, "paste", lambda: "server-clip")
+        copy_mock = Mock(side_effect=AssertionError("should not be called"))
+        monkeypatch.setattr(flow_server.pyperclip, "copy", copy_mock)
+        client = app.test_client()
+        headers = {**_auth_headers(app, "2"), "Content-Encoding": "br"}
+
+        response = client.put("/clipboard", data=b"from-client", headers=headers)
+
+        assert response.status_code == 415
+        assert response.headers["Accept-Encoding"] == "gzip, deflate"
+
     def test_get_is_not_found_when_clipboard_disabled(self, app, monkeypatch):
         app.clipboard_enabled = False
         paste_mock = Mock(side_effect=AssertionError("should not be called"))
@@ -524,3 +1213,76 @@ class TestPairingRouteWithTui:
         )
 
         assert response.status_code == 401
+
+
+class TestReplicationRoutes:
+    def test_a_registered_standby_is_published_to_clients(self, app):
+        client = app.test_client()
+
+        response = client.put(
+            "/replication/standby",
+            json={"address": "10.0.0.2", "port": 24801, "certificate": "PEM-DATA"},
+            headers=_auth_headers(app, "standby:10.0.0.2"),
+        )
+
+        assert response.status_code == 200
+        assert json.loads(app.events.get_state("standbys") or "") == [
+            {"address": "10.0.0.2", "port": 24801, "certificate": "PEM-DATA"}
+        ]
+
+    def test_tokens_are_served_hashed_to_a_standby(self, app):
+        token = app.create_new_auth_token("2")
+        client = app.test_client()
+
+        response = client.get(
+            "/replication/tokens", headers=_auth_headers(app, "standby:10.0.0.2")
+        )
+
+        assert response.status_code == 200
+        assert token not in response.text
+        mirrored = {
+            name: bytes.fromhex(digest) for name, digest in response.json.items()
+        }
+        assert mirrored == app._token_hashes
+
+    @pytest.mark.parametrize(
+        ("method", "path"),
+        [("PUT", "/replication/standby"), ("GET", "/replication/tokens")],
+    )
+    def test_refused_to_clients(self, app, method, path):
+        client = app.test_client()
+
+        response = client.open(
+            path, method=method, json={}, headers=_auth_headers(app, "2")
+        )
+
+        assert response.status_code == 403
+
+    def test_a_standby_refuses_pairing(self, app):
+        app.replicator = Mock()
+        client = app.test_client()
+
+        response = client.post(
+            "/pairing", json={"pairing_code": "000000", "name": "host-a"}
+        )
+
+        assert response.status_code == 403
+
+    def test_a_standby_forwards_reports_to_its_primary(self, app):
+        app.replicator = Mock()
+
+        app.report_leader_host(3, reporter="2", stamp=ObservationStamp("s", 1, 5.0))
+
+        assert app._get_desired_host() == 3
+        host, observed = app.replicator.forward_leader_host.call_args.args
+        # Forwarded as observed when the reporter saw it, not on arrival.
+        assert host == 3
+        assert time.monotonic() - observed == pytest.approx(5.0, abs=1.0)
+
+    def test_mirrored_state_is_applied_and_persisted(self, app):
+        app.mirror_state("leader-host", "3", 10**15)
+
+        assert app._get_desired_host() == 3
+        assert app.events.last_event_id > 10**15
+        app.flush_leader_host()
+        assert _reopen(app)._get_desired_host() == 3
@@ -6,6 +6,10 @@ from hidpp_fakes import ScriptedReply
 from hidpp_fakes import ScriptedTransport
 from hidpp_fakes import register_matcher
 from logitech_flow_kvm.hidpp.exceptions import ProtocolError
+from logitech_flow_kvm.hidpp.protocol import REQUEST_ERRORS
+from logitech_flow_kvm.hidpp.protocol import REQUEST_SECONDS
+from logitech_flow_kvm.hidpp.protocol import REQUEST_TIMEOUTS
+from logitech_flow_kvm.hidpp.protocol import REQUESTS
 from logitech_flow_kvm.hidpp.protocol import HidppConnection
 from logitech_flow_kvm.hidpp.protocol import make_notification
 
@@ -81,6 +85,45 @@ class TestRequest:
         assert exc_info.value.error_code == 0x09
 
 
+class TestRequestMetrics:
+    def test_counts_requests_and_times_replies(self):
+        transport = ScriptedTransport(
+            [
+                ScriptedReply(
+                    register_matcher(0xFF, bytes([0x03])), bytes([0x03, 0xAA, 0xBB])
+                )
+            ]
+        )
+        conn = HidppConnection(transport, name="replies")
+        requests_before = REQUESTS.labels("replies").value
+        answered_before = REQUEST_SECONDS.labels("replies").count
+
+        conn.request(0xFF, 0x8100 | 0x2B5, bytes([0x03]), timeout=SHORT_TIMEOUT)
+
+        assert REQUESTS.labels("replies").value == requests_before + 1
+        assert REQUEST_SECONDS.labels("replies").count == answered_before + 1
+
+    def test_counts_timeouts(self):
+        conn = HidppConnection(ScriptedTransport(), name="timeouts")
+        before = REQUEST_TIMEOUTS.labels("timeouts").value
+
+        conn.request(1, 0x0000, timeout=SHORT_TIMEOUT)
+
+        assert REQUEST_TIMEOUTS.labels("timeouts").value == before + 1
+
+    def test_counts_error_replies(self):
+        def respond(devnumber, payload, long_message):
+            return b"\x8f" + payload[:2] + bytes([0x09])
+
+        conn = HidppConnection(ScriptedTransport(respond=respond), name="errors")
+        before = REQUEST_ERRORS.labels("errors").value
+
+        with pytest.raises(ProtocolError):
+            conn.request(0xFF, 0x8100 | 0x2B5, timeout=SHORT_TIMEOUT)
+
+        assert REQUEST_ERRORS.labels("errors").value == before + 1
+
+
 class TestRegisters:
     def test_read_register_encodes_short_get_request(self):
         transport = ScriptedTransport()
@@ -1,5 +1,6 @@
 import logging
 import logging.handlers
+import queue
 
 import platformdirs
 import pytest
@@ -32,10 +33,32 @@ def user_log_dir(tmp_path, monkeypatch):
     return tmp_path
 
 
-def _stream_handlers(logger: logging.Logger) -> list[logging.StreamHandler]:
+@pytest.fixture
+def configure(monkeypatch):
+    """`configure_logging`, with every listener it starts stopped after the
+    test (and not left to `atexit`)."""
+    listeners: list[logging.handlers.QueueListener] = []
+    monkeypatch.setattr(logging_setup.atexit, "register", lambda func: None)
+
+    def configure(logger=None):
+        listener = logging_setup.configure_logging(logger)
+        listeners.append(listener)
+        return listener
+
+    yield configure
+
+    for listener in listeners:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+
+def _stream_handlers(
+    listener: logging.handlers.QueueListener,
+) -> list[logging.Handler]:
     return [
         handler
-        for handler in logger.handlers
+        for handler in listener.handlers
         if isinstance(handler, logging.StreamHandler)
         and not isinstance(handler, logging.handlers.RotatingFileHandler)
     ]
@@ -50,23 +73,25 @@ class TestGetLogPath:
 
 
 class TestConfigureLogging:
-    def test_sets_the_logger_to_info_level(self, user_log_dir, monkeypatch):
+    def test_sets_the_logger_to_info_level(self, user_log_dir, monkeypatch, configure):
         monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=True))
         logger = logging.Logger("test-configure-logging-level")
 
-        logging_setup.configure_logging(logger)
+        configure(logger)
 
         assert logger.level == logging.INFO
 
-    def test_always_attaches_a_rotating_file_handler(self, user_log_dir, monkeypatch):
+    def test_always_writes_to_a_rotating_file_handler(
+        self, user_log_dir, monkeypatch, configure
+    ):
         monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=True))
         logger = logging.Logger("test-configure-logging-file-handler")
 
-        logging_setup.configure_logging(logger)
+        listener = configure(logger)
 
         file_handlers = [
             handler
-            for handler in logger.handlers
+            for handler in listener.handlers
             if isinstance(handler, logging.handlers.RotatingFileHandler)
         ]
         assert len(file_handlers) == 1
@@ -77,35 +102,35 @@ class TestConfigureLogging:
         assert handler.formatter._fmt == logging_setup.LOG_FORMAT
 
     def test_skips_the_plain_stdout_handler_when_interactive(
-        self, user_log_dir, monkeypatch
+        self, user_log_dir, monkeypatch, configure
     ):
         monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=True))
         logger = logging.Logger("test-configure-logging-tty")
 
-        logging_setup.configure_logging(logger)
+        listener = configure(logger)
 
-        assert _stream_handlers(logger) == []
+        assert _stream_handlers(listener) == []
 
-    def test_attaches_a_plain_stdout_handler_when_not_interactive(
-        self, user_log_dir, monkeypatch
+    def test_writes_to_a_plain_stdout_handler_when_not_interactive(
+        self, user_log_dir, monkeypatch, configure
     ):
         monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=False))
         logger = logging.Logger("test-configure-logging-non-tty")
 
-        logging_setup.configure_logging(logger)
+        listener = configure(logger)
 
-        handlers = _stream_handlers(logger)
+        handlers = _stream_handlers(listener)
         assert len(handlers) == 1
         assert handlers[0].formatter is not None
         assert handlers[0].formatter._fmt == logging_setup.LOG_FORMAT
 
-    def test_defaults_to_the_root_logger(self, user_log_dir, monkeypatch):
+    def test_defaults_to_the_root_logger(self, user_log_dir, monkeypatch, configure):
         monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=True))
         root = logging.getLogger()
         original_handlers = list(root.handlers)
         original_level = root.level
         try:
-            logging_setup.configure_logging()
+            configure()
 
             assert root.level == logging.INFO
         finally:
@@ -114,3 +139,81 @@ class TestConfigureLogging:
                     handler.close()
             root.handlers = original_handlers
             root.setLevel(original_level)
+
+    def test_the_logger_only_enqueues_and_stop_flushes_the_file(
+        self, user_log_dir, monkeypatch, configure
+    ):
+        monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=True))
+        logger = logging.Logger("test-configure-logging-queue")
+
+        listener = configure(logger)
+        (handler,) = logger.handlers
+        assert isinstance(handler, logging_setup.DroppingQueueHandler)
+
+        for n in range(100):
+            logger.info("record %d", n)
+        listener.stop()
+
+        written = (user_log_dir / "logitech-flow-kvm.log").read_text()
+        assert "record 0" in written
+        assert "record 99" in written
+
+    def test_registers_the_listener_to_stop_at_exit(self, user_log_dir, monkeypatch):
+        monkeypatch.setattr(logging_setup.sys, "stdout", FakeStream(is_tty=True))
+        registered: list[object] = []
+        monkeypatch.setattr(logging_setup.atexit, "register", registered.append)
+
+        listener = logging_setup.configure_logging(logging.Logger("test-atexit"))
+        try:
+            assert registered == [listener.stop]
+        finally:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+
+class TestDroppingQueueHandler:
+    def _logger(self, handler: logging.Handler) -> logging.Logger:
+        logger = logging.Logger("test-dropping-queue-handler")
+        logger.addHandler(handler)
+        return logger
+
+    def test_records_are_dropped_not_waited_for_when_the_queue_is_full(self):
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(2)
+        handler = logging_setup.DroppingQueueHandler(log_queue)
+        logger = self._logger(handler)
+
+        for n in range(5):
+            logger.warning("record %d", n)
+
+        assert log_queue.qsize() == 2
+        assert handler.dropped_total == 3
+
+    def test_the_drop_count_is_logged_once_there_is_room(self):
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(2)
+        handler = logging_setup.DroppingQueueHandler(log_queue)
+        logger = self._logger(handler)
+        for n in range(4):
+            logger.warning("record %d", n)
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+
+        logger.warning("after")
+
+        messages = [log_queue.get_nowait().getMessage() for _ in range(2)]
+        assert messages == ["2 log records dropped; logging fell behind", "after"]
+
+    def test_each_dropped_record_is_counted_once(self):
+        log_queue: queue.Queue[logging.LogRecord] = queue.Queue(2)
+        handler = logging_setup.DroppingQueueHandler(log_queue)
+        logger = self._logger(handler)
+        for n in range(6):
+            logger.warning("record %d", n)
+
+        assert handler.dropped_total == 4
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+        logger.warning("after")
+
+        message = log_queue.get_nowait().getMessage()
+        assert message == "4 log records dropped; logging fell behind"
@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from logitech_flow_kvm import metrics
+from logitech_flow_kvm.metrics import Counter
+from logitech_flow_kvm.metrics import Histogram
+from logitech_flow_kvm.metrics import Registry
+from logitech_flow_kvm.metrics import format_family
+
+
+class TestCounter:
+    def test_renders_each_labelled_series(self):
+        registry = Registry()
+        counter = Counter("things", "Things seen.", ("kind",), registry=registry)
+        counter.labels("b").inc()
+        counter.labels("a").inc(2)
+
+        assert registry.render() == (
+            "# HELP logitech_flow_kvm_things Things seen.\n"
+            "# TYPE logitech_flow_kvm_things counter\n"
+            'logitech_flow_kvm_things_total{kind="a"} 2\n'
+            'logitech_flow_kvm_things_total{kind="b"} 1\n'
+        )
+
+    def test_concurrent_increments_are_not_lost(self):
+        counter = Counter("things", "Things seen.", registry=None)
+
+        def increment():
+            for _ in range(10000):
+                counter.inc()
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert counter.labels().value == 80000
+
+    def test_requires_every_label(self):
+        counter = Counter("things", "Things seen.", ("kind",), registry=None)
+
+        with pytest.raises(ValueError):
+            counter.inc()
+
+
+class TestHistogram:
+    def test_renders_cumulative_buckets(self):
+        registry = Registry()
+        histogram = Histogram(
+            "latency_seconds", "Latency.", buckets=(0.1, 1), registry=registry
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        assert registry.render() == (
+            "# HELP logitech_flow_kvm_latency_seconds Latency.\n"
+            "# TYPE logitech_flow_kvm_latency_seconds histogram\n"
+            'logitech_flow_kvm_latency_seconds_bucket{le="0.1"} 2\n'
+            'logitech_flow_kvm_latency_seconds_bucket{le="1"} 3\n'
+            'logitech_flow_kvm_latency_seconds_bucket{le="+Inf"} 4\n'
+            "logitech_flow_kvm_latency_seconds_sum 3.65\n"
+            "logitech_flow_kvm_latency_seconds_count 4\n"
+        )
+
+
+class TestMetricBase:
+    def test_a_metric_missing_its_samples_cannot_be_created(self):
+        class Incomplete(metrics._Metric[int]):
+            kind = "gauge"
+
+            def _new_child(self) -> int:
+                return 0
+
+        with pytest.raises(TypeError):
+            Incomplete("incomplete", "Incomplete.", registry=None)  # type: ignore[abstract]
+
+
+class TestRegistry:
+    def test_rejects_duplicate_names(self):
+        registry = Registry()
+        Counter("things", "Things seen.", registry=registry)
+
+        with pytest.raises(ValueError):
+            Counter("things", "Other things.", registry=registry)
+
+
+def test_format_family_escapes_label_values():
+    rendered = format_family(
+        "name", "gauge", "Help.", [("", (("path", 'a"b\\c\nd'),), 1)]
+    )
+
+    assert rendered.splitlines()[-1] == 'name{path="a\\"b\\\\c\\nd"} 1'
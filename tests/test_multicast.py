@@ -0,0 +1,127 @@
+import queue
+import time
+
+import pytest
+
+from logitech_flow_kvm import multicast
+from logitech_flow_kvm.metrics import REGISTRY
+from logitech_flow_kvm.multicast import DATAGRAMS
+from logitech_flow_kvm.multicast import FAST_PATH
+from logitech_flow_kvm.multicast import Announcement
+from logitech_flow_kvm.multicast import MulticastChannel
+from logitech_flow_kvm.multicast import decode
+from logitech_flow_kvm.multicast import derive_key
+from logitech_flow_kvm.multicast import encode
+from logitech_flow_kvm.multicast import generate_secret
+
+SECRET = generate_secret()
+ANNOUNCEMENT = Announcement(3, b"S" * multicast.SESSION_SIZE, 7, 1700000000123)
+
+
+@pytest.fixture(autouse=True)
+def quick_polling(monkeypatch):
+    monkeypatch.setattr(multicast, "POLL_INTERVAL", 0.05)
+
+
+class TestEncoding:
+    def test_round_trips(self):
+        key = derive_key(SECRET)
+
+        assert decode(encode(ANNOUNCEMENT, key), key) == ANNOUNCEMENT
+
+    def test_rejects_another_key(self):
+        datagram = encode(ANNOUNCEMENT, derive_key(SECRET))
+
+        assert decode(datagram, derive_key(generate_secret())) is None
+
+    def test_rejects_a_tampered_datagram(self):
+        key = derive_key(SECRET)
+        datagram = bytearray(encode(ANNOUNCEMENT, key))
+        datagram[4] = 1  # the host
+
+        assert decode(bytes(datagram), key) is None
+
+    def test_rejects_a_truncated_datagram(self):
+        key = derive_key(SECRET)
+
+        assert decode(encode(ANNOUNCEMENT, key)[:-1], key) is None
+
+
+@pytest.fixture
+def channels():
+    """Two peers on the loopback interface, listening on the same port."""
+    opened: list[MulticastChannel] = []
+    heard: list[queue.Queue[Announcement]] = []
+
+    def open_channel(port: int, secret: str = SECRET) -> MulticastChannel:
+        channel = MulticastChannel(secret, port=port, interface="127.0.0.1")
+        announcements: queue.Queue[Announcement] = queue.Queue()
+        channel.listen(announcements.put)
+        opened.append(channel)
+        heard.append(announcements)
+        return channel
+
+    first = open_channel(0)
+    open_channel(first.port)
+    yield opened, heard
+    for channel in opened:
+        channel.close()
+
+
+class TestMulticastChannel:
+    def test_a_peer_hears_an_announcement_once(self, channels):
+        (sender, _), (own, theirs) = channels
+
+        sent = sender.announce(3, base_version=41)
+
+        assert theirs.get(timeout=1) == sent
+        time.sleep(sender.redundancy * sender.resend_interval + 0.05)
+        assert theirs.empty()
+        assert own.empty()
+
+    def test_every_copy_is_sent(self, channels):
+        (sender, _), _ = channels
+        duplicates = DATAGRAMS.labels("duplicate").value
+
+        sender.announce(3, base_version=41)
+
+        deadline = time.monotonic() + 1
+        while DATAGRAMS.labels("duplicate").value < duplicates + 2:
+            assert time.monotonic() < deadline, "timed out"
+            time.sleep(0.01)
+
+    def test_ignores_peers_with_another_secret(self, channels):
+        (listener, _), (heard, _) = channels
+        stranger = MulticastChannel(
+            generate_secret(), port=listener.port, interface="127.0.0.1"
+        )
+        rejected = DATAGRAMS.labels("rejected").value
+
+        try:
+            stranger.announce(3, base_version=41)
+            deadline = time.monotonic() + 1
+            while DATAGRAMS.labels("rejected").value < rejected + 1:
+                assert time.monotonic() < deadline, "timed out"
+                time.sleep(0.01)
+        finally:
+            stranger.close()
+        assert heard.empty()
+
+    def test_configuration_joins_the_same_channel(self):
+        channel = MulticastChannel(SECRET, port=24900)
+
+        joined = MulticastChannel.from_configuration(channel.configuration())
+
+        assert (joined.group, joined.port, joined.secret) == (
+            channel.group,
+            24900,
+            SECRET,
+        )
+        channel.close()
+        joined.close()
+
+
+class TestMetrics:
+    def test_the_clients_fast_path_tally_is_not_served(self):
+        assert FAST_PATH.name not in REGISTRY.render()
+        assert DATAGRAMS.name in REGISTRY.render()
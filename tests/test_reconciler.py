@@ -1,8 +1,18 @@
+import logging
+import types
+
+import pytest
+
 from hidpp_fakes import ScriptedTransport
+from logitech_flow_kvm import reconciler as reconciler_module
 from logitech_flow_kvm.hidpp.models import ReceiverInfo
 from logitech_flow_kvm.hidpp.receiver import PairedDevice
 from logitech_flow_kvm.hidpp.receiver import Receiver
+from logitech_flow_kvm.reconciler import CONVERGENCE_SECONDS
+from logitech_flow_kvm.reconciler import SWITCH_ATTEMPTS
+from logitech_flow_kvm.reconciler import SWITCH_FAILURES
 from logitech_flow_kvm.reconciler import Reconciler
+from logitech_flow_kvm.reconciler import SwitchErrorLog
 
 RECEIVER_INFO = ReceiverInfo(
     path="/dev/hidraw4", product_id=0xC548, kind="bolt", interface=2
@@ -227,6 +237,62 @@ class TestReconcileOnceSurvivesFailures:
 
         reconciler.reconcile_once()  # must not raise despite no on_error given
 
+    def test_calls_on_success_once_a_switch_command_goes_through(self, monkeypatch):
+        device = make_device()
+        monkeypatch.setattr(
+            "logitech_flow_kvm.reconciler.change_device_host", lambda d, h: None
+        )
+        seen: list[PairedDevice] = []
+        reconciler = Reconciler(
+            [device], get_desired_host=lambda: 2, host_number=1, on_success=seen.append
+        )
+        reconciler.observe(device, connected=True)
+
+        reconciler.reconcile_once()
+
+        assert seen == [device]
+
+
+class TestReconcilerMetrics:
+    def test_counts_attempts_and_failures(self, monkeypatch):
+        device = make_device()
+
+        def fail(device, host):
+            raise OSError("unreachable")
+
+        monkeypatch.setattr("logitech_flow_kvm.reconciler.change_device_host", fail)
+        reconciler = Reconciler([device], get_desired_host=lambda: 2, host_number=1)
+        reconciler.observe(device, connected=True)
+        attempts = SWITCH_ATTEMPTS.labels().value
+        failures = SWITCH_FAILURES.labels().value
+
+        reconciler.reconcile_once()
+        reconciler.reconcile_once()
+
+        assert SWITCH_ATTEMPTS.labels().value == attempts + 2
+        assert SWITCH_FAILURES.labels().value == failures + 2
+
+    def test_times_convergence_from_the_first_attempt(self, monkeypatch):
+        device = make_device()
+        monkeypatch.setattr(
+            "logitech_flow_kvm.reconciler.change_device_host", lambda d, h: None
+        )
+        clock = iter([10.0, 10.4])
+        monkeypatch.setattr(
+            reconciler_module, "time", types.SimpleNamespace(monotonic=clock.__next__)
+        )
+        reconciler = Reconciler([device], get_desired_host=lambda: 2, host_number=1)
+        reconciler.observe(device, connected=True)
+        converged = CONVERGENCE_SECONDS.labels()
+        count, total = converged.count, converged.sum
+
+        reconciler.reconcile_once()  # 10.0: first told to leave
+        reconciler.reconcile_once()  # a retry doesn't restart the clock
+        reconciler.observe(device, connected=False)  # 10.4: gone
+
+        assert converged.count == count + 1
+        assert converged.sum == pytest.approx(total + 0.4)
+
 
 class TestObserve:
     def test_poke_wakes_a_waiting_run_loop(self):
@@ -253,3 +319,81 @@ class TestObserve:
 
         assert reconciler._stop.is_set()
         assert reconciler._wake.is_set()
+
+
+class TestSwitchErrorLog:
+    @pytest.fixture
+    def clock(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(
+            reconciler_module, "time", types.SimpleNamespace(monotonic=lambda: now[0])
+        )
+        return now
+
+    @pytest.fixture
+    def log(self, caplog):
+        caplog.set_level(logging.INFO, logger="test-switch-error-log")
+        return SwitchErrorLog(
+            logging.getLogger("test-switch-error-log"), summary_interval=300
+        )
+
+    def test_only_the_first_of_a_repeating_failure_is_logged(self, clock, log, caplog):
+        device = make_device()
+
+        for _ in range(10):
+            log.failed(device, OSError("unreachable"))
+            clock[0] += 2
+
+        assert [r.getMessage() for r in caplog.records] == [
+            "Could not switch SERIAL1 to the desired host yet (unreachable); will retry"
+        ]
+
+    def test_repeats_are_summarized_every_interval(self, clock, log, caplog):
+        device = make_device()
+        log.failed(device, OSError("unreachable"))
+
+        for _ in range(150):
+            clock[0] += 2
+            log.failed(device, OSError("unreachable"))
+
+        assert caplog.records[-1].getMessage() == (
+            "Could not switch SERIAL1 to the desired host yet (unreachable); "
+            "repeated 150 times in 5m"
+        )
+        assert len(caplog.records) == 2
+
+    def test_each_error_type_is_tracked_separately(self, clock, log, caplog):
+        device = make_device()
+
+        log.failed(device, OSError("unreachable"))
+        log.failed(device, TimeoutError("timed out"))
+        log.failed(device, OSError("unreachable"))
+
+        assert len(caplog.records) == 2
+
+    def test_recovery_is_logged_with_how_long_it_took(self, clock, log, caplog):
+        device = make_device()
+        for _ in range(3):
+            log.failed(device, OSError("unreachable"))
+            clock[0] += 20
+
+        log.succeeded(device)
+        log.succeeded(device)
+
+        assert [r.getMessage() for r in caplog.records[1:]] == [
+            "Switched SERIAL1 after 3 failed attempts over 1m"
+        ]
+
+    def test_a_failure_after_a_quiet_interval_is_logged_in_full_again(
+        self, clock, log, caplog
+    ):
+        device = make_device()
+        log.failed(device, OSError("unreachable"))
+
+        clock[0] += 600
+        log.failed(device, OSError("unreachable"))
+
+        assert [r.getMessage().endswith("will retry") for r in caplog.records] == [
+            True,
+            True,
+        ]
@@ -0,0 +1,217 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import platformdirs
+import pytest
+import requests
+
+from logitech_flow_kvm import replication
+from logitech_flow_kvm.aio_server import AsyncFlowServer
+from logitech_flow_kvm.commands import flow_server
+from logitech_flow_kvm.commands.flow_server import FlowServerAPI
+from logitech_flow_kvm.commands.flow_server import bind_routes
+from logitech_flow_kvm.commands.flow_server import migrate_token_db
+from logitech_flow_kvm.reconciler import Reconciler
+from logitech_flow_kvm.replication import Replicator
+from logitech_flow_kvm.replication import standby_token_name
+from test_flow_server import DummyListener
+from test_flow_server import make_device
+
+
+@pytest.fixture(autouse=True)
+def no_background_threads(monkeypatch, tmp_path):
+    monkeypatch.setattr(flow_server, "NotificationListener", DummyListener)
+    monkeypatch.setattr(Reconciler, "start", lambda self: None)
+    monkeypatch.setattr(platformdirs, "user_data_dir", lambda *a, **k: str(tmp_path))
+    # Reconnect attempts come quickly, so tests needn't wait on them.
+    monkeypatch.setattr(replication, "MIN_BACKOFF", 0.05)
+
+
+def make_app(host_number: int) -> FlowServerAPI:
+    db = sqlite3.Connection(":memory:", check_same_thread=False)
+    migrate_token_db(db)
+    api = FlowServerAPI(
+        __name__,
+        host_number=host_number,
+        leader_device=make_device(1, "LEADER01"),
+        follower_devices=[make_device(1, "FOLLOW01")],
+        hostnames=[],
+        binding_interface="127.0.0.1",
+        port=0,
+        db=db,
+    )
+    bind_routes(api)
+    return api
+
+
+class ServerThread:
+    """An `AsyncFlowServer` over plain TCP on its own loop thread, which can
+    be stopped and started again on the same port -- as across a reboot."""
+
+    def __init__(self, app: FlowServerAPI):
+        self.app = app
+        self.port = 0
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.server: AsyncFlowServer | None = None
+
+    def start(self) -> None:
+        self.server = AsyncFlowServer(
+            self.app,
+            host="127.0.0.1",
+            port=self.port,
+            ssl_context=None,
+            keepalive_interval=0.2,
+        )
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result(5)
+        self.port = self.server.bound_port
+
+    def stop(self) -> None:
+        if self.server is not None:
+            asyncio.run_coroutine_threadsafe(self.server.close(), self.loop).result(5)
+            self.server = None
+
+    def close(self) -> None:
+        self.stop()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+        self.loop.close()
+
+
+@pytest.fixture
+def primary():
+    return make_app(1)
+
+
+@pytest.fixture
+def primary_server(primary):
+    server = ServerThread(primary)
+    server.start()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def standby(primary, primary_server):
+    app = make_app(2)
+    session = requests.Session()
+    token = primary.create_new_auth_token(standby_token_name("127.0.0.2"))
+    session.headers["Authorization"] = f"Bearer {token}"
+    app.replicator = Replicator(
+        app,
+        f"http://127.0.0.1:{primary_server.port}",
+        session,
+        {"address": "127.0.0.2", "port": 24801, "certificate": "PEM-DATA"},
+        read_timeout=1.0,
+    )
+    app.start_background_threads()
+    _wait_until(lambda: app.replicator.connected)
+    yield app
+    app.replicator.stop()
+    app.replicator.join(timeout=5)
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class TestReplicator:
+    def test_mirrors_the_primary_leader_host(self, primary, standby):
+        primary.report_leader_host(3)
+
+        _wait_until(lambda: standby._get_desired_host() == 3)
+
+    def test_picks_up_the_primary_leader_host_on_connecting(self, primary):
+        primary.report_leader_host(3)
+        server = ServerThread(primary)
+        server.start()
+        try:
+            app = make_app(2)
+            session = requests.Session()
+            token = primary.create_new_auth_token(standby_token_name("x"))
+            session.headers["Authorization"] = f"Bearer {token}"
+            app.replicator = Replicator(
+                app,
+                f"http://127.0.0.1:{server.port}",
+                session,
+                {"address": "127.0.0.2", "port": 24801, "certificate": "PEM-DATA"},
+            )
+            app.replicator.start()
+
+            _wait_until(lambda: app._get_desired_host() == 3)
+            app.replicator.stop()
+        finally:
+            server.close()
+
+    def test_registers_with_the_primary_for_clients_to_find(self, primary, standby):
+        assert primary.standbys == {
+            "127.0.0.2:24801": {
+                "address": "127.0.0.2",
+                "port": 24801,
+                "certificate": "PEM-DATA",
+            }
+        }
+        _wait_until(lambda: standby.events.get_state("standbys") is not None)
+
+    def test_mirrors_tokens_paired_with_the_primary(self, primary, standby):
+        token = primary.create_new_auth_token("4")
+        # What a newly paired client does straight away.
+        primary.open_event_stream("4", None)
+
+        _wait_until(lambda: standby.verify_auth_token(token) == "4")
+
+    def test_mirrored_tokens_survive_a_standby_restart(self, primary, standby):
+        token = primary.create_new_auth_token("4")
+        primary.open_event_stream("4", None)
+        _wait_until(lambda: standby.verify_auth_token(token) == "4")
+
+        standby.load_auth_tokens()
+
+        assert standby.verify_auth_token(token) == "4"
+
+    def test_forwards_reports_to_the_primary(self, primary, standby):
+        standby.report_leader_host(2)
+
+        assert primary._get_desired_host() == 2
+
+    def test_takes_over_while_the_primary_is_away_and_hands_back(
+        self, primary, primary_server, standby
+    ):
+        primary.report_leader_host(1)
+        _wait_until(lambda: standby._get_desired_host() == 1)
+
+        primary_server.stop()
+        _wait_until(lambda: not standby.replicator.connected)
+        standby.report_leader_host(3)
+        assert standby._get_desired_host() == 3
+
+        primary_server.start()
+        _wait_until(lambda: standby.replicator.connected)
+
+        # The switch the primary missed isn't undone by its older state.
+        assert primary._get_desired_host() == 3
+        assert standby._get_desired_host() == 3
+
+    def test_a_late_forward_loses_to_a_newer_report_to_the_primary(
+        self, primary, primary_server, standby
+    ):
+        primary_server.stop()
+        _wait_until(lambda: not standby.replicator.connected)
+        standby.report_leader_host(3)
+        # Seen by the primary after the standby's report -- by more than a
+        # request's transit time, which a stamp can't account for -- though
+        # the standby only gets to forward its own once they're back in touch.
+        time.sleep(0.2)
+        primary.report_leader_host(4)
+
+        primary_server.start()
+        _wait_until(lambda: standby.replicator.connected)
+
+        assert primary._get_desired_host() == 4
+        _wait_until(lambda: standby._get_desired_host() == 4)
@@ -1,5 +1,21 @@
+import json
+import queue
+import threading
+
+import pytest
+
+from logitech_flow_kvm import sse
+from logitech_flow_kvm.sse import SNAPSHOT_EVENT
 from logitech_flow_kvm.sse import EventBroadcaster
+from logitech_flow_kvm.sse import ObservationStamp
+from logitech_flow_kvm.sse import SequencedEventBroadcaster
+from logitech_flow_kvm.sse import SseDecoder
+from logitech_flow_kvm.sse import SseEvent
+from logitech_flow_kvm.sse import StateEntry
+from logitech_flow_kvm.sse import SubscriberQueue
 from logitech_flow_kvm.sse import format_sse
+from logitech_flow_kvm.sse import parse_observation_stamp
+from logitech_flow_kvm.sse import parse_sse_events
 from logitech_flow_kvm.sse import parse_sse_stream
 
 
@@ -8,6 +24,28 @@ class TestFormatSse:
         assert format_sse("leader-host", "2") == "event: leader-host\ndata: 2\n\n"
 
 
+class TestFormatSseWithId:
+    def test_includes_the_id_field(self):
+        assert (
+            format_sse("leader-host", "2", id=7)
+            == "id: 7\nevent: leader-host\ndata: 2\n\n"
+        )
+
+
+class TestObservationStamp:
+    def test_round_trips_through_its_header_form(self):
+        stamp = ObservationStamp("abc123", 7, 0.25)
+
+        assert parse_observation_stamp(stamp.format()) == stamp
+
+    @pytest.mark.parametrize("value", [None, "", "abc 7", "abc seven 0.25"])
+    def test_anything_else_is_no_stamp(self, value):
+        assert parse_observation_stamp(value) is None
+
+    def test_a_negative_age_is_taken_as_none(self):
+        assert parse_observation_stamp("abc 7 -1") == ObservationStamp("abc", 7, 0.0)
+
+
 class TestParseSseStream:
     def test_parses_a_single_event(self):
         lines = ["event: leader-host", "data: 2", ""]
@@ -60,67 +98,213 @@ class TestParseSseStream:
         assert list(parse_sse_stream(message.split("\n"))) == [("leader-host", "2")]
 
 
+class TestParseSseEvents:
+    def test_carries_the_event_id(self):
+        lines = ["id: 7", "event: leader-host", "data: 2", ""]
+
+        assert list(parse_sse_events(lines)) == [SseEvent("leader-host", "2", "7")]
+
+    def test_the_last_event_id_carries_forward_to_events_without_one(self):
+        lines = ["id: 7", "data: a", "", "data: b", ""]
+
+        assert [event.id for event in parse_sse_events(lines)] == ["7", "7"]
+
+    def test_id_is_none_before_any_id_field(self):
+        lines = ["data: a", ""]
+
+        assert list(parse_sse_events(lines)) == [SseEvent("message", "a", None)]
+
+    def test_round_trips_through_format_sse_with_an_id(self):
+        message = format_sse("leader-host", "2", id=9)
+
+        assert list(parse_sse_events(message.split("\n"))) == [
+            SseEvent("leader-host", "2", "9")
+        ]
+
+
+def _snapshot(broadcaster, state: dict) -> str:
+    return format_sse(SNAPSHOT_EVENT, json.dumps(state), id=broadcaster.last_event_id)
+
+
+def _feed_all(decoder: SseDecoder, chunks: list[bytes]) -> list[SseEvent]:
+    return [event for chunk in chunks for event in decoder.feed(chunk)]
+
+
+class TestSseDecoder:
+    def test_parses_a_complete_event_in_one_chunk(self):
+        events = SseDecoder().feed(b"id: 3\nevent: leader-host\ndata: 2\n\n")
+
+        assert events == [SseEvent("leader-host", "2", "3")]
+
+    def test_reassembles_an_event_split_across_chunks(self):
+        chunks = [b"ev", b"ent: leader-host\nda", b"ta: 2\n", b"\n"]
+
+        assert _feed_all(SseDecoder(), chunks) == [SseEvent("leader-host", "2")]
+
+    def test_every_single_byte_split_gives_the_same_result(self):
+        stream = b"id: 1\r\nevent: a\r\ndata: x\r\n\r\nid: 2\rdata: y\r\r"
+
+        events = _feed_all(SseDecoder(), [bytes([b]) for b in stream])
+
+        assert events == [SseEvent("a", "x", "1"), SseEvent("message", "y", "2")]
+
+    def test_a_crlf_split_across_chunks_is_one_line_break(self):
+        chunks = [b"data: x\r", b"\ndata: y\r", b"\n\r", b"\n"]
+
+        assert _feed_all(SseDecoder(), chunks) == [SseEvent("message", "x\ny")]
+
+    def test_bare_cr_line_endings(self):
+        events = SseDecoder().feed(b"event: a\rdata: x\r\r")
+
+        assert events == [SseEvent("a", "x")]
+
+    def test_joins_multi_line_data(self):
+        events = SseDecoder().feed(b"data: one\ndata: two\n\n")
+
+        assert events == [SseEvent("message", "one\ntwo")]
+
+    def test_skips_comments_and_data_less_events(self):
+        events = SseDecoder().feed(b": keepalive\n\nevent: a\n\ndata: x\n\n")
+
+        assert events == [SseEvent("message", "x")]
+
+    def test_tracks_the_retry_field(self):
+        decoder = SseDecoder()
+
+        decoder.feed(b"retry: 2500\n\n")
+
+        assert decoder.retry == 2500
+
+    def test_ignores_a_malformed_retry_field(self):
+        decoder = SseDecoder()
+
+        decoder.feed(b"retry: soon\n\n")
+
+        assert decoder.retry is None
+
+    def test_the_last_event_id_carries_forward(self):
+        events = SseDecoder().feed(b"id: 7\ndata: a\n\ndata: b\n\n")
+
+        assert [event.id for event in events] == ["7", "7"]
+
+    def test_decodes_utf8_split_mid_character(self):
+        encoded = "data: caf\u00e9\n\n".encode()
+        split = encoded.index(b"\xa9")
+
+        events = _feed_all(SseDecoder(), [encoded[:split], encoded[split:]])
+
+        assert events == [SseEvent("message", "caf\u00e9")]
+
+    def test_strips_a_leading_byte_order_mark(self):
+        events = SseDecoder().feed(b"\xef\xbb\xbfdata: x\n\n")
+
+        assert events == [SseEvent("message", "x")]
+
+    def test_matches_the_line_parser_on_broadcaster_output(self):
+        broadcaster = EventBroadcaster()
+        q = broadcaster.subscribe().queue
+        broadcaster.set_state("leader-host", "2")
+        broadcaster.broadcast("host-connected", "3")
+        stream = q.get_nowait() + q.get_nowait()
+
+        assert SseDecoder().feed(stream.encode()) == list(
+            parse_sse_events(stream.split("\n"))
+        )
+
+
 class TestEventBroadcaster:
     def test_starts_with_no_state(self):
         broadcaster = EventBroadcaster()
 
-        assert broadcaster.state is None
+        assert broadcaster.state == {}
+        assert broadcaster.get_state("leader-host") is None
 
-    def test_subscribe_returns_current_state(self):
+    def test_subscribe_returns_a_snapshot_of_the_current_state(self):
         broadcaster = EventBroadcaster()
-        broadcaster.set_state("leader-host", "1")
+        version = broadcaster.set_state("leader-host", "1")
 
-        _, current = broadcaster.subscribe()
+        subscription = broadcaster.subscribe()
 
-        assert current == "1"
+        assert subscription.initial == [
+            _snapshot(broadcaster, {"leader-host": {"value": "1", "version": version}})
+        ]
+        assert subscription.resumed is False
 
-    def test_subscribe_before_any_state_is_set_returns_none(self):
+    def test_subscribe_before_any_state_is_set_returns_an_empty_snapshot(self):
         broadcaster = EventBroadcaster()
 
-        _, current = broadcaster.subscribe()
+        subscription = broadcaster.subscribe()
 
-        assert current is None
+        assert subscription.initial == [_snapshot(broadcaster, {})]
 
     def test_set_state_broadcasts_to_existing_subscribers(self):
         broadcaster = EventBroadcaster()
-        q, _ = broadcaster.subscribe()
+        q = broadcaster.subscribe().queue
 
         broadcaster.set_state("leader-host", "2")
 
-        assert q.get_nowait() == format_sse("leader-host", "2")
+        assert q.get_nowait() == format_sse(
+            "leader-host", "2", id=broadcaster.last_event_id
+        )
 
     def test_set_state_updates_state_visible_to_new_subscribers(self):
         broadcaster = EventBroadcaster()
         broadcaster.set_state("leader-host", "1")
 
-        broadcaster.set_state("leader-host", "2")
-        _, current = broadcaster.subscribe()
+        version = broadcaster.set_state("leader-host", "2")
+        subscription = broadcaster.subscribe()
 
-        assert current == "2"
+        assert broadcaster.get_state("leader-host") == "2"
+        assert subscription.initial == [
+            _snapshot(broadcaster, {"leader-host": {"value": "2", "version": version}})
+        ]
+
+    def test_restored_state_is_numbered_past_its_previous_version(self):
+        broadcaster = EventBroadcaster()
+        from_the_future = broadcaster.last_event_id + 1_000_000
+
+        version = broadcaster.restore_state("leader-host", "2", from_the_future)
+        subscription = broadcaster.subscribe()
+
+        assert version == from_the_future + 1
+        assert subscription.initial == [
+            _snapshot(broadcaster, {"leader-host": {"value": "2", "version": version}})
+        ]
+
+    def test_restoring_an_older_version_keeps_numbering_from_now(self):
+        broadcaster = EventBroadcaster()
+        before = broadcaster.last_event_id
+
+        version = broadcaster.restore_state("leader-host", "2", 5)
+
+        assert version == before + 1
 
     def test_broadcast_reaches_all_subscribers(self):
         broadcaster = EventBroadcaster()
-        q1, _ = broadcaster.subscribe()
-        q2, _ = broadcaster.subscribe()
+        q1 = broadcaster.subscribe().queue
+        q2 = broadcaster.subscribe().queue
 
         broadcaster.broadcast("host-connected", "3")
 
-        assert q1.get_nowait() == format_sse("host-connected", "3")
-        assert q2.get_nowait() == format_sse("host-connected", "3")
+        expected = format_sse("host-connected", "3", id=broadcaster.last_event_id)
+        assert q1.get_nowait() == expected
+        assert q2.get_nowait() == expected
 
     def test_broadcast_can_exclude_one_subscriber(self):
         broadcaster = EventBroadcaster()
-        q1, _ = broadcaster.subscribe()
-        q2, _ = broadcaster.subscribe()
+        q1 = broadcaster.subscribe().queue
+        q2 = broadcaster.subscribe().queue
 
         broadcaster.broadcast("host-connected", "3", exclude=q1)
 
         assert q1.empty()
-        assert q2.get_nowait() == format_sse("host-connected", "3")
+        assert q2.get_nowait() == format_sse(
+            "host-connected", "3", id=broadcaster.last_event_id
+        )
 
     def test_unsubscribe_stops_future_broadcasts(self):
         broadcaster = EventBroadcaster()
-        q, _ = broadcaster.subscribe()
+        q = broadcaster.subscribe().queue
 
         broadcaster.unsubscribe(q)
         broadcaster.set_state("leader-host", "1")
@@ -129,7 +313,7 @@ class TestEventBroadcaster:
 
     def test_unsubscribe_is_idempotent(self):
         broadcaster = EventBroadcaster()
-        q, _ = broadcaster.subscribe()
+        q = broadcaster.subscribe().queue
 
         broadcaster.unsubscribe(q)
         broadcaster.unsubscribe(q)  # should not raise
@@ -159,7 +343,7 @@ class TestSubscriberNames:
 
     def test_unsubscribe_removes_the_name(self):
         broadcaster = EventBroadcaster()
-        q, _ = broadcaster.subscribe(name="2")
+        q = broadcaster.subscribe(name="2").queue
 
         broadcaster.unsubscribe(q)
 
@@ -167,6 +351,393 @@ class TestSubscriberNames:
 
     def test_unsubscribe_of_an_unnamed_queue_does_not_raise(self):
         broadcaster = EventBroadcaster()
-        q, _ = broadcaster.subscribe()
+        q = broadcaster.subscribe().queue
 
         broadcaster.unsubscribe(q)  # should not raise
+
+
+class TestReplay:
+    def test_event_ids_increase_monotonically(self):
+        broadcaster = EventBroadcaster()
+        first = broadcaster.last_event_id
+
+        broadcaster.broadcast("host-connected", "2")
+        second = broadcaster.last_event_id
+        broadcaster.set_state("leader-host", "3")
+
+        assert first < second < broadcaster.last_event_id
+
+    def test_resuming_replays_exactly_the_missed_events(self):
+        broadcaster = EventBroadcaster()
+        broadcaster.set_state("leader-host", "1")
+        seen = broadcaster.last_event_id
+        broadcaster.broadcast("host-connected", "2")
+        broadcaster.set_state("leader-host", "2")
+
+        subscription = broadcaster.subscribe(last_event_id=seen)
+
+        assert subscription.resumed is True
+        assert subscription.initial == [
+            format_sse("host-connected", "2", id=seen + 1),
+            format_sse("leader-host", "2", id=seen + 2),
+        ]
+
+    def test_resuming_when_up_to_date_replays_nothing(self):
+        broadcaster = EventBroadcaster()
+        broadcaster.set_state("leader-host", "1")
+
+        subscription = broadcaster.subscribe(last_event_id=broadcaster.last_event_id)
+
+        assert subscription.resumed is True
+        assert subscription.initial == []
+
+    def test_falling_off_the_buffer_gets_a_snapshot_instead(self):
+        broadcaster = EventBroadcaster(replay_buffer_size=2)
+        seen = broadcaster.set_state("leader-host", "1")
+        for host in ("2", "3", "4"):
+            broadcaster.broadcast("host-connected", host)
+
+        subscription = broadcaster.subscribe(last_event_id=seen)
+
+        assert subscription.resumed is False
+        assert subscription.initial == [
+            _snapshot(broadcaster, {"leader-host": {"value": "1", "version": seen}})
+        ]
+
+    def test_an_id_from_the_future_gets_a_snapshot(self):
+        broadcaster = EventBroadcaster()
+        broadcaster.set_state("leader-host", "1")
+
+        subscription = broadcaster.subscribe(
+            last_event_id=broadcaster.last_event_id + 100
+        )
+
+        assert subscription.resumed is False
+
+    def test_resuming_skips_what_was_kept_from_the_same_host(self):
+        broadcaster = EventBroadcaster()
+        first = broadcaster.subscribe(name="2")
+        seen = broadcaster.last_event_id
+        broadcaster.broadcast("host-connected", "2", exclude=first.queue)
+        broadcaster.set_state("leader-host", "3")
+        broadcaster.unsubscribe(first.queue)
+
+        resumed = broadcaster.subscribe(name="2", last_event_id=seen)
+        other = broadcaster.subscribe(name="4", last_event_id=seen)
+
+        assert resumed.initial == [format_sse("leader-host", "3", id=seen + 2)]
+        assert len(other.initial) == 2
+
+    def test_resumes_across_a_jump_in_ids_but_not_from_inside_one(self):
+        broadcaster = EventBroadcaster()
+        seen = broadcaster.set_state("leader-host", "1")
+        restored = broadcaster.restore_state("leader-host", "2", seen + 1000)
+
+        across = broadcaster.subscribe(last_event_id=seen)
+        inside = broadcaster.subscribe(last_event_id=seen + 500)
+
+        assert across.initial == [format_sse("leader-host", "2", id=restored)]
+        assert inside.resumed is False
+
+    def test_ids_from_a_previous_broadcaster_are_never_resumed(self, monkeypatch):
+        monkeypatch.setattr(sse.time, "time_ns", lambda: 1_000_000_000_000)
+        previous = EventBroadcaster()
+        previous.set_state("leader-host", "1")
+        stale_id = previous.last_event_id
+
+        # ...restarted a second later.
+        monkeypatch.setattr(sse.time, "time_ns", lambda: 1_001_000_000_000)
+        restarted = EventBroadcaster()
+        restarted.set_state("leader-host", "2")
+        subscription = restarted.subscribe(last_event_id=stale_id)
+
+        assert subscription.resumed is False
+
+
+class TestSubscriberQueue:
+    def test_delivers_messages_in_order(self):
+        q = SubscriberQueue()
+
+        q.put("host-connected", "a")
+        q.put("host-connected", "b")
+
+        assert [q.get_nowait(), q.get_nowait()] == ["a", "b"]
+
+    def test_state_messages_coalesce_to_the_latest_value(self):
+        q = SubscriberQueue()
+
+        q.put("leader-host", "1", coalesce=True)
+        q.put("host-connected", "x")
+        q.put("leader-host", "2", coalesce=True)
+        q.put("leader-host", "3", coalesce=True)
+
+        assert [q.get_nowait(), q.get_nowait()] == ["x", "3"]
+        assert q.empty()
+        assert q.coalesced == 2
+
+    def test_coalescing_is_per_event_type(self):
+        q = SubscriberQueue()
+
+        q.put("leader-host", "1", coalesce=True)
+        q.put("other-state", "a", coalesce=True)
+
+        assert q.qsize() == 2
+
+    def test_informational_messages_are_dropped_and_counted_when_full(self):
+        q = SubscriberQueue(maxsize=2)
+
+        for message in ("a", "b", "c", "d"):
+            q.put("host-connected", message)
+
+        assert [q.get_nowait(), q.get_nowait()] == ["a", "b"]
+        assert q.dropped == 2
+
+    def test_state_messages_evict_informational_ones_when_full(self):
+        q = SubscriberQueue(maxsize=2)
+        q.put("host-connected", "a")
+        q.put("host-connected", "b")
+
+        q.put("leader-host", "1", coalesce=True)
+
+        assert [q.get_nowait(), q.get_nowait()] == ["b", "1"]
+        assert q.dropped == 1
+
+    def test_get_times_out_with_queue_empty(self):
+        q = SubscriberQueue()
+
+        with pytest.raises(queue.Empty):
+            q.get(timeout=0.01)
+
+    def test_get_nowait_raises_queue_empty(self):
+        with pytest.raises(queue.Empty):
+            SubscriberQueue().get_nowait()
+
+    def test_get_wakes_up_for_a_message_put_from_another_thread(self):
+        q = SubscriberQueue()
+        threading.Timer(0.01, q.put, args=("host-connected", "a")).start()
+
+        assert q.get(timeout=2) == "a"
+
+
+class TestListeners:
+    def test_called_after_every_published_event(self):
+        broadcaster = EventBroadcaster()
+        q = broadcaster.subscribe().queue
+        seen = []
+        broadcaster.add_listener(lambda: seen.append(q.qsize()))
+
+        broadcaster.set_state("leader-host", "2")
+        broadcaster.broadcast("host-connected", "3")
+
+        # Each call comes after the event has already been delivered.
+        assert seen == [1, 2]
+
+    def test_removed_listeners_are_not_called(self):
+        broadcaster = SequencedEventBroadcaster()
+        seen = []
+
+        def listener():
+            seen.append(True)
+
+        broadcaster.add_listener(listener)
+
+        broadcaster.remove_listener(listener)
+        broadcaster.set_state("leader-host", "2")
+
+        assert seen == []
+
+
+class TestBroadcastStats:
+    def test_counts_subscribers_and_queued_messages(self):
+        broadcaster = EventBroadcaster()
+        broadcaster.subscribe()
+        broadcaster.subscribe()
+
+        broadcaster.broadcast("host-connected", "2")
+
+        stats = broadcaster.stats
+        assert stats.subscribers == 2
+        assert stats.queued == 2
+
+    def test_a_flapping_leader_costs_a_stalled_subscriber_one_slot(self):
+        broadcaster = EventBroadcaster()
+        q = broadcaster.subscribe().queue
+
+        for host in range(1, 50):
+            broadcaster.set_state("leader-host", str(host))
+
+        assert q.qsize() == 1
+        assert broadcaster.stats.coalesced == 48
+
+    def test_totals_survive_the_subscriber_disconnecting(self):
+        broadcaster = EventBroadcaster()
+        q = broadcaster.subscribe().queue
+        assert isinstance(q, SubscriberQueue)
+        q.maxsize = 1
+        broadcaster.broadcast("host-connected", "2")
+        broadcaster.broadcast("host-connected", "3")
+
+        broadcaster.unsubscribe(q)
+
+        stats = broadcaster.stats
+        assert stats.subscribers == 0
+        assert stats.dropped == 1
+
+
+class TestBroadcasterBase:
+    def test_a_subclass_missing_a_delivery_method_cannot_be_created(self):
+        class Incomplete(sse._Broadcaster):
+            def _deliver(self, entry, *, coalesce):
+                pass
+
+        with pytest.raises(TypeError):
+            Incomplete()  # type: ignore[abstract]
+
+
+class TestSequencedEventBroadcaster:
+    def test_subscribers_read_events_in_order(self):
+        broadcaster = SequencedEventBroadcaster()
+        cursor = broadcaster.subscribe().queue
+
+        broadcaster.broadcast("host-connected", "2")
+        broadcaster.set_state("leader-host", "3")
+
+        first_id = broadcaster.last_event_id - 1
+        assert cursor.get_nowait() == format_sse("host-connected", "2", id=first_id)
+        assert cursor.get_nowait() == format_sse("leader-host", "3", id=first_id + 1)
+        assert cursor.empty()
+
+    def test_every_subscriber_reads_the_same_event(self):
+        broadcaster = SequencedEventBroadcaster()
+        cursors = [broadcaster.subscribe().queue for _ in range(3)]
+
+        broadcaster.broadcast("host-connected", "2")
+
+        expected = format_sse("host-connected", "2", id=broadcaster.last_event_id)
+        assert [cursor.get_nowait() for cursor in cursors] == [expected] * 3
+
+    def test_broadcast_can_exclude_one_subscriber(self):
+        broadcaster = SequencedEventBroadcaster()
+        excluded = broadcaster.subscribe().queue
+        other = broadcaster.subscribe().queue
+
+        broadcaster.broadcast("host-connected", "3", exclude=excluded)
+
+        with pytest.raises(queue.Empty):
+            excluded.get_nowait()
+        assert other.get_nowait() == format_sse(
+            "host-connected", "3", id=broadcaster.last_event_id
+        )
+
+    def test_get_blocks_until_an_event_is_published(self):
+        broadcaster = SequencedEventBroadcaster()
+        cursor = broadcaster.subscribe().queue
+        threading.Timer(
+            0.01, broadcaster.broadcast, args=("host-connected", "2")
+        ).start()
+
+        assert "data: 2" in cursor.get(timeout=2)
+
+    def test_get_times_out_with_queue_empty(self):
+        cursor = SequencedEventBroadcaster().subscribe().queue
+
+        with pytest.raises(queue.Empty):
+            cursor.get(timeout=0.01)
+
+    def test_a_cursor_that_falls_off_the_log_skips_to_a_snapshot(self):
+        broadcaster = SequencedEventBroadcaster(replay_buffer_size=2)
+        cursor = broadcaster.subscribe().queue
+
+        for host in ("1", "2", "3", "4"):
+            version = broadcaster.set_state("leader-host", host)
+
+        assert cursor.get_nowait() == _snapshot(
+            broadcaster, {"leader-host": {"value": "4", "version": version}}
+        )
+        assert cursor.empty()
+        assert broadcaster.stats.dropped == 4
+
+    def test_reads_on_past_a_jump_in_event_ids(self):
+        broadcaster = SequencedEventBroadcaster()
+        cursor = broadcaster.subscribe().queue
+        broadcaster.set_state("leader-host", "1")
+        restored = broadcaster.restore_state(
+            "standbys", "[]", broadcaster.last_event_id + 1000
+        )
+        broadcaster.set_state("leader-host", "2")
+
+        assert "data: 1" in cursor.get_nowait()
+        assert cursor.get_nowait() == format_sse("standbys", "[]", id=restored)
+        assert cursor.get_nowait() == format_sse("leader-host", "2", id=restored + 1)
+        assert cursor.empty()
+        assert broadcaster.stats.dropped == 0
+
+    def test_subscribe_replays_from_the_shared_log(self):
+        broadcaster = SequencedEventBroadcaster()
+        broadcaster.set_state("leader-host", "1")
+        seen = broadcaster.last_event_id
+        broadcaster.set_state("leader-host", "2")
+
+        subscription = broadcaster.subscribe(last_event_id=seen)
+
+        assert subscription.resumed is True
+        assert subscription.initial == [format_sse("leader-host", "2", id=seen + 1)]
+
+    def test_stats_report_each_cursors_lag(self):
+        broadcaster = SequencedEventBroadcaster()
+        broadcaster.subscribe()
+        broadcaster.subscribe()
+
+        broadcaster.broadcast("host-connected", "2")
+
+        assert broadcaster.stats.subscribers == 2
+        assert broadcaster.stats.queued == 2
+
+
+class TestVersionedState:
+    def test_set_state_returns_the_new_version_as_the_event_id(self):
+        broadcaster = EventBroadcaster()
+        q = broadcaster.subscribe().queue
+
+        version = broadcaster.set_state("leader-host", "2")
+
+        assert version == broadcaster.last_event_id
+        assert q.get_nowait() == format_sse("leader-host", "2", id=version)
+
+    def test_each_key_keeps_its_own_version(self):
+        broadcaster = EventBroadcaster()
+
+        leader_version = broadcaster.set_state("leader-host", "2")
+        clipboard_version = broadcaster.set_state("clipboard", "abc")
+
+        assert broadcaster.state == {
+            "leader-host": StateEntry("2", leader_version),
+            "clipboard": StateEntry("abc", clipboard_version),
+        }
+
+    def test_snapshot_covers_every_key(self):
+        broadcaster = EventBroadcaster()
+        leader_version = broadcaster.set_state("leader-host", "2")
+        clipboard_version = broadcaster.set_state("clipboard", "abc")
+
+        subscription = broadcaster.subscribe()
+
+        assert subscription.initial == [
+            _snapshot(
+                broadcaster,
+                {
+                    "leader-host": {"value": "2", "version": leader_version},
+                    "clipboard": {"value": "abc", "version": clipboard_version},
+                },
+            )
+        ]
+
+    def test_snapshot_round_trips_through_the_parser(self):
+        broadcaster = EventBroadcaster()
+        broadcaster.set_state("leader-host", "2")
+
+        message = broadcaster.subscribe().initial[0]
+        (event,) = parse_sse_events(message.split("\n"))
+
+        assert event.event == SNAPSHOT_EVENT
+        assert json.loads(event.data)["leader-host"]["value"] == "2"
@@ -0,0 +1,79 @@
+import logging
+import threading
+
+import pytest
+
+from logitech_flow_kvm.startup import StartupProfile
+
+
+class TestStartupProfile:
+    def test_phases_record_when_they_ran_and_on_which_thread(self):
+        profile = StartupProfile()
+
+        with profile.phase("first"):
+            pass
+        thread = threading.Thread(
+            target=profile.run, args=("second", lambda: None), name="worker"
+        )
+        thread.start()
+        thread.join()
+
+        first, second = profile.phases
+        assert (first.name, first.thread) == ("first", "MainThread")
+        assert (second.name, second.thread) == ("second", "worker")
+        assert 0 <= first.started <= first.finished <= second.finished
+
+    def test_run_returns_the_result_and_times_failures_too(self):
+        profile = StartupProfile()
+
+        assert profile.run("ok", lambda a, name: (a, name), 1, name="x") == (1, "x")
+        with pytest.raises(RuntimeError):
+            profile.run("failed", lambda: (_ for _ in ()).throw(RuntimeError()))
+
+        assert [phase.name for phase in profile.phases] == ["ok", "failed"]
+
+    def test_a_milestone_is_only_recorded_the_first_time(self):
+        profile = StartupProfile()
+
+        assert profile.mark("ready") is True
+        at = profile.milestones["ready"]
+        assert profile.mark("ready") is False
+        assert profile.milestones["ready"] == at
+
+    def test_summary_lists_every_phase_and_milestone(self):
+        profile = StartupProfile()
+        with profile.phase("devices"):
+            pass
+        profile.mark("ready")
+
+        summary = profile.summary()
+
+        assert summary.startswith("devices 0.00s, ready at ")
+
+    def test_verbose_logs_the_full_report(self, caplog):
+        logger = logging.getLogger("test-startup-profile")
+        caplog.set_level(logging.INFO, logger=logger.name)
+        profile = StartupProfile(verbose=True)
+        with profile.phase("certificate"):
+            pass
+
+        profile.log(logger, "Started")
+
+        (record,) = caplog.records
+        lines = record.getMessage().splitlines()
+        assert lines[0] == "Started:"
+        assert lines[1].split() == ["phase", "start", "end", "took", "thread"]
+        assert lines[2].split()[0] == "certificate"
+        assert lines[2].split()[-1] == "MainThread"
+
+    def test_otherwise_logs_the_summary(self, caplog):
+        logger = logging.getLogger("test-startup-profile-summary")
+        caplog.set_level(logging.INFO, logger=logger.name)
+        profile = StartupProfile()
+        with profile.phase("certificate"):
+            pass
+
+        profile.log(logger, "Started")
+
+        (record,) = caplog.records
+        assert record.getMessage() == "Started (certificate 0.00s)"
@@ -1,16 +1,10 @@
-import datetime
-import ipaddress
 import json
 import os
 
 import platformdirs
 import pytest
-from cryptography import x509
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives.serialization import load_pem_private_key
 
 from logitech_flow_kvm import util
-from logitech_flow_kvm.exceptions import NoCertificateAvailable
 
 
 @pytest.fixture
@@ -56,15 +50,6 @@ class TestGetValidFilename:
         assert util.get_valid_filename("host-1.local") == "host-1.local"
 
 
-class TestGetAllIps:
-    def test_returns_ipv4_addresses(self):
-        ips = util.get_all_ips()
-
-        assert ips
-        for ip in ips:
-            assert isinstance(ipaddress.ip_address(ip), ipaddress.IPv4Address)
-
-
 class TestHostCertificateAndToken:
     def test_roundtrip(self, user_data_dir):
         util.set_host_certificate_and_token("myserver", "CERTIFICATE DATA", "my-token")
@@ -95,116 +80,9 @@ class TestHostCertificateAndToken:
             assert json.load(inf) == {"token": "tok"}
 
 
-class TestGetCertificateKeyPath:
-    def test_raises_when_no_certificate_exists(self, user_data_dir):
-        with pytest.raises(NoCertificateAvailable):
-            util.get_certificate_key_path("server")
-
-    def test_creates_certificate_and_key(self, user_data_dir):
-        cert_path, key_path = util.get_certificate_key_path("server", create=True)
-
-        assert os.path.exists(cert_path)
-        assert os.path.exists(key_path)
-
-        with open(cert_path, "rb") as inf:
-            certificate = x509.load_pem_x509_certificate(inf.read())
-        with open(key_path, "rb") as inf:
-            key = load_pem_private_key(inf.read(), password=None)
-
-        assert isinstance(key, rsa.RSAPrivateKey)
-        assert key.key_size == 4096
-
-        san = certificate.extensions.get_extension_for_class(
-            x509.SubjectAlternativeName
-        )
-        san_ips = {str(ip) for ip in san.value.get_values_for_type(x509.IPAddress)}
-        assert san_ips == set(util.get_all_ips())
-
-        lifetime = certificate.not_valid_after_utc - certificate.not_valid_before_utc
-        assert lifetime == datetime.timedelta(days=10 * 365)
-
-        # Without CA:TRUE, modern OpenSSL refuses to use this self-signed
-        # cert as a trust anchor (requests' verify=<path> does exactly that).
-        basic_constraints = certificate.extensions.get_extension_for_class(
-            x509.BasicConstraints
-        )
-        assert basic_constraints.value.ca is True
-        assert basic_constraints.critical is True
-
-    def test_reuses_existing_certificate(self, user_data_dir):
-        first = util.get_certificate_key_path("server", create=True)
-        with open(first[0], "rb") as inf:
-            first_contents = inf.read()
-
-        second = util.get_certificate_key_path("server")
-
-        assert first == second
-        with open(second[0], "rb") as inf:
-            assert inf.read() == first_contents
-
-    def test_certificate_includes_requested_hostnames(self, user_data_dir):
-        cert_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["foo.lan", "bar.lan"]
-        )
-
-        with open(cert_path, "rb") as inf:
-            certificate = x509.load_pem_x509_certificate(inf.read())
-
-        san = certificate.extensions.get_extension_for_class(
-            x509.SubjectAlternativeName
-        )
-        assert set(san.value.get_values_for_type(x509.DNSName)) == {
-            "foo.lan",
-            "bar.lan",
-        }
-
-    def test_reuses_certificate_when_hostnames_unchanged(self, user_data_dir):
-        first_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["foo.lan"]
-        )
-        with open(first_path, "rb") as inf:
-            first_contents = inf.read()
-
-        second_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["foo.lan"]
-        )
-        with open(second_path, "rb") as inf:
-            assert inf.read() == first_contents
-
-    def test_regenerates_when_hostnames_change(self, user_data_dir):
-        first_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["foo.lan"]
-        )
-        with open(first_path, "rb") as inf:
-            first_contents = inf.read()
-
-        second_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["bar.lan"]
-        )
-        with open(second_path, "rb") as inf:
-            second_contents = inf.read()
-
-        assert second_contents != first_contents
-
-        certificate = x509.load_pem_x509_certificate(second_contents)
-        san = certificate.extensions.get_extension_for_class(
-            x509.SubjectAlternativeName
-        )
-        assert set(san.value.get_values_for_type(x509.DNSName)) == {"bar.lan"}
-
-    def test_ip_address_changes_do_not_trigger_regeneration(
-        self, user_data_dir, monkeypatch
-    ):
-        monkeypatch.setattr(util, "get_all_ips", lambda: ["10.0.0.1"])
-        first_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["foo.lan"]
-        )
-        with open(first_path, "rb") as inf:
-            first_contents = inf.read()
-
-        monkeypatch.setattr(util, "get_all_ips", lambda: ["10.0.0.2"])
-        second_path, _ = util.get_certificate_key_path(
-            "server", create=True, hostnames=["foo.lan"]
-        )
-        with open(second_path, "rb") as inf:
-            assert inf.read() == first_contents
+class TestParseServerAddress:
+    def test_host_alone_takes_the_default_port(self):
+        assert util.parse_server_address("myserver", 24801) == ("myserver", 24801)
+
+    def test_host_and_port(self):
+        assert util.parse_server_address("10.0.0.2:9000", 24801) == ("10.0.0.2", 9000)
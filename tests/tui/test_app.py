@@ -1,9 +1,16 @@
 import asyncio
+import io
 import logging
 
+from rich.console import Console
 from textual.widgets import RichLog
 
+from logitech_flow_kvm.tui import app as app_module
+from logitech_flow_kvm.tui.app import LOG_FLUSH_INTERVAL
+from logitech_flow_kvm.tui.app import STATUS_REFRESH_RATE
 from logitech_flow_kvm.tui.app import FlowTUIApp
+from logitech_flow_kvm.tui.logging_handler import LogBuffer
+from logitech_flow_kvm.tui.widgets import ServerStatus
 from logitech_flow_kvm.tui.widgets import StatusPanel
 
 
@@ -11,6 +18,12 @@ def run(coro):
     return asyncio.run(coro)
 
 
+def _status(**kwargs) -> ServerStatus:
+    return ServerStatus(
+        host_number=1, binding_interface="0.0.0.0", port=24801, **kwargs
+    )
+
+
 class TestFlowTUIApp:
     def test_on_start_runs_once_the_app_is_mounted(self):
         started: list[FlowTUIApp] = []
@@ -22,15 +35,63 @@ class TestFlowTUIApp:
 
         run(body())
 
-    def test_update_status_is_thread_safe_and_updates_the_panel(self):
+    def test_published_status_is_rendered_to_the_panel(self):
         async def body():
             app = FlowTUIApp("flow-server", on_start=lambda a: None)
             async with app.run_test() as pilot:
-                await asyncio.to_thread(app.update_status, "new status")
-                await pilot.pause()
+                await asyncio.to_thread(app.publish_status, _status(desired_host=3))
+                await pilot.pause(3 / STATUS_REFRESH_RATE)
 
-                panel = app.query_one(StatusPanel)
-                assert "new status" in str(panel.render())
+                console = Console(width=80, record=True, file=io.StringIO())
+                console.print(app.query_one(StatusPanel).content)
+                assert "Desired host  3" in console.export_text()
+
+        run(body())
+
+    def test_only_the_latest_of_a_burst_is_rendered(self, monkeypatch):
+        rendered: list[ServerStatus] = []
+
+        def fake_render(status):
+            rendered.append(status)
+            return ""
+
+        monkeypatch.setattr(app_module, "render_status", fake_render)
+
+        async def body():
+            app = FlowTUIApp("flow-server", on_start=lambda a: None)
+            async with app.run_test() as pilot:
+
+                def publish_burst():
+                    for host in range(1, 6):
+                        app.publish_status(_status(desired_host=host))
+
+                await asyncio.to_thread(publish_burst)
+                await pilot.pause(3 / STATUS_REFRESH_RATE)
+
+                assert rendered == [_status(desired_host=5)]
+
+        run(body())
+
+    def test_an_unchanged_status_is_not_rendered_again(self, monkeypatch):
+        rendered: list[ServerStatus] = []
+
+        def fake_render(status):
+            rendered.append(status)
+            return ""
+
+        monkeypatch.setattr(app_module, "render_status", fake_render)
+
+        async def body():
+            app = FlowTUIApp("flow-server", on_start=lambda a: None)
+            async with app.run_test() as pilot:
+                app.publish_status(_status(desired_host=2))
+                await pilot.pause(3 / STATUS_REFRESH_RATE)
+                # Equal, though a different object -- as every publisher
+                # builds a fresh one.
+                app.publish_status(_status(desired_host=2))
+                await pilot.pause(3 / STATUS_REFRESH_RATE)
+
+                assert len(rendered) == 1
 
         run(body())
 
@@ -56,7 +117,7 @@ class TestFlowTUIApp:
                     logger.info("hello from a background thread")
 
                 await asyncio.to_thread(log_from_background_thread)
-                await pilot.pause()
+                await pilot.pause(3 * LOG_FLUSH_INTERVAL)
 
                 assert any(
                     "hello from a background thread" in str(item) for item in written
@@ -64,6 +125,56 @@ class TestFlowTUIApp:
 
         run(body())
 
+    def test_logging_never_waits_on_the_ui(self):
+        logger = logging.getLogger("test-flow-tui-app-log-nonblocking")
+        logger.setLevel(logging.INFO)
+
+        async def body():
+            app = FlowTUIApp("flow-server", on_start=lambda a: None)
+            async with app.run_test():
+                # With the UI loop itself busy here, a log bridge that round
+                # trips to it would deadlock rather than return.
+                logger.info("logged from the UI thread")
+                logger.info("and again")
+
+                lines, _ = app.log_buffer.drain()
+                assert any("and again" in line for line in lines)
+
+        run(body())
+
+    def test_dropped_lines_are_noted_in_the_log_panel(self):
+        async def body():
+            app = FlowTUIApp("flow-server", on_start=lambda a: None)
+            async with app.run_test() as pilot:
+                written: list[object] = []
+                log_widget = app.query_one(RichLog)
+                log_widget.write = written.append  # type: ignore[assignment]
+                app.log_buffer = LogBuffer(maxlen=2)
+
+                for n in range(5):
+                    app.log_buffer.append(f"line {n}")
+                await pilot.pause(3 * LOG_FLUSH_INTERVAL)
+
+                assert written == [
+                    "[yellow](3 log lines dropped here)[/]",
+                    "line 3",
+                    "line 4",
+                ]
+
+        run(body())
+
+    def test_the_log_panel_keeps_the_configured_scrollback(self):
+        async def body():
+            app = FlowTUIApp("flow-server", on_start=lambda a: None, log_scrollback=3)
+            async with app.run_test() as pilot:
+                for n in range(10):
+                    app.log_buffer.append(f"line {n}")
+                await pilot.pause(3 * LOG_FLUSH_INTERVAL)
+
+                assert len(app.query_one(RichLog).lines) == 3
+
+        run(body())
+
     def test_the_log_handler_is_detached_on_unmount(self):
         async def body():
             app = FlowTUIApp("flow-server", on_start=lambda a: None)
@@ -1,5 +1,6 @@
 import logging
 
+from logitech_flow_kvm.tui.logging_handler import LogBuffer
 from logitech_flow_kvm.tui.logging_handler import TextualLogHandler
 
 
@@ -30,3 +31,23 @@ class TestTextualLogHandler:
 
         assert received == []
         assert len(errors) == 1
+
+
+class TestLogBuffer:
+    def test_drain_takes_every_waiting_line_in_order(self):
+        buffer = LogBuffer()
+        buffer.append("one")
+        buffer.append("two")
+
+        assert buffer.drain() == (["one", "two"], 0)
+        assert buffer.drain() == ([], 0)
+
+    def test_the_oldest_lines_are_dropped_and_counted_when_full(self):
+        buffer = LogBuffer(maxlen=2)
+        for line in ["one", "two", "three", "four"]:
+            buffer.append(line)
+
+        assert buffer.drain() == (["three", "four"], 2)
+        buffer.append("five")
+        assert buffer.drain() == (["five"], 0)
+        assert buffer.dropped_total == 2
@@ -5,6 +5,7 @@ from logitech_flow_kvm.tui.widgets import DeviceStatus
 from logitech_flow_kvm.tui.widgets import ServerStatus
 from logitech_flow_kvm.tui.widgets import render_client_status
 from logitech_flow_kvm.tui.widgets import render_server_status
+from logitech_flow_kvm.tui.widgets import render_status
 
 
 def _column_values(table: Table, column: int) -> list[str]:
@@ -77,3 +78,12 @@ class TestRenderClientStatus:
 
         labels = _column_values(renderable, 0)
         assert "Follower" in labels
+
+
+class TestRenderStatus:
+    def test_renders_either_kind_of_status(self):
+        server = ServerStatus(host_number=1, binding_interface="0.0.0.0", port=24801)
+        client = ClientStatus(host_number=2, server="myserver")
+
+        assert "Listening" in _column_values(render_status(server), 0)
+        assert "Server" in _column_values(render_status(client), 0)